@@ -0,0 +1,2 @@
+__version__: str = "0.0.0"
+# read by setup.py, also part of the keys of cached results (see VIAYN/cache.py)
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+from typing import Dict, Generic, List, Sequence, Tuple
+
+import numpy as np
+
+from VIAYN.project_types import A, S, Agent, WeightedBet
+
+
+"""
+On-line statistics collected while training, so they don't have to be recomputed
+by walking TrainResult.histories afterwards.
+
+train() accepts a sequence of Accumulators & calls, for each of them:
+    start(agents): once, before the first episode
+    update(t, welfare_score, payouts, bets, selected_action): at the end of every timestep
+    end_episode(final_payouts): after the outstanding bets of an episode are paid out
+Per-agent statistics are kept in arrays indexed by the agent's position in the list passed
+to train(), so memory is O(agents) no matter how long training runs. Provided accumulators:
+    LossAccumulator: running mean & variance of each agent's prediction error
+    PayoutAccumulator: cumulative payouts received by each agent
+    BetVolumeAccumulator: money withdrawn for each agent's bets & number of bets
+    ActionWinRateAccumulator: how often each action was selected
+"""
+
+
+class RunningStats:
+    """
+    Running count, mean & variance of n independent streams of values,
+    updated with Welford's algorithm so it is numerically stable
+    """
+
+    def __init__(self, n: int):
+        self.count: np.ndarray = np.zeros(n, dtype=np.int64)
+        self.mean: np.ndarray = np.zeros(n, dtype=np.float64)
+        self._m2_: np.ndarray = np.zeros(n, dtype=np.float64)
+        # sum of squared differences from the mean
+
+    def update(self, indices: np.ndarray, values: np.ndarray) -> None:
+        """
+        Adds values[i] to stream indices[i] for every i
+
+        Parameters
+        ----------
+        indices: np.ndarray
+            the stream of each value, must not contain duplicates
+        values: np.ndarray
+            the new values, same length as indices
+        """
+        self.count[indices] += 1
+        delta: np.ndarray = values - self.mean[indices]
+        self.mean[indices] += delta / self.count[indices]
+        self._m2_[indices] += delta * (values - self.mean[indices])
+
+    @property
+    def variance(self) -> np.ndarray:
+        """
+        population variance of each stream, nan for streams without values
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 0, self._m2_ / self.count, np.nan)
+
+
+class Accumulator(Generic[A, S]):
+    """
+    Collects nothing. Subclass this & override the hooks to collect something
+    """
+
+    def start(self, agents: Sequence[Agent[A, S]]) -> None:
+        """
+        Parameters
+        ----------
+        agents: Sequence[Agent[A, S]]
+            the agents being trained, in the order passed to train()
+        """
+        pass
+
+    def update(self,
+            t: int,
+            welfare_score: float,
+            payouts: Dict[Agent[A, S], float],
+            bets: Dict[A, List[WeightedBet[A, S]]],
+            selected_action: A) -> None:
+        """
+        Parameters
+        ----------
+        t: int >= 0
+            the timestep of the episode that just ended
+        welfare_score: float
+            the aggregated votes about the state at t
+        payouts: Dict[Agent[A, S], float]
+            the payouts received at t for bets on earlier timesteps
+        bets: Dict[A, List[WeightedBet[A, S]]]
+            the valid bets placed on each action at t
+        selected_action: A
+            the action selected at t. Money was only withdrawn for its bets
+        """
+        pass
+
+    def end_episode(self, final_payouts: Dict[Agent[A, S], float]) -> None:
+        """
+        Parameters
+        ----------
+        final_payouts: Dict[Agent[A, S], float]
+            the payouts for bets that were outstanding when the episode ended
+        """
+        pass
+
+
+class _AgentAccumulator_(Accumulator[A, S]):
+    def start(self, agents: Sequence[Agent[A, S]]) -> None:
+        self.agents: List[Agent[A, S]] = list(agents)
+        self.agent_idx: Dict[Agent[A, S], int] = {agent: i for i, agent in enumerate(agents)}
+
+    def by_agent(self, values: np.ndarray) -> Dict[Agent[A, S], float]:
+        return {agent: float(value) for agent, value in zip(self.agents, values)}
+
+
+class LossAccumulator(_AgentAccumulator_[A, S]):
+    """
+    Running mean & variance of each agent's squared prediction error
+    (the loss used by the sample payout configurations), over every timestep
+    that their bets on selected actions predicted. Predictions about timesteps
+    after the end of an episode are not counted
+    """
+
+    def start(self, agents: Sequence[Agent[A, S]]) -> None:
+        super().start(agents)
+        self.stats: RunningStats = RunningStats(len(agents))
+        self._outstanding_: List[Tuple[int, np.ndarray, np.ndarray]] = []
+        # (t cast on, agent indices, predictions) of the bets on selected actions
+        # that still have predictions about future timesteps
+
+    def update(self,
+            t: int,
+            welfare_score: float,
+            payouts: Dict[Agent[A, S], float],
+            bets: Dict[A, List[WeightedBet[A, S]]],
+            selected_action: A) -> None:
+        still_outstanding: List[Tuple[int, np.ndarray, np.ndarray]] = []
+        for t_cast_on, indices, predictions in self._outstanding_:
+            t_idx: int = t - t_cast_on - 1
+            # same indexing as PayoutConfigBase: predictions start at the next timestep
+            if t_idx < predictions.shape[1]:
+                self.stats.update(indices, (predictions[:, t_idx] - welfare_score) ** 2)
+            if t_idx + 1 < predictions.shape[1]:
+                still_outstanding.append((t_cast_on, indices, predictions))
+        self._outstanding_ = still_outstanding
+
+        placed: List[WeightedBet[A, S]] = bets[selected_action]
+        if len(placed) > 0:
+            self._outstanding_.append((
+                t,
+                np.array([self.agent_idx[bet.cast_by] for bet in placed], dtype=np.int64),
+                np.array([bet.prediction for bet in placed], dtype=np.float64)))
+
+    def end_episode(self, final_payouts: Dict[Agent[A, S], float]) -> None:
+        self._outstanding_ = []
+
+    def mean_loss(self) -> Dict[Agent[A, S], float]:
+        return self.by_agent(self.stats.mean)
+
+    def loss_variance(self) -> Dict[Agent[A, S], float]:
+        return self.by_agent(self.stats.variance)
+
+
+class PayoutAccumulator(_AgentAccumulator_[A, S]):
+    """
+    Cumulative payouts received by each agent, including payouts of outstanding bets
+    at the end of each episode. Withdrawals aren't subtracted, see BetVolumeAccumulator
+    """
+
+    def start(self, agents: Sequence[Agent[A, S]]) -> None:
+        super().start(agents)
+        self.total: np.ndarray = np.zeros(len(agents), dtype=np.float64)
+
+    def _add_(self, payouts: Dict[Agent[A, S], float]) -> None:
+        for agent, payout in payouts.items():
+            self.total[self.agent_idx[agent]] += payout
+
+    def update(self,
+            t: int,
+            welfare_score: float,
+            payouts: Dict[Agent[A, S], float],
+            bets: Dict[A, List[WeightedBet[A, S]]],
+            selected_action: A) -> None:
+        self._add_(payouts)
+
+    def end_episode(self, final_payouts: Dict[Agent[A, S], float]) -> None:
+        self._add_(final_payouts)
+
+    def total_payouts(self) -> Dict[Agent[A, S], float]:
+        return self.by_agent(self.total)
+
+
+class BetVolumeAccumulator(_AgentAccumulator_[A, S]):
+    """
+    Money withdrawn for each agent's bets (i.e. their bets on selected actions)
+    & the number of those bets
+    """
+
+    def start(self, agents: Sequence[Agent[A, S]]) -> None:
+        super().start(agents)
+        self.volume: np.ndarray = np.zeros(len(agents), dtype=np.float64)
+        self.n_bets: np.ndarray = np.zeros(len(agents), dtype=np.int64)
+
+    def update(self,
+            t: int,
+            welfare_score: float,
+            payouts: Dict[Agent[A, S], float],
+            bets: Dict[A, List[WeightedBet[A, S]]],
+            selected_action: A) -> None:
+        bet: WeightedBet[A, S]
+        for bet in bets[selected_action]:
+            i: int = self.agent_idx[bet.cast_by]
+            self.volume[i] += bet.money * sum(bet.bet)
+            self.n_bets[i] += 1
+
+    def bet_volume(self) -> Dict[Agent[A, S], float]:
+        return self.by_agent(self.volume)
+
+
+class ActionWinRateAccumulator(Accumulator[A, S]):
+    """
+    The number of timesteps each action was available & selected
+    """
+
+    def start(self, agents: Sequence[Agent[A, S]]) -> None:
+        self.offered: Dict[A, int] = {}
+        self.selected: Dict[A, int] = {}
+
+    def update(self,
+            t: int,
+            welfare_score: float,
+            payouts: Dict[Agent[A, S], float],
+            bets: Dict[A, List[WeightedBet[A, S]]],
+            selected_action: A) -> None:
+        for action in bets:
+            self.offered[action] = self.offered.get(action, 0) + 1
+        self.selected[selected_action] = self.selected.get(selected_action, 0) + 1
+
+    def win_rate(self) -> Dict[A, float]:
+        """
+        fraction of the timesteps each action was available at that it was selected
+        """
+        return {action: self.selected.get(action, 0) / n for action, n in self.offered.items()}
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from typing import Any, Awaitable, Dict, Generator, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from VIAYN.project_types import (
+    A, B, S, Agent, AsyncAgent, ActionBet, Environment,
+    HistoryItem, SystemConfiguration, VoteRange, WeightedBet)
+from VIAYN.accumulators import Accumulator
+from VIAYN.instrumentation import Instrumentation
+from VIAYN.memory import MemoryTracker
+from VIAYN.retention import RetentionPolicy, StepSummary
+from VIAYN.train import TrainResult, episode_loop, pay_agents, enact_bets
+
+
+"""
+asyncio version of train() for AsyncAgents, e.g. agents backed by model servers.
+
+Each timestep, the votes of all agents are awaited at once, then (after payouts) the
+bets of every agent on every action are awaited at once, so a timestep waits for the
+slowest agent rather than the sum of all agents' latencies. Results are always used in
+the order of the agents, so runs are as deterministic as the agents are.
+
+With a timeout, calls that don't finish in time are cancelled:
+    a vote that times out is discarded, like an invalid vote
+    a bet that times out is treated as a zero bet, i.e. the agent doesn't bet on that action
+Regular (synchronous) Agents can be mixed in, they are called directly & never time out.
+
+train_async shares train()'s episode loop (see episode_loop), so retention, memory_tracker,
+record_balances, accumulators & money_epsilon work the same way. The only option of train()
+that isn't supported is executor: AsyncAgents are already awaited concurrently & synchronous
+Agents are called on the event loop.
+"""
+
+AnyAgent = Union[Agent[A, S], AsyncAgent[A, S]]
+
+
+async def _ask_(
+        agent: AnyAgent,
+        call: Union[Awaitable[Any], Any],
+        timeout: Optional[float],
+        timeouts: Optional[Dict[AnyAgent, int]]) -> Optional[Any]:
+    """
+    Returns
+    -------
+    result: Optional[Any]
+        the result of call, awaited if agent is an AsyncAgent.
+        None if it timed out
+    """
+    if not isinstance(agent, AsyncAgent):
+        return call
+    try:
+        return await asyncio.wait_for(call, timeout)
+    except asyncio.TimeoutError:
+        if timeouts is not None:
+            timeouts[agent] = timeouts.get(agent, 0) + 1
+        return None
+
+
+async def get_agent_votes_async(
+        agents: List[AnyAgent],
+        state: S,
+        config: SystemConfiguration[A, B, S],
+        timeout: Optional[float] = None,
+        timeouts: Optional[Dict[AnyAgent, int]] = None) -> float:
+    """
+    Same as get_agent_votes, but all of the votes are awaited at once
+
+    Parameters
+    ----------
+    timeout: Optional[float]
+        seconds to wait for each vote, no limit if None
+    timeouts: Optional[Dict[AnyAgent, int]]
+        if not None, the number of calls of each agent that timed out is added to it
+    """
+    votes: List[Optional[float]] = list(await asyncio.gather(*[
+        _ask_(agent, agent.vote(state), timeout, timeouts) for agent in agents]))
+    vote_range: VoteRange = config.voting_manager.vote_range
+    return config.voting_manager.aggregate_votes(
+        [vote for vote in votes if vote is not None and vote_range.contains(vote)])
+
+
+async def get_agent_bets_async(
+        agents: List[AnyAgent],
+        balances: Dict[AnyAgent, float],
+        state: S,
+        actions: Iterable[A],
+        timeout: Optional[float] = None,
+        timeouts: Optional[Dict[AnyAgent, int]] = None,
+        money_epsilon: Optional[float] = None) -> Dict[A, List[WeightedBet[A, S]]]:
+    """
+    Same as get_agent_bets, but the bets of every agent on every action are awaited at once.
+    Bets that time out are left out, see the module docstring
+
+    Parameters
+    ----------
+    timeout: Optional[float]
+        seconds to wait for each bet, no limit if None
+    timeouts: Optional[Dict[AnyAgent, int]]
+        if not None, the number of calls of each agent that timed out is added to it
+    money_epsilon: Optional[float]
+        if not None, agents with less money than this aren't asked to bet, see get_agent_bets
+    """
+    actions = list(actions)
+    if money_epsilon is not None:
+        agents = [agent for agent in agents if balances[agent] >= money_epsilon]
+    bets: List[Optional[ActionBet]] = list(await asyncio.gather(*[
+        _ask_(agent, agent.bet(state, action, balances[agent]), timeout, timeouts)
+        for action in actions for agent in agents]))
+    # action-major, the same order as get_agent_bets
+
+    placed_bets: Dict[A, List[WeightedBet[A, S]]] = {action: [] for action in actions}
+    i: int = 0
+    for action in actions:
+        for agent in agents:
+            bet: Optional[ActionBet] = bets[i]
+            i += 1
+            if bet is None or balances[agent] <= 0 or not any(amount > 0 for amount in bet.bet):
+                continue
+            # zero bets are left out, as in get_agent_bets
+            placed_bets[action].append(WeightedBet.trusted(
+                bet=bet.bet,
+                prediction=bet.prediction,
+                action=action,
+                money=balances[agent],
+                cast_by=agent))
+    return placed_bets
+
+
+async def play_timestep_async(
+        agents: List[AnyAgent],
+        balances: Dict[AnyAgent, float],
+        state: S,
+        actions: Iterable[A],
+        history: List[HistoryItem[A, S]],
+        t: int,
+        config: SystemConfiguration[A, B, S],
+        timeout: Optional[float] = None,
+        timeouts: Optional[Dict[AnyAgent, int]] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        summaries: Optional[List[StepSummary[A]]] = None,
+        accumulators: Sequence[Accumulator[A, S]] = (),
+        money_epsilon: Optional[float] = None) -> HistoryItem[A, S]:
+    """
+    Same as play_timestep, but votes & bets are awaited concurrently
+    """
+    if instrumentation is None:
+        instrumentation = Instrumentation()
+
+    with instrumentation.phase('vote', config.voting_manager):
+        welfare_score: float = await get_agent_votes_async(agents, state, config, timeout, timeouts)
+
+    payouts: Dict[AnyAgent, float] = pay_agents(
+        history, welfare_score, balances, config, t, instrumentation)
+
+    with instrumentation.phase('bet'):
+        placed_bets: Dict[A, List[WeightedBet[A, S]]] = await get_agent_bets_async(
+            agents, balances, state, actions, timeout, timeouts, money_epsilon)
+
+    return enact_bets(
+        agents, balances, placed_bets, welfare_score, payouts, t, config,
+        instrumentation, summaries, accumulators)
+
+
+async def train_async(
+        agents: List[AnyAgent],
+        env: Environment[A, S],
+        episode_seeds: Iterable[int],
+        config: SystemConfiguration[A, B, S],
+        tsteps_per_episode: int = np.inf,
+        timeout: Optional[float] = None,
+        timeouts: Optional[Dict[AnyAgent, int]] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        memory_tracker: Optional[MemoryTracker] = None,
+        retention: RetentionPolicy = RetentionPolicy(),
+        record_balances: bool = False,
+        accumulators: Sequence[Accumulator[A, S]] = (),
+        money_epsilon: Optional[float] = None) -> TrainResult[A, S]:
+    """
+    Same as train(), but agents may be AsyncAgents, whose votes & bets are
+    awaited concurrently. Run it with asyncio.run(train_async(...))
+    train()'s executor isn't supported, see the module docstring
+
+    Parameters
+    ----------
+    agents: List[AnyAgent]
+        the agents, AsyncAgents & Agents may be mixed
+    env: Environment[A, S]
+        the environment that the agents are acting in
+    episode_seeds: Iterable[int]
+        env.seed(seed) is called at the beginning of each episode
+    config: SystemConfiguration[A, B, S]
+        configuration for the loop
+    tsteps_per_episode: int >= 0
+        Runs each episode until either env.done() or tsteps_per_episode is exceeded
+    timeout: Optional[float] > 0
+        seconds to wait for each vote & bet of an AsyncAgent, no limit if None
+        see the module docstring for how timeouts are treated
+    timeouts: Optional[Dict[AnyAgent, int]]
+        if not None, the number of calls of each agent that timed out is added to it
+    instrumentation, memory_tracker, retention, record_balances, accumulators, money_epsilon
+        see train()
+
+    Returns
+    -------
+    result: TrainResult[A, S]
+        the full history & final balances, as returned by train()
+    """
+    assert timeout is None or timeout > 0
+    if instrumentation is None:
+        instrumentation = Instrumentation()
+    loop: Generator[Dict[str, Any], HistoryItem[A, S], TrainResult[A, S]] = episode_loop(
+        agents, env, episode_seeds, config, tsteps_per_episode,
+        instrumentation, memory_tracker, retention, record_balances, accumulators)
+    try:
+        step: Dict[str, Any] = next(loop)
+        while True:
+            step = loop.send(await play_timestep_async(
+                agents=agents,
+                config=config,
+                timeout=timeout,
+                timeouts=timeouts,
+                instrumentation=instrumentation,
+                accumulators=accumulators,
+                money_epsilon=money_epsilon,
+                **step))
+    except StopIteration as stop:
+        return stop.value
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from typing import Dict, Generic, List, Sequence, Tuple
+
+import numpy as np
+
+from VIAYN.project_types import A, S, Agent
+
+
+"""
+Dense record of every agent's balance at every timestep, see train(record_balances=True).
+
+Balances are written in to a preallocated (timesteps x agents) array that doubles in
+size when it fills up, so recording a timestep is a single row assignment &
+balance trajectories are column slices of the result, rather than something that
+has to be rebuilt by walking every HistoryItem & WeightedBet.
+"""
+
+
+class BalanceRecorder(Generic[A, S]):
+    def __init__(self, agents: Sequence[Agent[A, S]], capacity: int = 256):
+        """
+        Parameters
+        ----------
+        agents: Sequence[Agent[A, S]]
+            the agents to record, in column order
+        capacity: int > 0
+            the number of timesteps to allocate space for initially
+        """
+        assert capacity > 0
+        self.agents: List[Agent[A, S]] = list(agents)
+        self._rows_: np.ndarray = np.empty((capacity, len(self.agents)), dtype=np.float64)
+        self.n_steps: int = 0
+        self._episode_offsets_: List[int] = [0]
+
+    def record(self, balances: Dict[Agent[A, S], float]) -> None:
+        """
+        Appends the current balance of every agent as a new row
+        """
+        if self.n_steps == len(self._rows_):
+            grown: np.ndarray = np.empty((2 * len(self._rows_), len(self.agents)), dtype=np.float64)
+            grown[:self.n_steps] = self._rows_
+            self._rows_ = grown
+        self._rows_[self.n_steps] = [balances[agent] for agent in self.agents]
+        self.n_steps += 1
+
+    def end_episode(self) -> None:
+        self._episode_offsets_.append(self.n_steps)
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns
+        -------
+        balance_history: np.ndarray
+            (n_steps, n_agents) balance of each agent after each recorded timestep
+        episode_offsets: np.ndarray
+            (n_episodes + 1) the rows of episode e are
+            balance_history[episode_offsets[e]:episode_offsets[e + 1]]
+        """
+        return self._rows_[:self.n_steps].copy(), np.array(self._episode_offsets_, dtype=np.int64)
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from VIAYN import __version__
+from VIAYN.project_types import Agent
+from VIAYN.samples.factory.serialization import spec_hash
+from VIAYN.storage import FORMAT_VERSION, save_result, load_result, StoredTrainResult
+from VIAYN.sweep import RunSpec
+from VIAYN.train import TrainResult
+
+
+"""
+Content-addressed on-disk cache of TrainResults.
+
+Results are keyed by ResultCache.key, the hash of RunSpec.key() (every factory spec,
+the episode seeds & tsteps_per_episode) together with CACHE_FORMAT_VERSION, the storage
+FORMAT_VERSION & the package version, so a deterministic run only needs to be trained once,
+and entries from an older version of train() or save_result are never used: they are
+missed & eventually evicted. Each entry is a directory written by save_result.
+On a hit, the agents & environment are rebuilt from the RunSpec & the result is loaded
+back in to them.
+
+The cache is bounded by max_bytes: after an entry is added, the least recently
+used entries (by modification time, which is updated on every hit) are deleted
+until the cache fits.
+"""
+
+
+CACHE_FORMAT_VERSION: int = 1
+# bump whenever train() gives different results for the same RunSpec,
+# or the layout of cache entries changes
+
+
+class ResultCache:
+    def __init__(self, cache_dir: str, max_bytes: Optional[int] = None):
+        """
+        Parameters
+        ----------
+        cache_dir: str
+            directory to store results in, created if it doesn't exist
+        max_bytes: Optional[int]
+            maximum total size of the cache on disk, unbounded if None
+        """
+        assert max_bytes is None or max_bytes > 0
+        self.cache_dir: str = cache_dir
+        self.max_bytes: Optional[int] = max_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(spec: RunSpec) -> Optional[str]:
+        """
+        Returns
+        -------
+        key: Optional[str]
+            the name of spec's entry, see the module docstring.
+            None if spec can't be hashed
+        """
+        spec_key: Optional[str] = spec.key()
+        if spec_key is None:
+            return None
+        return spec_hash({
+            'cache_format_version': CACHE_FORMAT_VERSION,
+            'storage_format_version': FORMAT_VERSION,
+            'package_version': __version__,
+            'spec': spec_key,
+        })
+
+    def _entry_path_(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get_or_run(self, spec: RunSpec) -> Tuple[List[Agent], TrainResult]:
+        """
+        Parameters
+        ----------
+        spec: RunSpec
+            the run to look up, or to train if it isn't cached
+
+        Returns
+        -------
+        agents: List[Agent]
+            the agents created from spec, in order
+        result: TrainResult
+            the result of training those agents
+        """
+        key: Optional[str] = self.key(spec)
+        if key is not None and os.path.isdir(self._entry_path_(key)):
+            self.hits += 1
+            os.utime(self._entry_path_(key))
+            return self._load_(spec, key)
+        self.misses += 1
+        agents, result = spec.run()
+        if key is not None:
+            self._store_(key, result, agents, spec)
+        return agents, result
+
+    def _load_(self, spec: RunSpec, key: str) -> Tuple[List[Agent], TrainResult]:
+        agents, env, _ = spec.create()
+        stored: StoredTrainResult = load_result(self._entry_path_(key))
+        action_lookup: Dict[str, object] = {str(action): action for action in env.actions()}
+        assert len(action_lookup) == len(env.actions()), "actions need unique str() to be cached"
+        actions: List[object] = [action_lookup[label] for label in stored.actions]
+        return agents, stored.to_train_result(agents, actions)
+
+    def _store_(self, key: str, result: TrainResult, agents: List[Agent], spec: RunSpec) -> None:
+        tmp_dir: str = tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp-')
+        save_result(result, tmp_dir, agents, spec.agents)
+        try:
+            os.replace(tmp_dir, self._entry_path_(key))
+        except OSError:
+            # another process stored the same result first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.evict()
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """
+        Returns
+        -------
+        entries: List[Tuple[str, int, float]]
+            (key, size in bytes, last used time) of each entry, least recently used first
+        """
+        result: List[Tuple[str, int, float]] = []
+        for key in os.listdir(self.cache_dir):
+            path: str = self._entry_path_(key)
+            if key.startswith('.') or not os.path.isdir(path):
+                continue
+            size: int = sum(entry.stat().st_size for entry in os.scandir(path))
+            result.append((key, size, os.stat(path).st_mtime))
+        return sorted(result, key=lambda entry: entry[2])
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> None:
+        """
+        Deletes the least recently used entries until the cache fits in max_bytes
+        """
+        if self.max_bytes is None:
+            return
+        entries: List[Tuple[str, int, float]] = self.entries()
+        total: int = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self._entry_path_(key), ignore_errors=True)
+            total -= size
+
+    def clear(self) -> None:
+        for key, _, _ in self.entries():
+            shutil.rmtree(self._entry_path_(key), ignore_errors=True)
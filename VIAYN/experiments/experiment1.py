@@ -1,16 +1,15 @@
-from typing import Any, Dict, List, Tuple, Generic, Optional
+from typing import Dict, List, Tuple, Generic, Optional
 
-from numpy.lib.histograms import histogram
 from VIAYN.project_types import (
-    A, HistoryItem, S, Agent, Environment, 
+    A, S, Agent, Environment, 
     PolicyConfiguration, VotingConfiguration, PayoutConfiguration,
-    SystemConfiguration, WeightedBet)
+    SystemConfiguration)
 from VIAYN.samples.factory import (
     PolicyConfigEnum, PolicyConfigFactory, PolicyConfigFactorySpec,
     PayoutConfigEnum, PayoutConfigFactory, PayoutConfigFactorySpec,
     VotingConfigEnum, VotingConfigFactory, VotingConfigFactorySpec,
     AgentFactory, AgentFactorySpec, AgentsEnum,
-    EnvFactory, EnvsEnum, EnvsFactorySpec)
+    EnvFactory, EnvsEnum, EnvsFactorySpec, VoteBound)
 from VIAYN.samples.vote_ranges import BinaryVoteRange
 from VIAYN.samples.env import IntAction as IA
 from VIAYN.train import TrainResult, train
@@ -55,7 +54,7 @@ a.add(
     AgentFactory.create(
         AgentFactorySpec(AgentsEnum.random,
         vote=1.,
-        totalVotesBound=(lambda _: 0.99, lambda _: 1.01),
+        totalVotesBound=(VoteBound.constant(0.99), VoteBound.constant(1.01)),
         seed=0,
         bet=0.5,
         N=1)),
@@ -65,7 +64,7 @@ a.add(
 a.add(AgentFactory.create(
     AgentFactorySpec(AgentsEnum.random,
         vote=0.,
-        totalVotesBound=(lambda _: 0.9, lambda _: 1.1),
+        totalVotesBound=(VoteBound.constant(0.9), VoteBound.constant(1.1)),
         seed=0,
         bet=0.95,
         N=1)),
@@ -76,7 +75,7 @@ for i in range(6):
     a.add(AgentFactory.create(
         AgentFactorySpec(AgentsEnum.random,
             vote=0.,
-            totalVotesBound=(lambda _: 0, lambda _: 8),
+            totalVotesBound=(VoteBound.constant(0), VoteBound.constant(8)),
             seed=i,
             bet=0.5,
             N=1)),
@@ -105,41 +104,36 @@ pac: PayoutConfiguration[IA, IA] = PayoutConfigFactory.create(
 config: SystemConfiguration[IA, float, IA] = SystemConfiguration(
     vc, poc, pac)
 
-result: TrainResult[IA, IA] = train(a.list(), environment, range(10), config, tsteps_per_episode=10)
+result: TrainResult[IA, IA] = train(
+    a.list(), environment, range(10), config, tsteps_per_episode=10, record_balances=True)
 
 
 def read_moneys(result: TrainResult[A, S]) -> Dict[Agent[A, S], List[Tuple[int, float]]]:
-    balance_over_time: Dict[Agent[A, S], List[Tuple[int, float]]] = {}
-    episode_history: List[HistoryItem[A, S]]
-    for episode_history in result.histories:
-        hist_item: HistoryItem[A, S]
-        for hist_item in episode_history:
-            bet: WeightedBet[A, S]
-            for bet in hist_item.predictions[hist_item.selected_action]:
-                agent: Agent[A, S] = bet.cast_by
-                t: int = hist_item.t_enacted
-                money: float = bet.money
-                
-                if agent not in balance_over_time:
-                    balance_over_time[agent] = []
-                balance_over_time[agent].append((t, money))
-    return balance_over_time
+    return {
+        agent: list(enumerate(result.balance_trajectory(agent).tolist()))
+        for agent in result.balances}
+
+
+def plot_balances(
+        agents: Agents[A, S],
+        balances: Dict[Agent[A, S], List[Tuple[int, float]]]) -> None:
+    import matplotlib.pyplot as plt
+    # matplotlib is slow to import, so only import it when plotting
+    for log_plot in [True, False]:
+        for agent_name in agents.agents:
+            data = balances[agents.agents[agent_name]]
+            plt.plot([m for _, m in data], color=agents.colors[agent_name])
+        plt.legend(list(agents.agents.keys()))
+        ylabel: str = 'agent money'
+        if log_plot:
+            plt.yscale('log')
+            ylabel += ' (log plot)'
+        plt.ylabel(ylabel)
+        plt.xlabel('timestep')
+        plt.title("Does a highly confident good agent have more weight \n than a cautious great one?")
+        plt.show()
 
 
 balances:  Dict[Agent[IA, IA], List[Tuple[int, float]]] = read_moneys(result)
-
-import matplotlib.pyplot as plt
-for log_plot in [True, False]:
-    for agent_name in a.agents:
-        data = balances[a.agents[agent_name]]
-        plt.plot([m for _, m in data], color=a.colors[agent_name])
-    plt.legend(list(a.agents.keys()))
-    ylabel: str = 'agent money'
-    if log_plot:
-        plt.yscale('log')
-        ylabel += ' (log plot)'
-    plt.ylabel(ylabel)
-    plt.xlabel('timestep')
-    plt.title("Does a highly confident good agent have more weight \n than a cautious great one?")
-    plt.show()
+plot_balances(a, balances)
 print()
\ No newline at end of file
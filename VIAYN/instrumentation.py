@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+import json
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+
+"""
+Optional timing of the phases of the predict-act-vote-payout loop.
+
+train() (and train_vectorized()) accept an Instrumentation object and wrap each phase
+of every timestep in instrumentation.phase(name, component). The phases are:
+    vote: aggregating agent votes (component: the voting configuration)
+    payout: paying agents for their previous bets (component: the payout configuration)
+    bet: soliciting bets from every agent for every action
+    validate: discarding invalid bets (component: the system configuration)
+    select_action: aggregating bets & choosing an action (component: the policy configuration)
+    withdraw: withdrawing money for the bets on the selected action
+    accumulate: updating on-line statistics, only if there are any (see VIAYN/accumulators.py)
+    env.step: stepping the environment
+    agent.view: showing agents what happened
+    final_payout: paying out outstanding bets at the end of an episode
+
+The default Instrumentation does nothing, so the only cost when disabled is entering
+an empty context manager per phase. PhaseTimer records the wall-clock time & number of
+calls of each phase & component, and can export a summary table or a Chrome trace
+(open chrome://tracing or https://ui.perfetto.dev and load the JSON file).
+"""
+
+PhaseKey = Tuple[str, Optional[str]]
+# (phase name, component name)
+
+_null_phase_: ContextManager[None] = nullcontext()
+
+
+class Instrumentation:
+    """
+    Records nothing. Subclass this & override phase to record something
+    """
+
+    def phase(self, name: str, component: Any = None) -> ContextManager[None]:
+        """
+        Parameters
+        ----------
+        name: str
+            the name of the phase being entered
+        component: Any
+            the configuration (or other object) doing the work,
+            or a string naming it. May be None
+
+        Returns
+        -------
+        context: ContextManager[None]
+            exited when the phase is over
+        """
+        return _null_phase_
+
+
+class PhaseTimer(Instrumentation):
+    """
+    Records wall-clock time & call counts for each phase & component.
+    Components are identified by their class name
+    """
+
+    def __init__(self, record_timeline: bool = True):
+        """
+        Parameters
+        ----------
+        record_timeline: bool
+            whether to keep every individual phase for chrome_trace().
+            The timeline grows with the number of timesteps, totals don't
+        """
+        self.record_timeline: bool = record_timeline
+        self.totals: Dict[PhaseKey, float] = {}
+        # total seconds spent in each phase
+        self.counts: Dict[PhaseKey, int] = {}
+        # number of times each phase was entered
+        self.timeline: List[Tuple[PhaseKey, float, float]] = []
+        # (phase, start, end) for every phase, in seconds since perf_counter's epoch
+        self._origin_: float = perf_counter()
+
+    @contextmanager
+    def phase(self, name: str, component: Any = None) -> Iterator[None]:
+        start: float = perf_counter()
+        try:
+            yield
+        finally:
+            end: float = perf_counter()
+            key: PhaseKey = (name, _component_name_(component))
+            self.totals[key] = self.totals.get(key, 0.) + (end - start)
+            self.counts[key] = self.counts.get(key, 0) + 1
+            if self.record_timeline:
+                self.timeline.append((key, start, end))
+
+    def total_time(self) -> float:
+        return sum(self.totals.values())
+
+    def summary(self) -> str:
+        """
+        Returns
+        -------
+        table: str
+            one row per phase & component, slowest first
+        """
+        total: float = self.total_time()
+        lines: List[str] = [
+            f"{'phase':<16} {'component':<36} {'calls':>8} {'total (ms)':>12} {'mean (us)':>11} {'%':>6}"]
+        key: PhaseKey
+        for key in sorted(self.totals, key=lambda k: -self.totals[k]):
+            name, component = key
+            seconds: float = self.totals[key]
+            calls: int = self.counts[key]
+            lines.append(
+                f"{name:<16} {component or '-':<36} {calls:>8} {seconds * 1e3:>12.3f} "
+                f"{seconds / calls * 1e6:>11.2f} {100 * seconds / total if total > 0 else 0.:>6.1f}")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        Returns
+        -------
+        trace: Dict[str, Any]
+            the timeline in the Chrome trace event format
+        """
+        return {
+            'traceEvents': [
+                {
+                    'name': name,
+                    'cat': component or name,
+                    'ph': 'X',
+                    'ts': (start - self._origin_) * 1e6,
+                    'dur': (end - start) * 1e6,
+                    'pid': 0,
+                    'tid': 0,
+                }
+                for (name, component), start, end in self.timeline],
+            'displayTimeUnit': 'ms',
+        }
+
+    def save_chrome_trace(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+def _component_name_(component: Any) -> Optional[str]:
+    if component is None or isinstance(component, str):
+        return component
+    return type(component).__name__
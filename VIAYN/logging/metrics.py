@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+import atexit
+import csv
+import os
+import time
+from typing import Any, Dict, IO, Iterable, List, Optional, Tuple
+
+
+"""
+Buffered, append-only writer for metrics.
+
+Metrics are written in long format, one row per value:
+    column,index,value
+    balance_agent1,0,1.0
+    balance_agent1,1,0.95
+so new columns & new rows can both be appended to the end of the file,
+& nothing that has been written is ever read back or rewritten.
+read_metrics turns the file back into one list per column.
+Indices count from 0 for each writer, so if a file is reopened
+& a column is appended to again, use the order of the rows rather than the index.
+
+Rows are buffered in memory & written when max_buffered_rows is reached,
+when flush_interval seconds have passed since the last write to disk
+(checked whenever something is written), & when the writer is closed.
+Writers that are never closed are closed when the interpreter exits.
+
+Metrics files are named with METRICS_SUFFIX, so they aren't mistaken for the wide CSVs
+(one column per vector, readable with pd.read_csv) that Reporter.report_vector writes.
+write_wide_csv turns a metrics file in to a wide CSV & convert_wide_csv does the opposite.
+"""
+
+HEADER: Tuple[str, str, str] = ('column', 'index', 'value')
+
+METRICS_SUFFIX: str = '.metrics.csv'
+
+
+class MetricsWriter:
+    def __init__(self,
+            path: str,
+            max_buffered_rows: int = 10000,
+            flush_interval: float = 5.):
+        """
+        Parameters
+        ----------
+        path: str
+            file to append to, created if it doesn't exist
+        max_buffered_rows: int > 0
+            number of rows to keep in memory before writing them
+        flush_interval: float >= 0
+            maximum number of seconds to keep rows in memory
+        """
+        assert max_buffered_rows > 0
+        assert flush_interval >= 0
+        self.path: str = path
+        self.max_buffered_rows: int = max_buffered_rows
+        self.flush_interval: float = flush_interval
+        is_new: bool = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new:
+            with open(path, newline='') as f:
+                if tuple(next(csv.reader(f), ())) != HEADER:
+                    raise ValueError(
+                        f"{path} is not a metrics file written by MetricsWriter "
+                        f"(its header isn't {','.join(HEADER)}). If it is a CSV with one column "
+                        f"per vector, convert it with convert_wide_csv({path!r}, <new path>) "
+                        f"& append to the new path")
+        self._file_: Optional[IO[str]] = open(path, 'a', newline='')
+        self._writer_ = csv.writer(self._file_)
+        if is_new:
+            self._writer_.writerow(HEADER)
+            self._file_.flush()
+        self._buffer_: List[Tuple[str, int, Any]] = []
+        self._next_index_: Dict[str, int] = {}
+        self._last_flush_: float = time.monotonic()
+        atexit.register(self.close)
+
+    @property
+    def closed(self) -> bool:
+        return self._file_ is None
+
+    def write_vector(self, column: str, vector: Iterable[Any]) -> None:
+        """
+        Appends every value in vector to column
+        """
+        for value in vector:
+            self.write_value(column, value, flush=False)
+        self._maybe_flush_()
+
+    def write_row(self, row: Dict[str, Any]) -> None:
+        """
+        Appends one value to each of the columns in row
+        """
+        for column, value in row.items():
+            self.write_value(column, value, flush=False)
+        self._maybe_flush_()
+
+    def write_value(self, column: str, value: Any, flush: bool = True) -> None:
+        """
+        Appends value to column
+
+        Parameters
+        ----------
+        column: str
+            the column to append to
+        value: Any
+            the value to append
+        flush: bool
+            whether to check if the buffer should be written
+        """
+        assert not self.closed, "writer is closed"
+        index: int = self._next_index_.get(column, 0)
+        self._next_index_[column] = index + 1
+        self._buffer_.append((column, index, value))
+        if flush:
+            self._maybe_flush_()
+
+    def _maybe_flush_(self) -> None:
+        if len(self._buffer_) >= self.max_buffered_rows or \
+                time.monotonic() - self._last_flush_ >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes all buffered rows to disk
+        """
+        if self.closed:
+            return
+        self._writer_.writerows(self._buffer_)
+        self._buffer_ = []
+        self._file_.flush()
+        self._last_flush_ = time.monotonic()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.flush()
+        self._file_.close()
+        self._file_ = None
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> "MetricsWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def read_metrics(path: str) -> Dict[str, List[str]]:
+    """
+    Parameters
+    ----------
+    path: str
+        file written by MetricsWriter
+
+    Returns
+    -------
+    columns: Dict[str, List[str]]
+        the values of each column, in the order they were written
+        values are returned as strings, as stored in the file
+    """
+    columns: Dict[str, List[str]] = {}
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        assert tuple(next(reader)) == HEADER
+        for column, _, value in reader:
+            columns.setdefault(column, []).append(value)
+    return columns
+
+
+def read_wide_csv(path: str) -> Dict[str, List[str]]:
+    """
+    Parameters
+    ----------
+    path: str
+        CSV with one column per vector, e.g. written by write_wide_csv or pandas
+
+    Returns
+    -------
+    columns: Dict[str, List[str]]
+        the values of each column, without the empty cells
+        that pad columns shorter than the longest one
+    """
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        names: List[str] = next(reader, [])
+        columns: List[List[str]] = [[] for _ in names]
+        row: List[str]
+        for row in reader:
+            for values, value in zip(columns, row):
+                values.append(value)
+    values: List[str]
+    for values in columns:
+        while len(values) > 0 and values[-1] == '':
+            values.pop()
+    return dict(zip(names, columns))
+
+
+def write_wide_csv(path: str, columns: Dict[str, List[Any]]) -> None:
+    """
+    Writes columns to path with one column per vector, padding shorter
+    columns with empty cells (the layout pd.read_csv reads directly)
+    """
+    n_rows: int = max((len(values) for values in columns.values()), default=0)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(columns))
+        i: int
+        for i in range(n_rows):
+            writer.writerow([values[i] if i < len(values) else '' for values in columns.values()])
+
+
+def convert_wide_csv(wide_path: str, path: str) -> None:
+    """
+    Converts a CSV with one column per vector in to a metrics file,
+    which MetricsWriter can append to
+
+    Parameters
+    ----------
+    wide_path: str
+        the CSV to convert, see read_wide_csv
+    path: str
+        the metrics file to create, shouldn't exist yet
+    """
+    assert not os.path.exists(path), f"{path} already exists"
+    with MetricsWriter(path) as writer:
+        column: str
+        values: List[str]
+        for column, values in read_wide_csv(wide_path).items():
+            writer.write_vector(column, values)
@@ -4,51 +4,61 @@ Created on Thu May  7 00:48:31 2020
 
 @author: suhai
 """
+import atexit
 import logging
-import pandas as pd
-import numpy as np
-from typing import List, Any, Optional, TypeVar, Dict
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Any, Optional, TypeVar, Dict, TYPE_CHECKING
+
+from VIAYN.logging.metrics import (
+    MetricsWriter, METRICS_SUFFIX, read_metrics, write_wide_csv, convert_wide_csv)
+
+if TYPE_CHECKING:
+    import pandas as pd
+# pandas is only imported when it is used (see read_vectors), it is slow to import
 
 T = TypeVar("T")
 
 class Reporter:
-    __instance__: Optional[logging.Logger] = None
+    """
+    Logs to one file per log_file. Every log file has its own logger, which only
+    puts records on a queue; a background QueueListener thread writes them to the file.
+    Logging is therefore a cheap enqueue on the calling thread (e.g. inside train()).
+    Records are written by the time shutdown/shutdownALL return,
+    or when the interpreter exits
+    """
+    __loggers__: Dict[str, logging.Logger] = {}
+    __listeners__: Dict[str, QueueListener] = {}
     __fileHandlers__: Dict[str,logging.FileHandler] = {}
     __counts__ : Dict[str,int] = {}
+    __metricWriters__: Dict[str, MetricsWriter] = {}
         
     def __init__(self,log_file: str ='logfile.log'):
-        if (Reporter.__instance__ is None):
-            Reporter.__instance__ = logging.getLogger()
-            #### which messages to report
-            Reporter.__instance__.setLevel(logging.DEBUG)
-            #############################
         self.formatter:logging.Formatter = logging.Formatter('%(asctime)s : %(levelname)s : %(name)s : %(message)s')
         self.fileId = log_file
-        if (log_file not in Reporter.__fileHandlers__.keys()):
+        if (log_file not in Reporter.__loggers__.keys()):
             Reporter.__fileHandlers__[log_file] = logging.FileHandler(log_file)
-            Reporter.__counts__[log_file] = 1
-            self.remove_handlers()
-            # add file handler to logger
             Reporter.__fileHandlers__[log_file].setFormatter(self.formatter)
-            Reporter.__instance__.addHandler(Reporter.__fileHandlers__[log_file])
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+            Reporter.__listeners__[log_file] = QueueListener(
+                log_queue, Reporter.__fileHandlers__[log_file])
+            Reporter.__listeners__[log_file].start()
+            logger: logging.Logger = logging.getLogger(f"{__name__}.{log_file}")
+            #### which messages to report
+            logger.setLevel(logging.DEBUG)
+            #############################
+            logger.propagate = False
+            logger.handlers = [QueueHandler(log_queue)]
+            Reporter.__loggers__[log_file] = logger
+            Reporter.__counts__[log_file] = 1
+        else:
+            Reporter.__counts__[log_file] += 1
+        self.logger: logging.Logger = Reporter.__loggers__[log_file]
+        if Reporter.__counts__[log_file] == 1:
             ## Testing logging
             self.pulse()
             ##################
-        else:
-            Reporter.__counts__[log_file] += 1
-
-    def remove_handlers(self):
-        Reporter.__instance__.propagate = False
-        while Reporter.__instance__.handlers:
-            Reporter.__instance__.handlers.pop()
-
-    def set_correct_handler(self):
-        if (Reporter.__instance__ is not None):
-            self.remove_handlers()
-            # add file handler to logger
-            Reporter.__instance__.addHandler(
-                Reporter.__fileHandlers__[self.fileId]
-            )
 
     def pulse(self):
         self.warning("TESTING STARTED")
@@ -59,54 +69,97 @@ class Reporter:
         self.warning("TESTING ENDED")
         
     def critical(self,text: str):
-        if (Reporter.__instance__ is not None):
-            self.set_correct_handler()
-            Reporter.__instance__.critical(text)
+        self.logger.critical(text)
             
     def debug(self,text: str):
-        if (Reporter.__instance__ is not None):
-            self.set_correct_handler()
-            Reporter.__instance__.debug(text)
+        self.logger.debug(text)
             
     def info(self,text: str):
-        if (Reporter.__instance__ is not None):
-            self.set_correct_handler()
-            Reporter.__instance__.info(text)
+        self.logger.info(text)
             
     def warning(self,text: str):
-        if (Reporter.__instance__ is not None):
-            self.set_correct_handler()
-            Reporter.__instance__.warning(text)
+        self.logger.warning(text)
             
     def error(self,text: str):
-        if (Reporter.__instance__ is not None):
-            self.set_correct_handler()
-            Reporter.__instance__.error(text)
+        self.logger.error(text)
 
     def shutdown(self):
         self.warning("LOGGER SHUTDOWN\n")
         Reporter.__counts__[self.fileId] -= 1
         if (Reporter.__counts__[self.fileId] <= 0):
-            del Reporter.__fileHandlers__[self.fileId]
-            del Reporter.__counts__[self.fileId]
+            Reporter._close_file_(self.fileId)
     
     def shutdownALL(self):
-        for i in Reporter.__fileHandlers__:
-            self.remove_handlers()
-            # add file handler to logger
-            Reporter.__instance__.addHandler(
-                Reporter.__fileHandlers__[i]
-            )
-            self.warning("LOGGER SHUTDOWN\n")
-        self.remove_handlers()
+        for log_file in list(Reporter.__loggers__):
+            Reporter.__loggers__[log_file].warning("LOGGER SHUTDOWN\n")
+            Reporter._close_file_(log_file)
+        Reporter.close_vectors()
         logging.shutdown()
+
+    @staticmethod
+    def _close_file_(log_file: str) -> None:
+        # stopping the listener writes everything left in the queue
+        Reporter.__listeners__.pop(log_file).stop()
+        Reporter.__fileHandlers__.pop(log_file).close()
+        Reporter.__loggers__.pop(log_file).handlers = []
+        del Reporter.__counts__[log_file]
+
+    @staticmethod
+    def _close_all_files_() -> None:
+        for log_file in list(Reporter.__loggers__):
+            Reporter._close_file_(log_file)
        
         
     def report_vector(self, vector: List[T],file: str,column: str):
-        try:
-            res: pd.DataFrame = pd.read_csv(file+'.csv')
-            res = pd.concat([res,pd.DataFrame(data=np.asarray(vector),columns=[column])],axis=1)
-        except:
-            res = pd.DataFrame(data=np.asarray(vector),columns=[column])
-            
-        res.to_csv(file+'.csv',index=False)
+        """
+        Appends vector as a new column of file + '.csv', which has one column per vector
+        (read it with pd.read_csv, or read_vectors).
+        Vectors are appended to file + METRICS_SUFFIX by a MetricsWriter as they are reported,
+        & file + '.csv' is rewritten from it once the writer is closed (by close_vectors,
+        shutdownALL or at exit). A file + '.csv' without a metrics file (e.g. from an
+        older run) is converted in to one first, so its columns are kept
+        """
+        if file not in Reporter.__metricWriters__:
+            Reporter.__metricWriters__[file] = Reporter._open_vectors_(file)
+        Reporter.__metricWriters__[file].write_vector(column, vector)
+
+    @staticmethod
+    def _open_vectors_(file: str) -> MetricsWriter:
+        path: str = file + METRICS_SUFFIX
+        if not os.path.exists(path) and os.path.exists(file + '.csv'):
+            convert_wide_csv(file + '.csv', path)
+        return MetricsWriter(path)
+
+    @staticmethod
+    def read_vectors(file: str) -> "pd.DataFrame":
+        """
+        Reads the vectors reported to file, with one column per vector
+        """
+        import pandas as pd
+        if file in Reporter.__metricWriters__:
+            Reporter.__metricWriters__[file].flush()
+        columns: Dict[str, List[str]] = read_metrics(file + METRICS_SUFFIX)
+        return pd.DataFrame({
+            column: pd.Series(_to_numeric_(values)) for column, values in columns.items()})
+
+    @staticmethod
+    def close_vectors() -> None:
+        """
+        Closes the metrics writers & writes every file + '.csv', see report_vector
+        """
+        for file, writer in Reporter.__metricWriters__.items():
+            writer.close()
+            write_wide_csv(file + '.csv', read_metrics(writer.path))
+        Reporter.__metricWriters__.clear()
+
+
+def _to_numeric_(values: List[str]) -> Any:
+    import pandas as pd
+    try:
+        return pd.to_numeric(values)
+    except ValueError:
+        return values
+
+
+atexit.register(Reporter._close_all_files_)
+atexit.register(Reporter.close_vectors)
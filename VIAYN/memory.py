@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+import os
+import pickle
+import sys
+import warnings
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from VIAYN.project_types import A, S, Agent, HistoryItem, WeightedBet
+
+
+"""
+Memory accounting for the history that train() keeps.
+
+Sizes are estimated by walking the objects with sys.getsizeof, rather than with
+tracemalloc, so that they are cheap, deterministic & can be computed for any
+TrainResult after the fact. Only memory owned by the history is counted:
+agents, actions & states are referenced by the history but not owned by it,
+so only the references to them are counted. Objects shared within a history item
+(e.g. a constant bet tuple shared by many bets) are only counted once per item,
+so estimates for histories that share objects across timesteps are an upper bound.
+
+MemoryTracker follows the size of the history while train() is running,
+and can enforce a memory budget by dropping (or spilling to disk) the oldest episodes.
+"""
+
+
+def _object_nbytes_(obj: Any, seen: Set[int]) -> int:
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    return sys.getsizeof(obj)
+
+
+def _sequence_nbytes_(sequence: Sequence[Any], seen: Set[int]) -> int:
+    if id(sequence) in seen:
+        return 0
+    return _object_nbytes_(sequence, seen) + sum(_object_nbytes_(val, seen) for val in sequence)
+
+
+def bet_nbytes(bet: WeightedBet[A, S], seen: Optional[Set[int]] = None) -> int:
+    """
+    Parameters
+    ----------
+    bet: WeightedBet[A, S]
+        the bet to measure
+    seen: Optional[Set[int]]
+        ids of objects that have already been counted, updated in place
+
+    Returns
+    -------
+    nbytes: int
+        estimated bytes owned by the bet, including its bets & predictions
+    """
+    seen = set() if seen is None else seen
+    return _object_nbytes_(bet, seen) + \
+        _sequence_nbytes_(bet.bet, seen) + \
+        _sequence_nbytes_(bet.prediction, seen)
+
+
+def _history_item_nbytes_(item: HistoryItem[A, S]) -> Tuple[int, int]:
+    """
+    Returns
+    -------
+    nbytes: int
+        estimated bytes owned by the history item, including all of its bets
+    bet_bytes: int
+        the part of nbytes owned by the bets
+    """
+    seen: Set[int] = set()
+    nbytes: int = _object_nbytes_(item, seen) + _object_nbytes_(item.predictions, seen)
+    bet_bytes: int = 0
+    bets: List[WeightedBet[A, S]]
+    for bets in item.predictions.values():
+        nbytes += _object_nbytes_(bets, seen)
+        for bet in bets:
+            bet_bytes += bet_nbytes(bet, seen)
+    return nbytes + bet_bytes, bet_bytes
+
+
+def history_item_nbytes(item: HistoryItem[A, S]) -> int:
+    """
+    Returns
+    -------
+    nbytes: int
+        estimated bytes owned by the history item, including all of its bets
+    """
+    return _history_item_nbytes_(item)[0]
+
+
+@dataclass(frozen=True)
+class MemoryReport:
+    """
+    episode_bytes: List[int]
+        estimated bytes for each episode of history (including the episode's list)
+    episode_items: List[int]
+        number of history items in each episode
+    episode_bets: List[int]
+        number of bets in each episode
+    bet_bytes: int
+        estimated bytes of all of the bets, which is part of episode_bytes
+    balances_bytes: int
+        estimated bytes of the balances
+    """
+    episode_bytes: List[int]
+    episode_items: List[int]
+    episode_bets: List[int]
+    bet_bytes: int
+    balances_bytes: int
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self.episode_bytes) + self.balances_bytes
+
+    @property
+    def bytes_per_item(self) -> float:
+        n_items: int = sum(self.episode_items)
+        return sum(self.episode_bytes) / n_items if n_items > 0 else 0.
+
+    @property
+    def bytes_per_bet(self) -> float:
+        n_bets: int = sum(self.episode_bets)
+        return self.bet_bytes / n_bets if n_bets > 0 else 0.
+
+    def summary(self) -> str:
+        return "\n".join([
+            f"episodes: {len(self.episode_bytes)}",
+            f"history items: {sum(self.episode_items)} ({self.bytes_per_item:.0f} bytes each)",
+            f"bets: {sum(self.episode_bets)} ({self.bytes_per_bet:.0f} bytes each)",
+            f"balances: {self.balances_bytes} bytes",
+            f"total: {self.total_bytes} bytes",
+        ])
+
+
+def memory_report(
+        histories: List[List[HistoryItem[A, S]]],
+        balances: Dict[Agent[A, S], float]) -> MemoryReport:
+    """
+    Estimates the memory used by a TrainResult, see TrainResult.memory_report
+    """
+    episode_bytes: List[int] = []
+    episode_items: List[int] = []
+    episode_bets: List[int] = []
+    bet_bytes: int = 0
+    episode: List[HistoryItem[A, S]]
+    for episode in histories:
+        nbytes: int = sys.getsizeof(episode)
+        n_bets: int = 0
+        for item in episode:
+            item_bytes, item_bet_bytes = _history_item_nbytes_(item)
+            nbytes += item_bytes
+            bet_bytes += item_bet_bytes
+            # shared objects are counted once per item, the same as in episode_bytes
+            n_bets += sum(len(bets) for bets in item.predictions.values())
+        episode_bytes.append(nbytes)
+        episode_items.append(len(episode))
+        episode_bets.append(n_bets)
+    balances_bytes: int = sys.getsizeof(balances) + \
+        sum(sys.getsizeof(balance) for balance in balances.values())
+    return MemoryReport(episode_bytes, episode_items, episode_bets, bet_bytes, balances_bytes)
+
+
+class MemoryTracker:
+    """
+    Follows the estimated size of the history kept by train() & optionally
+    enforces a memory budget on it.
+
+    Before the retained history grows past max_bytes, the oldest finished episodes
+    are dropped (or written to spill_dir & then dropped): after each timestep,
+    episodes are dropped until there is room for one more history item
+    (estimated as the size of the last one), so the budget isn't exceeded
+    as long as history items don't grow suddenly.
+    The episode in progress is never dropped, because payouts depend on it.
+    Dropped episodes are counted in TrainResult.pruned_episodes.
+    Spilled episodes are named with the index of their seed in episode_seeds.
+    A tracker may be reused, train() resets it at the start of every run
+    (a new run overwrites the spilled episodes of an old one in the same spill_dir)
+    """
+
+    def __init__(self,
+            max_bytes: Optional[int] = None,
+            spill_dir: Optional[str] = None):
+        """
+        Parameters
+        ----------
+        max_bytes: Optional[int]
+            the memory budget for the history, no budget if None
+        spill_dir: Optional[str]
+            if not None, dropped episodes are pickled to this directory
+            & can be loaded with load_spilled_episode
+        """
+        assert max_bytes is None or max_bytes > 0
+        self.max_bytes: Optional[int] = max_bytes
+        self.spill_dir: Optional[str] = spill_dir
+        self.reset()
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def reset(self) -> None:
+        """
+        Forgets everything tracked so far, called by train() before every run
+        """
+        self.episode_bytes: List[int] = []
+        # estimated bytes of each finished episode still retained
+        self.episode_nums: List[int] = []
+        # index of the seed of each finished episode still retained
+        self.current_episode_bytes: int = 0
+        self.current_episode_items: int = 0
+        self.last_item_bytes: int = 0
+        self.pruned_episodes: int = 0
+        self._warned_: bool = False
+
+    @property
+    def retained_bytes(self) -> int:
+        return sum(self.episode_bytes) + self.current_episode_bytes
+
+    @property
+    def projected_bytes(self) -> int:
+        """
+        estimated retained bytes after the next history item is recorded
+        """
+        return self.retained_bytes + self.last_item_bytes
+
+    def record_item(self, item: HistoryItem[A, S]) -> None:
+        self.last_item_bytes = history_item_nbytes(item)
+        self.current_episode_bytes += self.last_item_bytes
+        self.current_episode_items += 1
+
+    def end_episode(self, retained: bool, episode_num: int) -> None:
+        """
+        Parameters
+        ----------
+        retained: bool
+            whether the episode was kept in the history
+            (train() doesn't keep empty episodes)
+        episode_num: int
+            the index of the episode's seed in episode_seeds,
+            used to name the episode if it is spilled
+        """
+        if retained:
+            self.episode_bytes.append(self.current_episode_bytes)
+            self.episode_nums.append(episode_num)
+        self.current_episode_bytes = 0
+        self.current_episode_items = 0
+
+    def forget_oldest(self, n_episodes: int) -> None:
+        """
+        Stops tracking the oldest finished episodes, which were dropped
+        by something other than this tracker (e.g. a RetentionPolicy)
+        """
+        del self.episode_bytes[:n_episodes]
+        del self.episode_nums[:n_episodes]
+
+    def enforce(self, finished_episodes: List[List[HistoryItem[A, S]]]) -> None:
+        """
+        Drops the oldest finished episodes until the next history item
+        is projected to fit in the budget
+
+        Parameters
+        ----------
+        finished_episodes: List[List[HistoryItem[A, S]]]
+            the retained finished episodes, modified in place
+        """
+        if self.max_bytes is None:
+            return
+        while self.projected_bytes > self.max_bytes and len(finished_episodes) > 0:
+            episode: List[HistoryItem[A, S]] = finished_episodes.pop(0)
+            if self.spill_dir is not None:
+                with open(spilled_episode_path(self.spill_dir, self.episode_nums[0]), 'wb') as f:
+                    pickle.dump(episode, f)
+            self.episode_bytes.pop(0)
+            self.episode_nums.pop(0)
+            self.pruned_episodes += 1
+        if self.retained_bytes > self.max_bytes and not self._warned_:
+            warnings.warn(
+                f"the current episode alone is over the memory budget of {self.max_bytes} bytes")
+            self._warned_ = True
+
+
+def spilled_episode_path(spill_dir: str, episode_num: int) -> str:
+    return os.path.join(spill_dir, f"episode_{episode_num:06d}.pkl")
+
+
+def load_spilled_episode(spill_dir: str, episode_num: int) -> List[HistoryItem[A, S]]:
+    """
+    Loads an episode that was spilled to disk by a MemoryTracker.
+    Note that the agents in the loaded episode are copies of the agents used in training
+
+    Parameters
+    ----------
+    spill_dir: str
+        the MemoryTracker's spill_dir
+    episode_num: int
+        the index of the episode's seed in the episode_seeds passed to train()
+    """
+    with open(spilled_episode_path(spill_dir, episode_num), 'rb') as f:
+        return pickle.load(f)
@@ -5,8 +5,12 @@
 # @Last Modified time: 2020-12-11 19:03:36
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Optional, Generic, TypeVar, List, Iterable, Dict, Tuple, Callable
+from dataclasses import dataclass, fields
+from typing import Optional, Generic, TypeVar, List, Iterable, Dict, Tuple, Callable, Sequence, Any
+
+import numpy as np
+
+from VIAYN.validation import boundary_checks
 
 
 @dataclass
@@ -15,6 +19,7 @@ class Action:
     base class for all actions
     TODO: possibly useless if description is optional?
     """
+    __slots__ = ('description',)
     description: Optional[str]
 
 
@@ -92,22 +97,66 @@ S = TypeVar("S")  # StateType
 B = TypeVar("B")  # BetAggregationType
 
 
+def _frozen_getstate_(self) -> Tuple[Any, ...]:
+    return tuple(getattr(self, field.name) for field in fields(self))
+
+
+def _frozen_setstate_(self, state: Tuple[Any, ...]) -> None:
+    for field, value in zip(fields(self), state):
+        object.__setattr__(self, field.name, value)
+# frozen dataclasses with __slots__ can't be unpickled with the default setattr,
+# so these are used as __getstate__ & __setstate__ instead
+
+
 @dataclass(frozen=True)
 class ActionBet:
     """
     Minimal version of a bet containing only the parts that are
     directly under the control of the agent
+
+    Uses __slots__ because one is created for every agent & action at every timestep.
+    bet & prediction may be lists or tuples (tuples can be shared between bets)
     """
-    bet: List[float]  # percentage of money to be bet @ each timestep (bij)
-    prediction: List[float]  # the predictions about the welfare score @ each timestep (pij)
+    __slots__ = ('bet', 'prediction')
+    bet: Sequence[float]  # percentage of money to be bet @ each timestep (bij)
+    prediction: Sequence[float]  # the predictions about the welfare score @ each timestep (pij)
 
     def __post_init__(self):
+        if not boundary_checks():
+            return
         assert len(self.bet) == len(self.prediction)
         assert len(self.bet) != 0
         assert sum(self.bet) <= 1
         for b in self.bet:
             assert b >= 0
 
+    @classmethod
+    def trusted(cls,
+            bet: Sequence[float],
+            prediction: Sequence[float]) -> "ActionBet":
+        """
+        Creates an ActionBet without running the checks in __post_init__.
+        Only use this for inputs that have already been validated
+
+        Parameters
+        ----------
+        bet: Sequence[float]
+            percentage of money to be bet @ each timestep
+        prediction: Sequence[float]
+            the predictions about the welfare score @ each timestep
+
+        Returns
+        -------
+        action_bet: ActionBet
+        """
+        action_bet: ActionBet = object.__new__(cls)
+        object.__setattr__(action_bet, 'bet', bet)
+        object.__setattr__(action_bet, 'prediction', prediction)
+        return action_bet
+
+    __getstate__ = _frozen_getstate_
+    __setstate__ = _frozen_setstate_
+
             
 class AnonymizedHistoryItem:
      pass 
@@ -142,6 +191,38 @@ class Agent(Generic[A, S], ABC):
     def view(self, info: AnonymizedHistoryItem) -> None:
         pass
 
+    def executor_group(self) -> Any:
+        """
+        Agents that return the same object share mutable state (e.g. a random number
+        generator), so when train() is given an executor they are called one after
+        another, in the same order as without one. Defaults to the agent itself.
+        Agents that share state with several groups (e.g. a MorphicAgent's sub-agents)
+        return a frozenset of those groups, which are then merged in to one
+        """
+        return self
+
+
+class AsyncAgent(Generic[A, S], ABC):
+    """
+    Same interface as Agent, except that vote & bet are coroutines,
+    e.g. for agents that wait on a model server. Used with train_async,
+    which awaits all of the agents' votes & bets at once (see VIAYN/async_train.py)
+    """
+    @abstractmethod
+    async def vote(self,
+            state: S) -> float:
+        ...
+
+    @abstractmethod
+    async def bet(self,
+            state: S,
+            action: A,
+            money: float) -> ActionBet:
+        ...
+
+    def view(self, info: AnonymizedHistoryItem) -> None:
+        pass
+
 
 @dataclass(frozen=True)
 class WeightedBet(Generic[A, S],ActionBet):
@@ -149,6 +230,7 @@ class WeightedBet(Generic[A, S],ActionBet):
     Like ActionBet, but with additional metadata about the bet
     that the Agent should NOT be able to control
     """
+    __slots__ = ('action', 'money', 'cast_by')
     action: A  # j # the action that the bet was placed on
     money: float  # m_i^(t) # the amount of money the agent has at time of bet
     cast_by: Agent[A, S] # which agent it was cast by
@@ -157,9 +239,68 @@ class WeightedBet(Generic[A, S],ActionBet):
         ActionBet.__post_init__(self)
         # check for weighted bet requirements below
 
+    @classmethod
+    def trusted(cls,
+            bet: Sequence[float],
+            prediction: Sequence[float],
+            action: A = None,
+            money: float = 0.,
+            cast_by: Agent[A, S] = None) -> "WeightedBet[A, S]":
+        """
+        Creates a WeightedBet without running the checks in __post_init__.
+        Only use this for inputs that have already been validated,
+        e.g. the contents of an ActionBet (which checked itself when it was created)
+
+        Returns
+        -------
+        weighted_bet: WeightedBet[A, S]
+        """
+        weighted_bet: WeightedBet[A, S] = object.__new__(cls)
+        object.__setattr__(weighted_bet, 'bet', bet)
+        object.__setattr__(weighted_bet, 'prediction', prediction)
+        object.__setattr__(weighted_bet, 'action', action)
+        object.__setattr__(weighted_bet, 'money', money)
+        object.__setattr__(weighted_bet, 'cast_by', cast_by)
+        return weighted_bet
+
     def weight(self) -> List[float]:
         return [bet * self.money for bet in self.bet]
         
+class ActionSpace(Generic[A]):
+    """
+    Fixed, integer-indexed set of actions.
+    Lets the actions of an episode be used to index arrays directly,
+    rather than using the actions as dictionary keys
+
+    train() only uses it for the (uncopied) actions of each episode, bets,
+    policies & payout configurations are still keyed by action, because
+    Dict[A, ...] is their public interface. train_vectorized indexes arrays with it
+
+    Parameters
+    ----------
+    actions: Iterable[A]
+        the actions, in order of their index
+    """
+    __slots__ = ('actions', '_indices_')
+
+    def __init__(self, actions: Iterable[A]):
+        self.actions: Tuple[A, ...] = tuple(actions)
+        self._indices_: Dict[A, int] = {action: idx for idx, action in enumerate(self.actions)}
+        assert len(self._indices_) == len(self.actions), "actions should be unique"
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def __iter__(self):
+        return iter(self.actions)
+
+    def action_at(self, idx: int) -> A:
+        return self.actions[idx]
+
+    def index_of(self, action: A) -> int:
+        return self._indices_[action]
+
+
 class Environment(Generic[A, S]):
     """
     Generic interface that aligns with OpenAI's Gym
@@ -188,9 +329,83 @@ class Environment(Generic[A, S]):
     def reset(self) -> S:
         ...
 
+    def action_space(self) -> ActionSpace[A]:
+        """
+        Integer-indexed version of actions(). The actions (and their indices)
+        must not change during an episode, so train() only calls this once
+        per episode. Environments with a constant set of actions should
+        override this to avoid rebuilding the space
+
+        Returns
+        -------
+        space: ActionSpace[A]
+            the actions available for the current episode
+        """
+        return ActionSpace(self.actions())
+
+
+class VectorEnvironment(Generic[A, S]):
+    """
+    Batched version of Environment, containing n_envs independent
+    environments that are reset, seeded & stepped together.
+    All of the environments share the same actions.
+    """
+    n_envs: int
+
+    @abstractmethod
+    def step(self, actions: np.ndarray) -> None:
+        """
+        Parameters
+        ----------
+        actions: np.ndarray
+            (n_envs,) integer array, the index in actions() of the action
+            to take in each environment. Ignored for environments that are done
+        """
+        ...
+
+    @abstractmethod
+    def actions(self) -> List[A]:
+        ...
+
+    @abstractmethod
+    def state(self) -> np.ndarray:
+        """
+        Returns
+        -------
+        states: np.ndarray
+            (n_envs,) the current state of each environment
+        """
+        ...
+
+    @abstractmethod
+    def done(self) -> np.ndarray:
+        """
+        Returns
+        -------
+        done: np.ndarray
+            (n_envs,) boolean mask, True for environments whose episode is over
+        """
+        ...
+
+    @abstractmethod
+    def seed(self, random_seeds: Optional[Iterable[int]] = None):
+        ...
+
+    @abstractmethod
+    def reset(self) -> np.ndarray:
+        ...
+
+    def action_space(self) -> ActionSpace[A]:
+        """
+        Integer-indexed version of actions(), see Environment.action_space.
+        The indices are the ones passed to step()
+        """
+        return ActionSpace(self.actions())
+
 
 @dataclass(frozen=True)
 class HistoryItem(Generic[A, S]):
+    __slots__ = ('selected_action', 'predictions', 't_enacted')
     selected_action: A  # jstar # the action that was selected @ this timestep
     predictions: Dict[A, List[WeightedBet[A, S]]]
      #all of the predictions made
@@ -200,6 +415,9 @@ class HistoryItem(Generic[A, S]):
     def available_actions(self) -> List[A]:
         return list(self.predictions.keys())
 
+    __getstate__ = _frozen_getstate_
+    __setstate__ = _frozen_setstate_
+
 
 class Configuration(Generic[A, S], ABC):
     """
@@ -211,6 +429,28 @@ class Configuration(Generic[A, S], ABC):
             bet: WeightedBet[A, S]) -> bool:
         return True
 
+    def validate_bets(self,
+            predictions: np.ndarray,
+            bets: np.ndarray) -> np.ndarray:
+        """
+        Batch version of validate_bet, used to check all of the bets cast on
+        an action in a single call. Configurations that do any actual
+        validation in validate_bet should override this as well.
+
+        Parameters
+        ----------
+        predictions: np.ndarray
+            (n_bets, prediction_len) array, each row is the prediction of one bet
+        bets: np.ndarray
+            (n_bets, prediction_len) array, each row is the bet of one bet
+
+        Returns
+        -------
+        valid: np.ndarray
+            (n_bets,) boolean mask, True where the corresponding bet is valid
+        """
+        return np.ones(len(predictions), dtype=bool)
+
 
 class VotingConfiguration(Generic[A, S], Configuration[A, S], ABC):
     """
@@ -241,6 +481,37 @@ class VotingConfiguration(Generic[A, S], Configuration[A, S], ABC):
             the number of agents in the system
         """
         self.n_agents = n_agents
+        self._vote_total_bounds_ = None
+        # bounds depend on the number of agents, so the cached table is stale
+
+    def vote_total_bounds(self, horizon: int) -> np.ndarray:
+        """
+        Table of min_possible_vote_total(dt) & max_possible_vote_total(dt)
+        for every dt in [0, horizon). The table is cached until the number of agents
+        changes, so it should be preferred over calling the bound methods in loops
+
+        Parameters
+        ----------
+        horizon: int >= 0
+            the number of timesteps to get bounds for
+
+        Returns
+        -------
+        bounds: np.ndarray
+            read-only (2, horizon) array. bounds[0] contains the minimums
+            and bounds[1] contains the maximums. May contain inf
+        """
+        cached: Optional[Tuple[int, np.ndarray]] = getattr(self, '_vote_total_bounds_', None)
+        if cached is None or cached[0] != self.n_agents or cached[1].shape[1] < horizon:
+            table: np.ndarray = np.array([
+                [self.min_possible_vote_total(dt) for dt in range(horizon)],
+                [self.max_possible_vote_total(dt) for dt in range(horizon)]],
+                dtype=float).reshape(2, horizon)
+            table.flags.writeable = False
+            cached = (self.n_agents, table)
+            self._vote_total_bounds_ = cached
+            # keyed by n_agents as well, in case n_agents is assigned directly
+        return cached[1][:, :horizon]
 
 
     @abstractmethod
@@ -431,3 +702,10 @@ class SystemConfiguration(Generic[A, B, S], Configuration[A, S]):
         return self.voting_manager.validate_bet(bet) and \
                 self.policy_manager.validate_bet(bet) and \
                 self.payout_manager.validate_bet(bet)
+
+    def validate_bets(self,
+            predictions: np.ndarray,
+            bets: np.ndarray) -> np.ndarray:
+        return self.voting_manager.validate_bets(predictions, bets) & \
+                self.policy_manager.validate_bets(predictions, bets) & \
+                self.payout_manager.validate_bets(predictions, bets)
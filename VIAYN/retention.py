@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+from dataclasses import dataclass
+from enum import Enum, unique, auto
+from typing import Generic, Optional
+
+import numpy as np
+
+from VIAYN.project_types import A, _frozen_getstate_, _frozen_setstate_
+
+
+"""
+Policies for how much of the history of finished episodes train() keeps.
+
+The episode in progress is always kept in full, because payouts depend on it.
+Once an episode is finished, it is kept according to the RetentionPolicy:
+    full: every HistoryItem is kept (default)
+    summary: only a StepSummary per timestep is kept in TrainResult.summaries,
+        which is enough for most analyses (selected actions, welfare & balances)
+        without keeping every WeightedBet alive
+    last_n: only the last n_episodes episodes are kept in full
+    none: nothing is kept, only the final balances are returned
+Episodes that aren't kept in full are counted in TrainResult.pruned_episodes.
+"""
+
+
+@unique
+class RetentionEnum(Enum):
+    full = auto()
+    summary = auto()
+    last_n = auto()
+    none = auto()
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    kind: RetentionEnum = RetentionEnum.full
+    n_episodes: Optional[int] = None  # only used for last_n
+
+    def __post_init__(self):
+        assert (self.kind == RetentionEnum.last_n) == (self.n_episodes is not None)
+        assert self.n_episodes is None or self.n_episodes >= 0
+
+    def n_to_drop(self, n_retained: int) -> int:
+        """
+        Parameters
+        ----------
+        n_retained: int >= 0
+            the number of finished episodes currently kept in full
+
+        Returns
+        -------
+        n_to_drop: int >= 0
+            the number of oldest finished episodes that should be dropped
+        """
+        if self.kind == RetentionEnum.full:
+            return 0
+        if self.kind == RetentionEnum.last_n:
+            return max(n_retained - self.n_episodes, 0)
+        return n_retained
+
+
+@dataclass(frozen=True)
+class StepSummary(Generic[A]):
+    """
+    The parts of a timestep that most analyses need, see RetentionEnum.summary
+
+    selected_action: A
+        the action taken at this timestep
+    welfare_score: float
+        the aggregated votes about the state at this timestep
+    balances: np.ndarray
+        the balance of each agent (in the order passed to train())
+        after payouts & withdrawals at this timestep
+    t_enacted: int
+        the timestep within the episode
+    """
+    __slots__ = ('selected_action', 'welfare_score', 'balances', 't_enacted')
+    selected_action: A
+    welfare_score: float
+    balances: np.ndarray
+    t_enacted: int
+
+    __getstate__ = _frozen_getstate_
+    __setstate__ = _frozen_setstate_
@@ -5,13 +5,13 @@
 # @Last Modified time: 2020-12-06 14:54:12
 from abc import ABC, abstractmethod
 from copy import copy
-from typing import List, Callable, Optional, Generic, Dict, Union, Tuple
+from typing import Any, List, Callable, Optional, Generic, Dict, Set, Union, Tuple
 
 import numpy as np
 from numpy.random import Generator, default_rng
 
 from VIAYN.project_types import Agent, A, S, ActionBet, AnonymizedHistoryItem
-from VIAYN.utils import behaviour_lookup_from_dict
+from VIAYN.utils import behaviour_lookup_from_dict, vote_bounds_table
 
 
 """
@@ -223,6 +223,10 @@ class RNGUniforPredSelectionMech(Generic[A, S], PredictionSelectionMechanism[A,
         called for each element of the prediction. OK to return inf & nan
     random_seed: int
         seed for random number generator
+
+    The whole prediction is drawn with a single call to the generator. This consumes
+    the stream exactly like drawing each timestep in order with a separate call,
+    so the same seed gives the same predictions as drawing one timestep at a time.
     """
 
     def __init__(self,
@@ -258,21 +262,16 @@ class RNGUniforPredSelectionMech(Generic[A, S], PredictionSelectionMechanism[A,
         """
 
         # TODO : bascially duplicate code with UniformBettingMechanism.bet
-        prediction: List[float] = [0. for _ in range(self.tsteps_per_prediction)]
         # TODO : I think dt should start at one, as we'll always predicting about the future
-        for dt in range(self.tsteps_per_prediction):
-            # note that dt is passed in for each timestep, as max & min may change by time
-            low: float = self.min_possible_prediction(dt)
-            if not np.isfinite(low):
-                # TODO: put these constants somewhere
-                low = -100.
-            # lowe bound for range is minimum possible : -100 if no minimum
-            high: float = self.max_possible_prediction(dt)
-            if not np.isfinite(high):
-                high = 100.
-            # upper bound is max possible: 100 otherwise
-            prediction[dt] = self.random.uniform(low=low, high=high)
-        return prediction
+        bounds: np.ndarray = vote_bounds_table(
+            self.min_possible_prediction, self.max_possible_prediction, self.tsteps_per_prediction)
+        # bounds are looked up for each timestep, as max & min may change by time
+        low: np.ndarray = np.where(np.isfinite(bounds[0]), bounds[0], -100.)
+        # lower bound for range is minimum possible : -100 if no minimum
+        high: np.ndarray = np.where(np.isfinite(bounds[1]), bounds[1], 100.)
+        # upper bound is max possible: 100 otherwise
+        # TODO: put these constants somewhere
+        return self.random.uniform(low=low, high=high).tolist()
 
 
 class StaticPredSelectionMech(Generic[A, S], PredictionSelectionMechanism[A, S]):
@@ -380,6 +379,10 @@ class CompositeBettingMechanism(Generic[A, S], BettingMechanism[A, S]):
 class UniformBettingMechanism(Generic[A, S], BettingMechanism[A, S]):
     """
     TODO: this should use RNGUniformPredSelectionMech
+
+    Like RNGUniforPredSelectionMech, the whole prediction is drawn with a single call
+    to the generator, giving the same stream as drawing one timestep at a time.
+    The constant bet is stored as a tuple & shared between all returned bets
     """
 
     def __init__(self,
@@ -389,7 +392,8 @@ class UniformBettingMechanism(Generic[A, S], BettingMechanism[A, S]):
             max_possible_prediction: Callable[[int], float],
             random_seed: int):
         self.tsteps_per_prediction: int = tsteps_per_prediction
-        self.constant_bet: List[float] = constant_bet
+        self.constant_bet: Tuple[float, ...] = tuple(constant_bet)
+        # immutable, so it is safe to hand out the same bet every time
         self.min_possible_prediction: Callable[[int], float] = min_possible_prediction
         self.max_possible_prediction: Callable[[int], float] = max_possible_prediction
         self.random = default_rng(random_seed)
@@ -413,17 +417,13 @@ class UniformBettingMechanism(Generic[A, S], BettingMechanism[A, S]):
             bet amount & prediction
         """
 
-        bet: List[float] = copy(self.constant_bet)
-        prediction: List[float] = [0. for _ in range(self.tsteps_per_prediction)]
-        for dt in range(self.tsteps_per_prediction):
-            low: float = self.min_possible_prediction(dt)
-            if not np.isfinite(low):
-                low = 0
-            high: float = self.max_possible_prediction(dt)
-            if not np.isfinite(high):
-                high = 10.
-            prediction[dt] = self.random.uniform(low=low, high=high)
-        return ActionBet(bet=bet, prediction=prediction)
+        bounds: np.ndarray = vote_bounds_table(
+            self.min_possible_prediction, self.max_possible_prediction, self.tsteps_per_prediction)
+        low: np.ndarray = np.where(np.isfinite(bounds[0]), bounds[0], 0.)
+        high: np.ndarray = np.where(np.isfinite(bounds[1]), bounds[1], 10.)
+        return ActionBet(
+            bet=self.constant_bet,
+            prediction=self.random.uniform(low=low, high=high).tolist())
 
 
 class CompositeAgent(Generic[A, S], Agent[A, S]):
@@ -450,6 +450,101 @@ class CompositeAgent(Generic[A, S], Agent[A, S]):
     def bet(self, state: S, action: A, money: float) -> ActionBet:
         return self.betting_mechanism.bet(state, action, money)
 
+class SwitchSchedule:
+    """
+    Compiled version of the switch_at list used by MorphicAgent.
+    Stores the cumulative number of timesteps at which each agent stops acting,
+    so that the active agent can be looked up for any timestep without replaying
+    every view() call. A single schedule can be shared by many MorphicAgents.
+
+    Parameters
+    ----------
+    switch_at: List[int]
+        list of time-steps that specify how long each agent can act for
+        an agent with 0 time-steps still acts until the next view() call,
+        so it is treated as lasting 1 time-step
+    """
+
+    def __init__(self,
+            switch_at: List[int]):
+        assert len(switch_at) > 0
+        assert min(switch_at) > -1
+        self.switch_at: List[int] = list(switch_at)
+        self.durations: np.ndarray = np.maximum(np.array(switch_at, dtype=np.int64), 1)
+        # how many timesteps each agent actually acts for per cycle
+        self.ends: np.ndarray = np.cumsum(self.durations)
+        # ends[i] is the timestep (within a cycle) where agent i stops acting
+        self.starts: np.ndarray = self.ends - self.durations
+        self.period: int = int(self.ends[-1])
+        # number of timesteps before the schedule circles back to the first agent
+
+    def __len__(self) -> int:
+        return len(self.switch_at)
+
+    def active_index(self, t: int) -> int:
+        """
+        Parameters
+        ----------
+        t: int >= 0
+            the global timestep (number of view() calls so far)
+
+        Returns
+        -------
+        idx: int
+            the index of the agent that acts at timestep t
+        """
+        return int(np.searchsorted(self.ends, t % self.period, side='right'))
+
+    def active_indices(self, ts: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of active_index, for looking up many timesteps at once
+        (e.g. for many MorphicAgents sharing this schedule at different timesteps)
+
+        Parameters
+        ----------
+        ts: np.ndarray
+            global timesteps, any shape
+
+        Returns
+        -------
+        idxs: np.ndarray
+            same shape as ts, the index of the agent that acts at each timestep
+        """
+        return np.searchsorted(self.ends, np.asarray(ts) % self.period, side='right')
+
+    def next_switch(self, t: int) -> int:
+        """
+        Returns
+        -------
+        t_switch: int
+            the first global timestep after t where a different
+            entry of the schedule becomes active
+        """
+        cycles: int = t // self.period
+        return cycles * self.period + int(self.ends[self.active_index(t)])
+
+    def views_received(self, idx: int, t: int) -> int:
+        """
+        Parameters
+        ----------
+        idx: int
+            index of an entry in the schedule
+        t: int >= 0
+            the global timestep
+
+        Returns
+        -------
+        n_views: int
+            the number of view() calls that the agent at entry idx has received
+            before global timestep t
+        """
+        cycles: int
+        remainder: int
+        cycles, remainder = divmod(t, self.period)
+        duration: int = int(self.durations[idx])
+        return cycles * duration + int(np.clip(remainder - self.starts[idx], 0, duration))
+
+
 class MorphicAgent(Generic[A, S], Agent[A, S]):
     """
     Agent that acts as a specific agent depending on
@@ -467,38 +562,222 @@ class MorphicAgent(Generic[A, S], Agent[A, S]):
         list of agents that act for [switch_at] timesteps
     switch_at: List[int]
         list of time-steps that specify how long each agent can act for
+    schedule: Optional[SwitchSchedule]
+        compiled version of switch_at, may be shared between MorphicAgents
+        compiled from switch_at if not provided
     """
 
     def __init__(self,
             agents: List[Agent[A,S]],
-            switch_at: List[int]):
+            switch_at: List[int],
+            schedule: Optional[SwitchSchedule] = None):
         # assert len(np.unique(switch_at)) == len(switch_at)
         assert min(switch_at) >-1
         assert len(agents) > 0
         assert len(agents) == len(switch_at)
-        self.t: int = 0
+        if schedule is None:
+            schedule = SwitchSchedule(switch_at)
+        assert schedule.switch_at == list(switch_at)
         self.agents: List[Agent[A,S]] = agents
         self.switch_at: List[int] = switch_at
-        self._tSnapshot: int = 0
-        self._currentAgentIdx: int = 0
+        self.schedule: SwitchSchedule = schedule
+        self.seek(0)
 
     def vote(self, state: S) -> float:
-        assert 0 <= self._currentAgentIdx < len(self.agents)
-        return self.agents[self._currentAgentIdx].vote(state)
+        return self._current_agent_.vote(state)
 
     def bet(self, state: S, action: A, money: float) -> ActionBet:
-        assert 0 <= self._currentAgentIdx < len(self.agents)
-        return self.agents[self._currentAgentIdx].bet(state, action, money)
+        return self._current_agent_.bet(state, action, money)
 
     def view(self, info: AnonymizedHistoryItem) -> None:
-        assert 0 <= self._currentAgentIdx < len(self.switch_at)
         self.t += 1
-        self.agents[self._currentAgentIdx].view(info)
-        if abs(self.t - self._tSnapshot) >= self.switch_at[self._currentAgentIdx]:
+        self._current_agent_.view(info)
+        if self.t >= self._t_next_switch_:
             self._nextAgent()
 
+    def executor_group(self) -> Any:
+        groups: Set[Any] = set()
+        agent: Agent[A, S]
+        for agent in self.agents:
+            group: Any = agent.executor_group()
+            groups.update(group if isinstance(group, frozenset) else (group,))
+        return next(iter(groups)) if len(groups) == 1 else frozenset(groups)
+        # sub-agents may be shared with other agents, so they're called from the same task
+
     def _nextAgent(self) -> None:
-        self._tSnapshot = self.t
-        self._currentAgentIdx += 1
-        self._currentAgentIdx = self._currentAgentIdx % len(self.agents)
-                
\ No newline at end of file
+        self._currentAgentIdx = (self._currentAgentIdx + 1) % len(self.agents)
+        self._current_agent_ = self.agents[self._currentAgentIdx]
+        self._t_next_switch_ = self.t + int(self.schedule.durations[self._currentAgentIdx])
+
+    def seek(self, t: int) -> None:
+        """
+        Jumps directly to global timestep t, as if view() had been called t times
+        since construction. Useful for resuming or replaying runs.
+        Sub-agents that are MorphicAgents themselves are moved to the timestep
+        matching the number of views they would have received.
+        Other sub-agents are not modified.
+
+        Parameters
+        ----------
+        t: int >= 0
+            the number of view() calls to act as if have happened
+        """
+        assert t >= 0
+        self.t: int = t
+        self._currentAgentIdx: int = self.schedule.active_index(t)
+        self._current_agent_: Agent[A, S] = self.agents[self._currentAgentIdx]
+        self._t_next_switch_: int = self.schedule.next_switch(t)
+
+        views: Dict[int, int] = {}
+        idx: int
+        agent: Agent[A, S]
+        for idx, agent in enumerate(self.agents):
+            if isinstance(agent, MorphicAgent):
+                views[id(agent)] = views.get(id(agent), 0) + self.schedule.views_received(idx, t)
+        # the same agent may show up multiple times in the schedule
+        for agent in self.agents:
+            if id(agent) in views:
+                agent.seek(views.pop(id(agent)))
+
+
+class AgentPopulation(Generic[A, S]):
+    """
+    Represents many homogeneous random agents as a single object.
+    Votes, bets & prediction bounds are stored as arrays, and the predictions
+    of all agents on an action are drawn with a single call to the random number generator.
+
+    The population is not an Agent itself. Instead, members contains one light-weight
+    Agent per member of the population, which can be passed to train() alongside any
+    other agents so that each member is still accounted for individually.
+
+    Parameters
+    ----------
+    votes: np.ndarray
+        (n_agents,) the constant vote of each member of the population
+    bets: np.ndarray
+        (n_agents, tsteps_per_prediction) the constant bet of each member
+        each row should sum up to at most 1
+    min_possible_prediction: Callable[[int], float]
+        gets the minimum possible prediction for dt: int steps in the future.
+        Shared by all members. OK to return inf & nan
+    max_possible_prediction: Callable[[int], float]
+        gets the maximum possible prediction for dt: int steps in the future.
+        Shared by all members. OK to return inf & nan
+    random_seed: int
+        seed for the random number generator shared by all members
+    """
+
+    def __init__(self,
+            votes: np.ndarray,
+            bets: np.ndarray,
+            min_possible_prediction: Callable[[int], float],
+            max_possible_prediction: Callable[[int], float],
+            random_seed: int):
+        votes = np.array(votes, dtype=float)
+        bets = np.array(bets, dtype=float)
+        assert votes.ndim == 1
+        assert bets.shape[0] == votes.shape[0]
+        assert bets.shape[1] > 0
+        assert np.all(bets >= 0)
+        assert np.all(bets.sum(axis=1) <= 1)
+        # checked once here, so members can skip the checks in ActionBet
+        self.votes: np.ndarray = votes
+        self.bets: np.ndarray = bets
+        self.votes.flags.writeable = False
+        self.bets.flags.writeable = False
+        self.tsteps_per_prediction: int = bets.shape[1]
+        self.min_possible_prediction: Callable[[int], float] = min_possible_prediction
+        self.max_possible_prediction: Callable[[int], float] = max_possible_prediction
+        self.random: Generator = default_rng(random_seed)
+        self._vote_list_: List[float] = [float(vote) for vote in votes]
+        self._bet_rows_: List[Tuple[float, ...]] = [tuple(float(b) for b in row) for row in bets]
+        # python copies of the arrays so that members don't convert on every call
+        # bets are tuples so that they can be shared between calls without copying
+        self._draws_: Dict[A, Tuple[List[List[float]], np.ndarray]] = {}
+        # action => (predictions of every member, which members have already used them)
+        self.members: List[PopulationMember[A, S]] = \
+            [PopulationMember(self, idx) for idx in range(len(votes))]
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __iter__(self):
+        return iter(self.members)
+
+    def __getitem__(self, idx: int) -> "PopulationMember[A, S]":
+        return self.members[idx]
+
+    def prediction_bounds(self) -> np.ndarray:
+        """
+        Returns
+        -------
+        bounds: np.ndarray
+            (2, tsteps_per_prediction) the range that predictions are drawn from
+            bounds[0] are the minimums & bounds[1] the maximums.
+            Non-finite bounds are replaced with -100 & 100, as in RNGUniforPredSelectionMech
+        """
+        bounds: np.ndarray = vote_bounds_table(
+            self.min_possible_prediction, self.max_possible_prediction, self.tsteps_per_prediction)
+        return np.stack([
+            np.where(np.isfinite(bounds[0]), bounds[0], -100.),
+            np.where(np.isfinite(bounds[1]), bounds[1], 100.)])
+
+    def select_prediction(self, idx: int, action: A) -> List[float]:
+        """
+        Gets the prediction of a single member on action.
+        Predictions for all members are drawn together the first time any member
+        predicts on action, then handed out to each member.
+        Once a member asks again, a new set of predictions is drawn for everyone.
+
+        Parameters
+        ----------
+        idx: int
+            the index of the member making the prediction
+        action: A
+            the action the member is predicting about
+
+        Returns
+        -------
+        prediction: List[float]
+            the predictions for each timestep, selected uniformly from the valid range
+        """
+        draw: Optional[Tuple[List[List[float]], np.ndarray]] = self._draws_.get(action)
+        if draw is None or draw[1][idx]:
+            bounds: np.ndarray = self.prediction_bounds()
+            predictions: np.ndarray = self.random.uniform(
+                low=bounds[0], high=bounds[1], size=self.bets.shape)
+            draw = (predictions.tolist(), np.zeros(len(self.members), dtype=bool))
+            self._draws_[action] = draw
+        draw[1][idx] = True
+        return draw[0][idx]
+
+
+class PopulationMember(Generic[A, S], Agent[A, S]):
+    """
+    Single member of an AgentPopulation. Delegates everything to the population
+
+    Parameters
+    ----------
+    population: AgentPopulation[A, S]
+        the population this agent belongs to
+    idx: int
+        the index of this agent in the population's arrays
+    """
+    def __init__(self,
+            population: AgentPopulation[A, S],
+            idx: int):
+        self.population: AgentPopulation[A, S] = population
+        self.idx: int = idx
+
+    def vote(self, state: S) -> float:
+        return self.population._vote_list_[self.idx]
+
+    def bet(self, state: S, action: A, money: float) -> ActionBet:
+        return ActionBet.trusted(
+            bet=self.population._bet_rows_[self.idx],
+            prediction=self.population.select_prediction(self.idx, action))
+
+    def executor_group(self) -> "AgentPopulation[A, S]":
+        return self.population
+        # members share the population's random number generator
+
@@ -1,10 +1,18 @@
 from copy import copy
-from typing import List, Union, Optional
+from typing import List, Union, Optional, Iterable
 
-from VIAYN.project_types import Environment, Action
+import numpy as np
+
+from VIAYN.project_types import Environment, Action, VectorEnvironment, ActionSpace
 
 
 class IntAction(Action):
+    """
+    Action that is just an index. Immutable value type,
+    two IntActions with the same idx are equal
+    """
+    __slots__ = ('idx',)
+
     def __init__(self, idx: int):
         self.idx: int = idx
         self.description = str(idx)
@@ -15,6 +23,9 @@ class IntAction(Action):
     def __eq__(self, other: object) -> bool:
         return type(self) == type(other) and self.idx == other.idx
 
+    def __repr__(self) -> str:
+        return f"IntAction({self.idx})"
+
 
 class StaticEnvironment(Environment[IntAction, IntAction]):
     """
@@ -27,6 +38,8 @@ class StaticEnvironment(Environment[IntAction, IntAction]):
         assert n_actions > 0
         self.action_list: List[IntAction] = [IntAction(i) for i in range(n_actions)]
         self.last_action: IntAction = self.action_list[0]
+        self._action_space_: ActionSpace[IntAction] = ActionSpace(self.action_list)
+        # actions never change, so the space is only built once
 
     def step(self, action: Union[int, IntAction]) -> None:
         pass
@@ -34,6 +47,9 @@ class StaticEnvironment(Environment[IntAction, IntAction]):
     def actions(self) -> List[IntAction]:
         return copy(self.action_list)
 
+    def action_space(self) -> ActionSpace[IntAction]:
+        return self._action_space_
+
     def state(self) -> IntAction:
         if self.last_action is not None:
             return self.last_action
@@ -48,3 +64,52 @@ class StaticEnvironment(Environment[IntAction, IntAction]):
 
     def seed(self, random_seed: int = None) -> None:
         pass
+
+
+class StaticVectorEnvironment(VectorEnvironment[IntAction, IntAction]):
+    """
+    n_envs copies of StaticEnvironment, stepped together.
+    Behaves exactly like each copy would on its own
+
+    Parameters
+    ----------
+    n_envs: int > 0
+        the number of environments
+    n_actions: int > 0
+        the number of actions available in every environment
+    """
+
+    def __init__(self,
+            n_envs: int,
+            n_actions: int):
+        assert n_envs > 0
+        assert n_actions > 0
+        self.n_envs: int = n_envs
+        self.action_list: List[IntAction] = [IntAction(i) for i in range(n_actions)]
+        self._action_array_: np.ndarray = np.empty(n_actions, dtype=object)
+        self._action_array_[:] = self.action_list
+        # object array so that states can be looked up for all environments at once
+        self.last_actions: np.ndarray = np.zeros(n_envs, dtype=np.int64)
+        self._action_space_: ActionSpace[IntAction] = ActionSpace(self.action_list)
+
+    def step(self, actions: np.ndarray) -> None:
+        assert len(actions) == self.n_envs
+
+    def actions(self) -> List[IntAction]:
+        return copy(self.action_list)
+
+    def action_space(self) -> ActionSpace[IntAction]:
+        return self._action_space_
+
+    def state(self) -> np.ndarray:
+        return self._action_array_[self.last_actions]
+
+    def done(self) -> np.ndarray:
+        return np.zeros(self.n_envs, dtype=bool)
+
+    def reset(self) -> np.ndarray:
+        return self.state()
+
+    def seed(self, random_seeds: Optional[Iterable[int]] = None) -> None:
+        pass
+
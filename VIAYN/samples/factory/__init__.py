@@ -1,19 +1,79 @@
-from VIAYN.samples.factory.agent_factory import (
-    AgentsEnum, AgentFactorySpec, AgentFactory
-)
+from importlib import import_module
+from typing import Any, Dict, List, TYPE_CHECKING
 
-from VIAYN.samples.factory.env_factory import (
-    EnvsEnum, EnvsFactorySpec, EnvFactory
-)
+"""
+The factories are imported lazily: `import VIAYN.samples.factory` is cheap, and each
+factory module (and the mechanisms it depends on) is only imported the first time
+one of its names is used, e.g. `factory.AgentFactory` or
+`from VIAYN.samples.factory import AgentFactory`.
+"""
 
-from VIAYN.samples.factory.payout_config_factory import (
-    PayoutConfigEnum, PayoutConfigFactorySpec, PayoutConfigFactory, UpperBoundConfigEnum
-)
+_exports_: Dict[str, str] = {
+    'AgentsEnum': 'agent_factory',
+    'AgentFactorySpec': 'agent_factory',
+    'AgentFactory': 'agent_factory',
+    'EnvsEnum': 'env_factory',
+    'EnvsFactorySpec': 'env_factory',
+    'EnvFactory': 'env_factory',
+    'PayoutConfigEnum': 'payout_config_factory',
+    'PayoutConfigFactorySpec': 'payout_config_factory',
+    'PayoutConfigFactory': 'payout_config_factory',
+    'UpperBoundConfigEnum': 'payout_config_factory',
+    'PolicyConfigEnum': 'policy_config_factory',
+    'PolicyConfigFactorySpec': 'policy_config_factory',
+    'PolicyConfigFactory': 'policy_config_factory',
+    'VotingConfigEnum': 'voting_config_factory',
+    'VotingConfigFactorySpec': 'voting_config_factory',
+    'VotingConfigFactory': 'voting_config_factory',
+    'spec_to_dict': 'serialization',
+    'spec_from_dict': 'serialization',
+    'spec_hash': 'serialization',
+    'VoteBound': 'vote_bounds',
+    'VoteBoundEnum': 'vote_bounds',
+}
+# name -> module in this package that defines it
 
-from VIAYN.samples.factory.policy_config_factory import (
-    PolicyConfigEnum, PolicyConfigFactorySpec, PolicyConfigFactory
-)
+__all__: List[str] = list(_exports_)
 
-from VIAYN.samples.factory.voting_config_factory import (
-    VotingConfigEnum, VotingConfigFactorySpec, VotingConfigFactory
-)
\ No newline at end of file
+
+def __getattr__(name: str) -> Any:
+    if name not in _exports_:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value: Any = getattr(import_module(f"{__name__}.{_exports_[name]}"), name)
+    globals()[name] = value
+    # cached, so __getattr__ is only called once per name
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from VIAYN.samples.factory.agent_factory import (
+        AgentsEnum, AgentFactorySpec, AgentFactory
+    )
+
+    from VIAYN.samples.factory.env_factory import (
+        EnvsEnum, EnvsFactorySpec, EnvFactory
+    )
+
+    from VIAYN.samples.factory.payout_config_factory import (
+        PayoutConfigEnum, PayoutConfigFactorySpec, PayoutConfigFactory, UpperBoundConfigEnum
+    )
+
+    from VIAYN.samples.factory.policy_config_factory import (
+        PolicyConfigEnum, PolicyConfigFactorySpec, PolicyConfigFactory
+    )
+
+    from VIAYN.samples.factory.voting_config_factory import (
+        VotingConfigEnum, VotingConfigFactorySpec, VotingConfigFactory
+    )
+
+    from VIAYN.samples.factory.serialization import (
+        spec_to_dict, spec_from_dict, spec_hash
+    )
+
+    from VIAYN.samples.factory.vote_bounds import (
+        VoteBound, VoteBoundEnum
+    )
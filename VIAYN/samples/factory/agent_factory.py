@@ -9,7 +9,7 @@ from dataclasses import dataclass
 from typing import Optional, Union, Tuple, List, Callable, Dict, Iterable, Generic
 import numpy as np
 
-from VIAYN.project_types import Agent, VoteBoundGetter, A, S
+from VIAYN.project_types import Agent, VoteBoundGetter, VotingConfiguration, A, S
 from VIAYN.samples.agents import (
     VotingMechanism,
     LookupBasedVotingMechanism,
@@ -24,8 +24,11 @@ from VIAYN.samples.agents import (
     StaticBetSelectionMech,
     StaticPredSelectionMech,
     RNGUniforPredSelectionMech,
-    MorphicAgent
+    MorphicAgent,
+    SwitchSchedule,
+    AgentPopulation
 )
+from VIAYN.samples.factory.vote_bounds import resolve_vote_bound
 from VIAYN.utils import is_numeric, repeat_if_float
 
 @unique
@@ -36,6 +39,8 @@ class AgentsEnum(Enum):
     random = auto()
     composite = auto()
     # agent with voting, bet selection and prediction selection specified separately
+    population = auto()
+    # many random agents with identical settings, see AgentFactory.create_population
 
 
 @dataclass(frozen=True)
@@ -55,6 +60,8 @@ class AgentFactorySpec(Generic[A, S]):
         for now
     totalVotesBound: Optional[Tuple[VoteBoundGetter, VoteBoundGetter]] = None
         What predictions values can be predicted by the agent (min, max)
+        Use VoteBounds (e.g. VoteBound.constant(0.99)) rather than lambdas
+        for specs that need to be pickled or serialized
     seed: Optional[int]
         Random seed used by random processes of agents
     prediction: Optional[Union[float, List[float]]] = None
@@ -71,6 +78,11 @@ class AgentFactorySpec(Generic[A, S]):
         money wil be bet at time-step 5.  
     N: Optional[int] = None
         length of bets as specified by requirements
+    population_size: Optional[int] = None
+        number of agents in the population, only used by population agents
+    vote_lookup, bet_lookup, prediction_lookup
+        lookup tables of composite agents. Specs whose tables only contain
+        numbers (not mechanisms) can be serialized
     """
     agentType: AgentsEnum
     vote: float
@@ -86,6 +98,7 @@ class AgentFactorySpec(Generic[A, S]):
     prediction_lookup: Optional[Dict[
         Tuple[Optional[S], Optional[A], Optional[float]],
         Union[PredictionSelectionMechanism[A, S], List[float], float]]] = None
+    population_size: Optional[int] = None
     
     def __post_init__(self):
         # constant agent uses these params in addition to vote at least
@@ -103,6 +116,11 @@ class AgentFactorySpec(Generic[A, S]):
             assert self.prediction_lookup is not None
             # there should probably be some more checks that we do here
             assert self.N > 0
+        elif self.agentType == AgentsEnum.population:
+            assert(self.N > 0)
+            assert(self.totalVotesBound is not None)
+            assert(self.bet is not None)
+            assert(self.population_size > 0)
         else:
             raise TypeError(self.agentType)
 
@@ -115,6 +133,9 @@ class AgentFactory:
     ----------
     spec: AgentFactorySpec
         Specifications to create agent with, see above
+    voting_config: Optional[VotingConfiguration]
+        the voting configuration the agent will be trained with, used to
+        resolve VoteBounds of the voting configuration in spec.totalVotesBound
 
     Returns
     -------
@@ -122,9 +143,55 @@ class AgentFactory:
         created agent based on spec
     """
     @staticmethod
-    def create(spec: AgentFactorySpec) -> Agent:
-        assert spec.agentType in AgentFactory._creators_
-        return AgentFactory._creators_[spec.agentType](spec)
+    def create(spec: AgentFactorySpec, voting_config: Optional[VotingConfiguration] = None) -> Agent:
+        assert spec.agentType in AgentFactory._creators_, \
+            "population agents are created with AgentFactory.create_population"
+        return AgentFactory._creators_[spec.agentType](spec, voting_config)
+
+    @staticmethod
+    def _vote_bounds_(
+            spec: AgentFactorySpec,
+            voting_config: Optional[VotingConfiguration]) -> Tuple[VoteBoundGetter, VoteBoundGetter]:
+        assert spec.totalVotesBound is not None
+        return (
+            resolve_vote_bound(spec.totalVotesBound[0], voting_config),
+            resolve_vote_bound(spec.totalVotesBound[1], voting_config))
+
+    @staticmethod
+    def create_population(
+            spec: AgentFactorySpec,
+            voting_config: Optional[VotingConfiguration] = None) -> AgentPopulation:
+        """
+        Creates spec.population_size random agents with identical settings,
+        represented as a single AgentPopulation.
+        Pass population.members to train() to use them as individual agents.
+
+        Parameters
+        ----------
+        spec: AgentFactorySpec
+            spec with agentType AgentsEnum.population
+        voting_config: Optional[VotingConfiguration]
+            used to resolve VoteBounds in spec.totalVotesBound, see create
+
+        Returns
+        -------
+        AgentPopulation
+            population whose members vote spec.vote, bet spec.bet and predict
+            uniformly at random within spec.totalVotesBound
+        """
+        assert spec.agentType == AgentsEnum.population
+        assert spec.totalVotesBound is not None
+        assert spec.seed is not None
+        assert spec.N is not None
+        assert spec.population_size is not None
+        bet: List[float] = repeat_if_float(spec.bet, spec.N)
+        bounds: Tuple[VoteBoundGetter, VoteBoundGetter] = AgentFactory._vote_bounds_(spec, voting_config)
+        return AgentPopulation(
+            votes=np.full(spec.population_size, spec.vote, dtype=float),
+            bets=np.tile(np.array(bet, dtype=float), (spec.population_size, 1)),
+            min_possible_prediction=bounds[0],
+            max_possible_prediction=bounds[1],
+            random_seed=spec.seed)
 
     @staticmethod
     def _create_static_agent_(
@@ -151,23 +218,26 @@ class AgentFactory:
         return StaticPredSelectionMech(repeat_if_float(spec.prediction, spec.N))
 
     @staticmethod
-    def _create_rng_uniform_prediction_selection_(spec: AgentFactorySpec) -> PredictionSelectionMechanism:
-        assert spec.totalVotesBound is not None
+    def _create_rng_uniform_prediction_selection_(
+            spec: AgentFactorySpec,
+            voting_config: Optional[VotingConfiguration]) -> PredictionSelectionMechanism:
         assert spec.seed is not None
         assert spec.N is not None
+        bounds: Tuple[VoteBoundGetter, VoteBoundGetter] = AgentFactory._vote_bounds_(spec, voting_config)
         return RNGUniforPredSelectionMech(
             tsteps_per_prediction=spec.N,
-            min_possible_prediction=spec.totalVotesBound[0],
-            max_possible_prediction=spec.totalVotesBound[1],
+            min_possible_prediction=bounds[0],
+            max_possible_prediction=bounds[1],
             random_seed=spec.seed)
 
     @staticmethod
     def _create_random_agent_(
-            spec: AgentFactorySpec) -> Agent:
+            spec: AgentFactorySpec,
+            voting_config: Optional[VotingConfiguration]) -> Agent:
         return CompositeAgent(
             voting_mechanism=AgentFactory._create_static_vote_selection_(spec),
             betting_mechanism=CompositeBettingMechanism(
-                prediction_selection=AgentFactory._create_rng_uniform_prediction_selection_(spec),
+                prediction_selection=AgentFactory._create_rng_uniform_prediction_selection_(spec, voting_config),
                 bet_selection=AgentFactory._create_static_bet_selection_(spec)))
 
     @staticmethod
@@ -229,9 +299,34 @@ class AgentFactory:
         # assert len(np.unique(switch_at)) == len(switch_at)
         return MorphicAgent(agents,switch_at)
 
+    @staticmethod
+    def sequentialize_many(
+            agent_lists: List[List[Agent[A,S]]],
+            switch_at: List[int]) -> List[Agent[A,S]]:
+        """
+        Same as calling [sequentialize] on each list in [agent_lists], except that
+        switch_at is only compiled once and the schedule is shared by all of the
+        returned agents. See SwitchSchedule.active_indices for looking up the active
+        agent of many of them at once
+
+        Parameters
+        ----------
+        agent_lists: List[List[Agent[A,S]]]
+            each list is sequentialized in to one agent
+        switch_at: List[int]
+            the time-steps each agent acts for, shared by all lists
+
+        Returns
+        -------
+        List[Agent]
+            one agent manager per list in agent_lists
+        """
+        schedule: SwitchSchedule = SwitchSchedule(switch_at)
+        return [MorphicAgent(agents, switch_at, schedule) for agents in agent_lists]
+
 
-    _creators_: Dict[AgentsEnum, Callable[[AgentFactorySpec], Agent]] = {
-        AgentsEnum.random: lambda x: AgentFactory._create_random_agent_(x),
-        AgentsEnum.constant: lambda x: AgentFactory._create_static_agent_(x),
-        AgentsEnum.composite: lambda x: AgentFactory._create_composite_agent_(x)
+    _creators_: Dict[AgentsEnum, Callable[[AgentFactorySpec, Optional[VotingConfiguration]], Agent]] = {
+        AgentsEnum.random: lambda x, vc: AgentFactory._create_random_agent_(x, vc),
+        AgentsEnum.constant: lambda x, vc: AgentFactory._create_static_agent_(x),
+        AgentsEnum.composite: lambda x, vc: AgentFactory._create_composite_agent_(x)
     }
@@ -8,8 +8,8 @@ from dataclasses import dataclass
 from enum import Enum, unique, auto
 from typing import Callable, Dict, Optional
 
-from VIAYN.project_types import Environment
-from VIAYN.samples.env import StaticEnvironment
+from VIAYN.project_types import Environment, VectorEnvironment
+from VIAYN.samples.env import StaticEnvironment, StaticVectorEnvironment
 
 
 @unique
@@ -50,3 +50,15 @@ class EnvFactory:
             assert spec.n_actions is not None
             return StaticEnvironment(spec.n_actions)
         assert False, "Can only create static environment right now"
+
+    @staticmethod
+    def create_vector(spec: EnvsFactorySpec, n_envs: int) -> VectorEnvironment:
+        """
+        Creates n_envs environments matching spec, batched together
+        in to a single VectorEnvironment (see train_vectorized)
+        """
+        if spec.envType == EnvsEnum.default:
+            assert spec.n_actions is not None
+            return StaticVectorEnvironment(n_envs, spec.n_actions)
+        assert False, "Can only create static environment right now"
+
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from typing import Any, Dict, List, Optional, Type, TypeVar, Union, get_args, get_origin
+
+import numpy as np
+
+import VIAYN.samples.vote_ranges as vote_ranges
+from VIAYN.project_types import VoteRange
+from VIAYN.samples.env import IntAction
+from VIAYN.samples.factory.vote_bounds import VoteBound
+
+
+"""
+Converts factory specs (e.g. AgentFactorySpec) to & from JSON-compatible dictionaries,
+so that they can be stored next to results.
+
+Enums are stored by name, VoteRanges from samples/vote_ranges.py by class name,
+VoteBounds as text (e.g. {"vote_bound": "constant(0.99)"}), IntActions by index
+& dicts (e.g. the lookup tables of composite agents) as lists of [key, value] pairs,
+with tuple keys stored as lists.
+Fields that can't be stored as JSON (e.g. lambdas or mechanisms in lookups)
+are stored as None & listed under "dropped_fields", in which case the spec
+can't be rebuilt with spec_from_dict or hashed with spec_hash.
+"""
+
+T = TypeVar("T")
+
+_dropped_key_: str = "dropped_fields"
+
+
+class _Unserializable_(Exception):
+    pass
+
+
+def _to_json_(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return value.item() if isinstance(value, np.generic) else value
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, VoteBound):
+        return {'vote_bound': str(value)}
+    if isinstance(value, IntAction):
+        return {'int_action': value.idx}
+    if isinstance(value, VoteRange) or (isinstance(value, type) and issubclass(value, VoteRange)):
+        cls: type = value if isinstance(value, type) else type(value)
+        if getattr(vote_ranges, cls.__name__, None) is not cls:
+            raise _Unserializable_()
+        return {'vote_range': cls.__name__}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_to_json_(val) for val in value]
+    if isinstance(value, dict):
+        return {'lookup': [[_to_json_(key), _to_json_(val)] for key, val in value.items()]}
+    raise _Unserializable_()
+
+
+def _key_from_json_(key: Any) -> Any:
+    # lists aren't hashable, so keys that were stored as lists were tuples
+    if isinstance(key, list):
+        return tuple(_key_from_json_(val) for val in key)
+    return _from_json_(key)
+
+
+def _from_json_(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_from_json_(val) for val in value]
+    if not isinstance(value, dict):
+        return value
+    if 'vote_range' in value:
+        return getattr(vote_ranges, value['vote_range'])()
+    if 'vote_bound' in value:
+        return VoteBound.parse(value['vote_bound'])
+    if 'int_action' in value:
+        return IntAction(value['int_action'])
+    assert 'lookup' in value, f"unknown value {value}"
+    return {_key_from_json_(key): _from_json_(val) for key, val in value['lookup']}
+
+
+def _is_tuple_type_(field_type: Any) -> bool:
+    if get_origin(field_type) is Union:
+        return any(_is_tuple_type_(arg) for arg in get_args(field_type))
+    return field_type is tuple or get_origin(field_type) is tuple
+
+
+def spec_to_dict(spec: Any) -> Dict[str, Any]:
+    """
+    Parameters
+    ----------
+    spec: Any
+        a factory spec, which should be a dataclass
+
+    Returns
+    -------
+    spec_dict: Dict[str, Any]
+        JSON-compatible dictionary of the spec's fields
+    """
+    assert is_dataclass(spec) and not isinstance(spec, type)
+    result: Dict[str, Any] = {}
+    dropped: List[str] = []
+    for field in fields(spec):
+        try:
+            result[field.name] = _to_json_(getattr(spec, field.name))
+        except _Unserializable_:
+            result[field.name] = None
+            dropped.append(field.name)
+    if len(dropped) > 0:
+        result[_dropped_key_] = dropped
+    return result
+
+
+def spec_from_dict(spec_dict: Dict[str, Any], spec_type: Type[T]) -> T:
+    """
+    Inverse of spec_to_dict
+
+    Parameters
+    ----------
+    spec_dict: Dict[str, Any]
+        result of spec_to_dict
+    spec_type: Type[T]
+        the type of spec that was stored, e.g. AgentFactorySpec
+
+    Returns
+    -------
+    spec: T
+        the rebuilt spec
+    """
+    assert _dropped_key_ not in spec_dict, \
+        f"can't rebuild spec, fields were not stored: {spec_dict[_dropped_key_]}"
+    kwargs: Dict[str, Any] = {}
+    for field in fields(spec_type):
+        if field.name not in spec_dict:
+            continue
+        value: Any = spec_dict[field.name]
+        if isinstance(field.type, type) and issubclass(field.type, Enum):
+            value = field.type[value]
+        else:
+            value = _from_json_(value)
+            if isinstance(value, list) and _is_tuple_type_(field.type):
+                value = tuple(value)
+        kwargs[field.name] = value
+    return spec_type(**kwargs)
+
+
+def is_complete(spec_dict: Any) -> bool:
+    """
+    Returns
+    -------
+    complete: bool
+        whether no fields were dropped anywhere in spec_dict
+        (which may contain nested spec dicts in dicts & lists)
+    """
+    if isinstance(spec_dict, dict):
+        return _dropped_key_ not in spec_dict and all(is_complete(val) for val in spec_dict.values())
+    if isinstance(spec_dict, list):
+        return all(is_complete(val) for val in spec_dict)
+    return True
+
+
+def spec_hash(spec_dict: Any) -> Optional[str]:
+    """
+    Parameters
+    ----------
+    spec_dict: Any
+        JSON-compatible result of spec_to_dict, or a dict/list of them
+
+    Returns
+    -------
+    digest: Optional[str]
+        stable hex digest of spec_dict, the same across processes & machines.
+        None if any fields were dropped, because then specs that differ in
+        those fields would have the same hash
+    """
+    if not is_complete(spec_dict):
+        return None
+    encoded: bytes = json.dumps(spec_dict, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(encoded).hexdigest()
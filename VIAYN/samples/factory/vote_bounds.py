@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import re
+from dataclasses import dataclass
+from enum import Enum, unique, auto
+from typing import Optional
+
+from VIAYN.project_types import VoteBoundGetter, VotingConfiguration
+
+
+"""
+Declarative vote bounds for AgentFactorySpec.totalVotesBound.
+
+Unlike lambdas, VoteBounds can be pickled, compared & stored as text, so specs that use
+them can be sent to worker processes & hashed for caching:
+    VoteBound.constant(0.99)      <-> "constant(0.99)"
+    VoteBound.voting_config_max() <-> "voting_config.max"
+    VoteBound.voting_config_min() <-> "voting_config.min"
+Bounds of the voting configuration are resolved when the agent is created,
+by passing the VotingConfiguration to AgentFactory.create.
+"""
+
+
+@unique
+class VoteBoundEnum(Enum):
+    constant = auto()
+    voting_config_min = auto()
+    voting_config_max = auto()
+
+
+_constant_pattern_ = re.compile(r"constant\((.+)\)")
+
+
+@dataclass(frozen=True)
+class VoteBound:
+    """
+    Serializable VoteBoundGetter
+
+    Parameters
+    ----------
+    kind: VoteBoundEnum
+        a constant, or the min/max possible vote total of the voting configuration
+    value: Optional[float]
+        the bound if kind is constant, otherwise None
+    """
+    kind: VoteBoundEnum
+    value: Optional[float] = None
+
+    def __post_init__(self):
+        assert (self.kind == VoteBoundEnum.constant) == (self.value is not None)
+
+    @staticmethod
+    def constant(value: float) -> "VoteBound":
+        return VoteBound(VoteBoundEnum.constant, float(value))
+
+    @staticmethod
+    def voting_config_min() -> "VoteBound":
+        return VoteBound(VoteBoundEnum.voting_config_min)
+
+    @staticmethod
+    def voting_config_max() -> "VoteBound":
+        return VoteBound(VoteBoundEnum.voting_config_max)
+
+    @staticmethod
+    def parse(text: str) -> "VoteBound":
+        """
+        Inverse of str(VoteBound)
+        """
+        if text == "voting_config.min":
+            return VoteBound.voting_config_min()
+        if text == "voting_config.max":
+            return VoteBound.voting_config_max()
+        match: Optional[re.Match] = _constant_pattern_.fullmatch(text)
+        if match is None:
+            raise ValueError(f"unknown vote bound {text!r}")
+        return VoteBound.constant(float(match.group(1)))
+
+    def __str__(self) -> str:
+        if self.kind == VoteBoundEnum.constant:
+            return f"constant({self.value!r})"
+        return f"voting_config.{'min' if self.kind == VoteBoundEnum.voting_config_min else 'max'}"
+
+    def resolve(self, voting_config: Optional[VotingConfiguration]) -> VoteBoundGetter:
+        """
+        Parameters
+        ----------
+        voting_config: Optional[VotingConfiguration]
+            the voting configuration the agent will be trained with,
+            only needed by bounds of the voting configuration
+
+        Returns
+        -------
+        getter: VoteBoundGetter
+            self if constant, otherwise the bound method of voting_config,
+            so tables of its bounds are cached (see vote_bounds_table)
+        """
+        if self.kind == VoteBoundEnum.constant:
+            return self
+        assert voting_config is not None, f"{self} needs a VotingConfiguration to be resolved"
+        if self.kind == VoteBoundEnum.voting_config_min:
+            return voting_config.min_possible_vote_total
+        return voting_config.max_possible_vote_total
+
+    def __call__(self, dt: int = 0) -> float:
+        assert self.kind == VoteBoundEnum.constant, f"{self} has to be resolved before it is called"
+        return self.value
+
+
+def resolve_vote_bound(
+        bound: VoteBoundGetter,
+        voting_config: Optional[VotingConfiguration]) -> VoteBoundGetter:
+    """
+    Resolves VoteBounds, any other getters (e.g. lambdas) are returned as they are
+    """
+    return bound.resolve(voting_config) if isinstance(bound, VoteBound) else bound
@@ -10,6 +10,7 @@ import numpy as np
 
 from VIAYN.project_types import PayoutConfiguration, A, S, ActionBet, HistoryItem, Agent, WeightedBet, Weighted
 from VIAYN.utils import map_vals, weighted_mean
+from VIAYN.validation import full_checks
 
 """
 This code handles identifying how much money agents should receive based on the accuracy of their previously 
@@ -36,6 +37,11 @@ class PayoutConfigBase(Generic[A, S], PayoutConfiguration[A, S]):
     def validate_bet(self, bet: WeightedBet[A, S]) -> bool:
         return sum(bet.bet) <= 1
 
+    def validate_bets(self,
+            predictions: np.ndarray,
+            bets: np.ndarray) -> np.ndarray:
+        return np.sum(bets, axis=1) <= 1
+
     @staticmethod
     def advantage(
             loss: float,
@@ -97,12 +103,18 @@ class PayoutConfigBase(Generic[A, S], PayoutConfiguration[A, S]):
         t_idx: int = self._get_t_index_(t_current, t_cast_on)
         # the index of the prediction & bet corresponding to the current timestep
         
-        assert len(np.unique([len(bet.prediction) for bet in bets])) == 1
         if len(bets) == 0:
             return {}
+        if full_checks():
+            assert len(np.unique([len(bet.prediction) for bet in bets])) == 1
         if len(bets[0].prediction) <= t_idx:
             # no payout if bets do not apply to current timestep
             return {}
+        bets = [bet for bet in bets if bet.bet[t_idx] > 0 and bet.money > 0]
+        # bets with no money on this timestep can't be paid anything
+        # & don't count towards the losses of the other bets
+        if len(bets) == 0:
+            return {}
 
         losses: Dict[Agent[A, S], float] = \
             {bet.cast_by: self.calculate_loss(
@@ -133,12 +145,13 @@ class PayoutConfigBase(Generic[A, S], PayoutConfiguration[A, S]):
         # only bets that correspond to the action selected get any money
         # (this is fair because no money was withdrawn for the other action's bets)
 
-        seen_agents: Set[Agent] = set()
-        bet: WeightedBet[A, S]
-        for bet in relevant_bets:
-            agent: Agent[A, S] = bet.cast_by
-            assert agent not in seen_agents
-            seen_agents.add(agent)
+        if full_checks():
+            seen_agents: Set[Agent] = set()
+            bet: WeightedBet[A, S]
+            for bet in relevant_bets:
+                agent: Agent[A, S] = bet.cast_by
+                assert agent not in seen_agents
+                seen_agents.add(agent)
         # check that there is at most one bet per agent
         # TODO: we could possibly do away with this assumption, but it would need
         # a significant refactor
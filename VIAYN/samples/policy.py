@@ -7,6 +7,7 @@ from numpy.random import default_rng, Generator
 from VIAYN.project_types import PolicyConfiguration, A, B, S, WeightedBet
 from VIAYN.utils import weighted_mean_of_bets, argmax, dict_argmax
 from VIAYN.DiscreteDistribution import  DiscreteDistribution
+from VIAYN.validation import full_checks
 
 
 DevolvedDiscreteDistribution: DiscreteDistribution = DiscreteDistribution.from_weighted_vals([-np.inf], [1],
@@ -42,8 +43,11 @@ class GreedyPolicyConfiguration(Generic[A, S], PolicyConfiguration[A, float, S])
         -------
         expectations: Dict[A, float]
             the weighted mean of predictiosn for each action
+            -inf for actions without any bets, so they are never preferred
         """
-        return {action: sum(weighted_mean_of_bets(bets)) for action, bets in predictions.items()}
+        return {
+            action: sum(weighted_mean_of_bets(bets)) if len(bets) > 0 else -np.inf
+            for action, bets in predictions.items()}
 
     def select_action(self,
             aggregate_bets: Dict[A, float]) -> A:
@@ -202,11 +206,16 @@ class ThompsonPolicyConfiguration(Generic[A, S], ThompsonPolicyBase[A, List[Disc
                     distrib = DevolvedDiscreteDistribution
                 distributions.append(distrib)
             result[action] = distributions
+        n_timesteps: int = max(map(len, result.values()), default=0)
+        for distributions in result.values():
+            distributions.extend([DevolvedDiscreteDistribution] * (n_timesteps - len(distributions)))
+        # actions without any (non-zero) bets are never preferred
         return result
 
     def select_action(self,
             aggregate_bets: Dict[A, List[DiscreteDistribution]]) -> A:
-        assert len(np.unique(list(map(len, aggregate_bets.values())))) == 1
+        if full_checks():
+            assert len(np.unique(list(map(len, aggregate_bets.values())))) == 1
         # check that all of the lists have equal length
         def sample_sum(distributions: List[DiscreteDistribution]) -> float:
             return sum([distribution.sample() for distribution in distributions])
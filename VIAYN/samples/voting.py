@@ -20,14 +20,38 @@ class VotingConfigurationBase(Generic[A, S], VotingConfiguration[A, S]):
 
     def is_valid_prediction(self,
             prediction: List[float]) -> bool:
-        min_pred: float = self.min_possible_vote_total()
-        max_pred: float = self.max_possible_vote_total()
+        bounds: np.ndarray = self.vote_total_bounds(len(prediction))
+        dt: int
         prediction_at_t: float
-        for prediction_at_t in prediction:
-            if not min_pred <= prediction_at_t <= max_pred:
+        for dt, prediction_at_t in enumerate(prediction):
+            if not bounds[0, dt] <= prediction_at_t <= bounds[1, dt]:
                 return False
         return True
 
+    def validate_bets(self,
+            predictions: np.ndarray,
+            bets: np.ndarray) -> np.ndarray:
+        """
+        Checks every prediction against the min & max possible vote totals.
+        Bounds are read from the cached vote_total_bounds table rather than
+        being computed once per bet
+
+        Parameters
+        ----------
+        predictions: np.ndarray
+            (n_bets, prediction_len) array of predictions
+        bets: np.ndarray
+            ignored
+
+        Returns
+        -------
+        valid: np.ndarray
+            (n_bets,) boolean mask, True where the whole prediction is within bounds
+        """
+        predictions = np.asarray(predictions, dtype=float)
+        bounds: np.ndarray = self.vote_total_bounds(predictions.shape[1])
+        return np.all((bounds[0] <= predictions) & (predictions <= bounds[1]), axis=1)
+
     def set_n_agents(self,
             n_agents: int) -> None:
         return super().set_n_agents(n_agents)
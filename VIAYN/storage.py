@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from VIAYN.project_types import A, S, Agent, HistoryItem, WeightedBet
+from VIAYN.retention import StepSummary
+from VIAYN.samples.factory.serialization import spec_to_dict
+from VIAYN.train import TrainResult
+
+
+"""
+Binary on-disk format for TrainResult.
+
+save_result writes a directory containing one .npy file per array & a metadata.json.
+Agents & actions are stored as indices: metadata.json maps agent indices to their
+factory specs (if given) & action indices to str(action).
+Ragged data is stored flat with offsets, e.g. the bets of step i are
+bet_*[step_bet_offsets[i]:step_bet_offsets[i + 1]]
+
+    episode_offsets (n_episodes + 1): steps of each episode
+    selected_action, t_enacted (n_steps): one entry per HistoryItem
+    step_bet_offsets (n_steps + 1): bets placed at each step
+    bet_action, bet_agent, bet_money (n_bets): one entry per WeightedBet
+    bet_value_offsets (n_bets + 1): timesteps of each bet in bet_values & prediction_values
+    bet_values, prediction_values: WeightedBet.bet & WeightedBet.prediction, concatenated
+    balances (n_agents): final balance of each agent
+    summary_* (optional): the StepSummaries, if the result has any
+    balance_history, balance_episode_offsets (optional): if the result has them
+
+load_result memory-maps the arrays, so opening a result is instant & only the
+parts of the history that are actually used get read from disk.
+"""
+
+FORMAT_VERSION: int = 1
+
+
+@dataclass(frozen=True)
+class StoredBets:
+    """
+    All of the bets placed at one step of a stored result,
+    see StoredTrainResult.step_bets
+    """
+    action: np.ndarray
+    agent: np.ndarray
+    money: np.ndarray
+    bet: List[np.ndarray]
+    prediction: List[np.ndarray]
+
+
+def save_result(
+        result: TrainResult[A, S],
+        path: str,
+        agents: Optional[Sequence[Agent[A, S]]] = None,
+        agent_specs: Optional[Sequence[Any]] = None) -> None:
+    """
+    Parameters
+    ----------
+    result: TrainResult[A, S]
+        the result to save
+    path: str
+        the directory to save to, created if it doesn't exist
+    agents: Optional[Sequence[Agent[A, S]]]
+        the order to number agents in. Defaults to the order
+        the agents were passed to train()
+    agent_specs: Optional[Sequence[Any]]
+        the factory spec used to create each agent, in the same order as agents
+    """
+    agents = list(result.balances) if agents is None else list(agents)
+    assert agent_specs is None or len(agent_specs) == len(agents)
+    agent_idx: Dict[Agent[A, S], int] = {agent: i for i, agent in enumerate(agents)}
+    action_idx: Dict[A, int] = {}
+
+    episode_offsets: List[int] = [0]
+    selected_action: List[int] = []
+    t_enacted: List[int] = []
+    step_bet_offsets: List[int] = [0]
+    bet_action: List[int] = []
+    bet_agent: List[int] = []
+    bet_money: List[float] = []
+    bet_value_offsets: List[int] = [0]
+    bet_values: List[float] = []
+    prediction_values: List[float] = []
+
+    episode: List[HistoryItem[A, S]]
+    for episode in result.histories:
+        for item in episode:
+            selected_action.append(action_idx.setdefault(item.selected_action, len(action_idx)))
+            t_enacted.append(item.t_enacted)
+            for action, bets in item.predictions.items():
+                idx: int = action_idx.setdefault(action, len(action_idx))
+                for bet in bets:
+                    bet_action.append(idx)
+                    bet_agent.append(agent_idx[bet.cast_by])
+                    bet_money.append(bet.money)
+                    bet_values.extend(bet.bet)
+                    prediction_values.extend(bet.prediction)
+                    bet_value_offsets.append(len(bet_values))
+            step_bet_offsets.append(len(bet_action))
+        episode_offsets.append(len(selected_action))
+
+    arrays: Dict[str, np.ndarray] = {
+        'episode_offsets': np.array(episode_offsets, dtype=np.int64),
+        'selected_action': np.array(selected_action, dtype=np.int64),
+        't_enacted': np.array(t_enacted, dtype=np.int64),
+        'step_bet_offsets': np.array(step_bet_offsets, dtype=np.int64),
+        'bet_action': np.array(bet_action, dtype=np.int64),
+        'bet_agent': np.array(bet_agent, dtype=np.int64),
+        'bet_money': np.array(bet_money, dtype=np.float64),
+        'bet_value_offsets': np.array(bet_value_offsets, dtype=np.int64),
+        'bet_values': np.array(bet_values, dtype=np.float64),
+        'prediction_values': np.array(prediction_values, dtype=np.float64),
+        'balances': np.array([result.balances[agent] for agent in agents], dtype=np.float64),
+    }
+    column: Dict[Agent[A, S], int] = {agent: i for i, agent in enumerate(result.balances)}
+    columns: List[int] = [column[agent] for agent in agents]
+    # balances in summaries & balance_history are in the order of train()'s agents,
+    # their columns are reordered to follow the agent indices, like every other array
+    if result.summaries is not None:
+        summaries: List[StepSummary[A]] = [s for episode in result.summaries for s in episode]
+        arrays['summary_episode_offsets'] = np.cumsum(
+            [0] + [len(episode) for episode in result.summaries], dtype=np.int64)
+        arrays['summary_action'] = np.array(
+            [action_idx.setdefault(s.selected_action, len(action_idx)) for s in summaries], dtype=np.int64)
+        arrays['summary_welfare'] = np.array([s.welfare_score for s in summaries], dtype=np.float64)
+        arrays['summary_t_enacted'] = np.array([s.t_enacted for s in summaries], dtype=np.int64)
+        arrays['summary_balances'] = np.array(
+            [s.balances for s in summaries], dtype=np.float64).reshape(len(summaries), len(agents))[:, columns]
+    if result.balance_history is not None:
+        arrays['balance_history'] = np.asarray(result.balance_history, dtype=np.float64)[:, columns]
+        arrays['balance_episode_offsets'] = np.asarray(result.balance_episode_offsets, dtype=np.int64)
+
+    os.makedirs(path, exist_ok=True)
+    name: str
+    array: np.ndarray
+    for name, array in arrays.items():
+        np.save(os.path.join(path, name + '.npy'), array)
+    metadata: Dict[str, Any] = {
+        'format_version': FORMAT_VERSION,
+        'n_episodes': len(result.histories),
+        'pruned_episodes': result.pruned_episodes,
+        'actions': [str(action) for action in action_idx],
+        'agents': [
+            spec_to_dict(agent_specs[i]) if agent_specs is not None else None
+            for i in range(len(agents))],
+    }
+    with open(os.path.join(path, 'metadata.json'), 'w') as f:
+        json.dump(metadata, f, indent=1)
+
+
+def _load_array_(path: str, mmap_mode: Optional[str]) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode=mmap_mode)
+    except ValueError:
+        # empty arrays can't be memory-mapped
+        return np.load(path)
+
+
+class StoredTrainResult:
+    """
+    A TrainResult loaded by load_result. Arrays are memory-mapped,
+    so nothing is read from disk until it is used.
+    Episode numbers follow TrainResult.history_item_for,
+    i.e. they count episodes that were pruned
+    """
+
+    def __init__(self, path: str, mmap_mode: Optional[str] = 'r'):
+        with open(os.path.join(path, 'metadata.json')) as f:
+            self.metadata: Dict[str, Any] = json.load(f)
+        assert self.metadata['format_version'] == FORMAT_VERSION
+        self.arrays: Dict[str, np.ndarray] = {
+            name[:-len('.npy')]: _load_array_(os.path.join(path, name), mmap_mode)
+            for name in os.listdir(path) if name.endswith('.npy')}
+
+    @property
+    def n_episodes(self) -> int:
+        return self.metadata['n_episodes']
+
+    @property
+    def pruned_episodes(self) -> int:
+        return self.metadata['pruned_episodes']
+
+    @property
+    def actions(self) -> List[str]:
+        """
+        str(action) for each action index
+        """
+        return self.metadata['actions']
+
+    @property
+    def agent_specs(self) -> List[Optional[Dict[str, Any]]]:
+        """
+        the spec of each agent index (see spec_from_dict), or None if not saved
+        """
+        return self.metadata['agents']
+
+    @property
+    def balances(self) -> np.ndarray:
+        return self.arrays['balances']
+
+    def episode_steps(self, episode_num: int) -> slice:
+        """
+        Returns
+        -------
+        steps: slice
+            the steps of the episode in the per-step arrays
+        """
+        idx: int = episode_num - self.pruned_episodes
+        assert 0 <= idx < self.n_episodes, "episode was pruned or does not exist"
+        offsets: np.ndarray = self.arrays['episode_offsets']
+        return slice(int(offsets[idx]), int(offsets[idx + 1]))
+
+    def selected_actions(self, episode_num: int) -> np.ndarray:
+        return self.arrays['selected_action'][self.episode_steps(episode_num)]
+
+    def step_bets(self, episode_num: int, t_step: int) -> StoredBets:
+        """
+        Parameters
+        ----------
+        episode_num: int
+            the episode containing the step
+        t_step: int >= 0
+            the step within the episode
+
+        Returns
+        -------
+        bets: StoredBets
+            all of the bets placed at that step
+        """
+        steps: slice = self.episode_steps(episode_num)
+        step: int = steps.start + t_step
+        assert step < steps.stop
+        start: int = int(self.arrays['step_bet_offsets'][step])
+        stop: int = int(self.arrays['step_bet_offsets'][step + 1])
+        value_offsets: np.ndarray = np.asarray(self.arrays['bet_value_offsets'][start:stop + 1])
+        return StoredBets(
+            action=self.arrays['bet_action'][start:stop],
+            agent=self.arrays['bet_agent'][start:stop],
+            money=self.arrays['bet_money'][start:stop],
+            bet=[self.arrays['bet_values'][lo:hi]
+                for lo, hi in zip(value_offsets[:-1], value_offsets[1:])],
+            prediction=[self.arrays['prediction_values'][lo:hi]
+                for lo, hi in zip(value_offsets[:-1], value_offsets[1:])])
+
+    def to_train_result(self,
+            agents: Sequence[Agent[A, S]],
+            actions: Sequence[A]) -> TrainResult[A, S]:
+        """
+        Rebuilds the whole TrainResult in memory
+
+        Parameters
+        ----------
+        agents: Sequence[Agent[A, S]]
+            the agent for each agent index
+        actions: Sequence[A]
+            the action for each action index
+
+        Returns
+        -------
+        result: TrainResult[A, S]
+            equivalent to the result that was saved
+        """
+        assert len(agents) == len(self.agent_specs)
+        assert len(actions) == len(self.actions)
+        histories: List[List[HistoryItem[A, S]]] = []
+        for episode_num in range(self.pruned_episodes, self.pruned_episodes + self.n_episodes):
+            steps: slice = self.episode_steps(episode_num)
+            episode: List[HistoryItem[A, S]] = []
+            for t_step in range(steps.stop - steps.start):
+                stored: StoredBets = self.step_bets(episode_num, t_step)
+                predictions: Dict[A, List[WeightedBet[A, S]]] = {}
+                for i in range(len(stored.action)):
+                    predictions.setdefault(actions[stored.action[i]], []).append(WeightedBet.trusted(
+                        bet=stored.bet[i].tolist(),
+                        prediction=stored.prediction[i].tolist(),
+                        action=actions[stored.action[i]],
+                        money=float(stored.money[i]),
+                        cast_by=agents[stored.agent[i]]))
+                episode.append(HistoryItem(
+                    selected_action=actions[self.arrays['selected_action'][steps.start + t_step]],
+                    predictions=predictions,
+                    t_enacted=int(self.arrays['t_enacted'][steps.start + t_step])))
+            histories.append(episode)
+
+        summaries: Optional[List[List[StepSummary[A]]]] = None
+        if 'summary_episode_offsets' in self.arrays:
+            offsets: np.ndarray = self.arrays['summary_episode_offsets']
+            summaries = [
+                [StepSummary(
+                    selected_action=actions[self.arrays['summary_action'][i]],
+                    welfare_score=float(self.arrays['summary_welfare'][i]),
+                    balances=np.array(self.arrays['summary_balances'][i]),
+                    t_enacted=int(self.arrays['summary_t_enacted'][i]))
+                 for i in range(offsets[e], offsets[e + 1])]
+                for e in range(len(offsets) - 1)]
+
+        return TrainResult(
+            histories=histories,
+            balances={agent: float(balance) for agent, balance in zip(agents, self.balances)},
+            pruned_episodes=self.pruned_episodes,
+            summaries=summaries,
+            balance_history=np.array(self.arrays['balance_history'])
+            if 'balance_history' in self.arrays else None,
+            balance_episode_offsets=np.array(self.arrays['balance_episode_offsets'])
+            if 'balance_episode_offsets' in self.arrays else None)
+
+
+def load_result(path: str, mmap_mode: Optional[str] = 'r') -> StoredTrainResult:
+    """
+    Parameters
+    ----------
+    path: str
+        directory written by save_result
+    mmap_mode: Optional[str]
+        passed to np.load, None reads everything in to memory
+
+    Returns
+    -------
+    result: StoredTrainResult
+        the memory-mapped result
+    """
+    return StoredTrainResult(path, mmap_mode)
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, Future, as_completed
+from dataclasses import dataclass, replace
+from enum import Enum
+from itertools import product
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from VIAYN.project_types import Agent, Environment, SystemConfiguration
+from VIAYN.samples.factory import (
+    AgentFactory, AgentFactorySpec, EnvFactory, EnvsFactorySpec,
+    PayoutConfigFactory, PayoutConfigFactorySpec,
+    PolicyConfigFactory, PolicyConfigFactorySpec,
+    VotingConfigFactory, VotingConfigFactorySpec,
+    spec_to_dict, spec_hash)
+from VIAYN.train import TrainResult, train
+
+
+"""
+Parameter sweeps over the factory specs.
+
+A RunSpec holds every spec needed for one call to train(). A sweep is a base RunSpec
+& a grid of axes, where each axis is a dotted path to a field & the values it takes:
+    "policy.configType": [PolicyConfigEnum.simple, PolicyConfigEnum.suggested]
+    "payout.upperBound": [UpperBoundConfigEnum.max, UpperBoundConfigEnum.quartile95]
+    "agents.bet": [0.1, 0.5]          (sets bet on every agent)
+    "agents.0.bet": [0.1, 0.5]        (sets bet on the first agent only)
+    "episode_seeds": [(0, 1), (2, 3)]
+run_sweep runs every cell of the grid (optionally on a process pool), summarizes each
+result with a metrics function & returns one row per cell: the coordinates, the metrics
+& the hash of the cell's RunSpec. With a cache_dir, finished cells are stored by hash,
+so rerunning a sweep skips them. Cells with specs that can't be hashed
+(e.g. agents with lambdas as vote bounds, use VoteBounds instead) are always run.
+VoteBounds of the voting configuration are resolved against the cell's voting configuration.
+Caching assumes each cell is deterministic, so seed every random component.
+"""
+
+Metrics = Callable[[TrainResult, List[Agent]], Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class RunSpec:
+    """
+    Everything needed for one call to train()
+    """
+    agents: Tuple[AgentFactorySpec, ...]
+    voting: VotingConfigFactorySpec
+    policy: PolicyConfigFactorySpec
+    payout: PayoutConfigFactorySpec
+    env: EnvsFactorySpec
+    episode_seeds: Tuple[int, ...] = (0,)
+    tsteps_per_episode: int = 10
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'agents': [spec_to_dict(spec) for spec in self.agents],
+            'voting': spec_to_dict(self.voting),
+            'policy': spec_to_dict(self.policy),
+            'payout': spec_to_dict(self.payout),
+            'env': spec_to_dict(self.env),
+            'episode_seeds': list(self.episode_seeds),
+            'tsteps_per_episode': self.tsteps_per_episode,
+        }
+
+    def key(self) -> Optional[str]:
+        """
+        Returns
+        -------
+        key: Optional[str]
+            stable hash of the spec, or None if it can't be hashed
+        """
+        return spec_hash(self.to_dict())
+
+    def create(self) -> Tuple[List[Agent], Environment, SystemConfiguration]:
+        config: SystemConfiguration = SystemConfiguration(
+            VotingConfigFactory.create(self.voting),
+            PolicyConfigFactory.create(self.policy),
+            PayoutConfigFactory.create(self.payout))
+        agents: List[Agent] = [AgentFactory.create(spec, config.voting_manager) for spec in self.agents]
+        return agents, EnvFactory.create(self.env), config
+
+    def run(self) -> Tuple[List[Agent], TrainResult]:
+        agents, env, config = self.create()
+        return agents, train(agents, env, self.episode_seeds, config, self.tsteps_per_episode)
+
+
+def with_value(spec: RunSpec, path: str, value: Any) -> RunSpec:
+    """
+    Parameters
+    ----------
+    spec: RunSpec
+        the spec to change
+    path: str
+        dotted path to the field to change, see the module docstring
+    value: Any
+        the new value of the field
+
+    Returns
+    -------
+    spec: RunSpec
+        a copy of spec with the field changed
+    """
+    parts: List[str] = path.split('.')
+    if len(parts) == 1:
+        return replace(spec, **{path: value})
+    component, field = parts[0], parts[-1]
+    if component == 'agents':
+        assert len(parts) in (2, 3)
+        agents: List[AgentFactorySpec] = list(spec.agents)
+        indices: Sequence[int] = range(len(agents)) if len(parts) == 2 else [int(parts[1])]
+        for i in indices:
+            agents[i] = replace(agents[i], **{field: value})
+        return replace(spec, agents=tuple(agents))
+    assert len(parts) == 2, f"unknown path {path}"
+    return replace(spec, **{component: replace(getattr(spec, component), **{field: value})})
+
+
+def expand_grid(
+        base: RunSpec,
+        axes: Dict[str, Sequence[Any]]) -> List[Tuple[Dict[str, Any], RunSpec]]:
+    """
+    Returns
+    -------
+    cells: List[Tuple[Dict[str, Any], RunSpec]]
+        the coordinates & spec of every cell in the grid
+        (the product of all of the axes), in row-major order
+    """
+    cells: List[Tuple[Dict[str, Any], RunSpec]] = []
+    values: Tuple[Any, ...]
+    for values in product(*axes.values()):
+        coordinates: Dict[str, Any] = dict(zip(axes.keys(), values))
+        spec: RunSpec = base
+        for path, value in coordinates.items():
+            spec = with_value(spec, path, value)
+        cells.append((coordinates, spec))
+    return cells
+
+
+def final_balances(result: TrainResult, agents: List[Agent]) -> Dict[str, Any]:
+    """
+    Default metrics for run_sweep: the final balance of each agent
+    & the number of timesteps kept in the history
+    """
+    metrics: Dict[str, Any] = {f'balance_{i}': result.balances[agent] for i, agent in enumerate(agents)}
+    metrics['n_steps'] = sum(len(episode) for episode in result.histories)
+    return metrics
+
+
+def _run_cell_(spec: RunSpec, metrics: Metrics) -> Dict[str, Any]:
+    agents, result = spec.run()
+    return metrics(result, agents)
+
+
+def _cell_path_(cache_dir: str, key: str, metrics: Metrics) -> str:
+    metrics_name: str = f"{metrics.__module__}.{metrics.__qualname__}"
+    return os.path.join(cache_dir, spec_hash([key, metrics_name]) + '.json')
+
+
+def _coordinate_(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+def run_sweep(
+        base: RunSpec,
+        axes: Dict[str, Sequence[Any]],
+        metrics: Metrics = final_balances,
+        cache_dir: Optional[str] = None,
+        n_workers: int = 1) -> List[Dict[str, Any]]:
+    """
+    Runs every cell of a grid
+
+    Parameters
+    ----------
+    base: RunSpec
+        the spec that the axes are applied to
+    axes: Dict[str, Sequence[Any]]
+        path of each field to vary -> the values it takes, see the module docstring
+    metrics: Metrics
+        summarizes the result of each cell. Needs to be picklable
+        (e.g. a module-level function) if n_workers > 1
+    cache_dir: Optional[str]
+        directory to store the metrics of finished cells in. No caching if None
+    n_workers: int > 0
+        number of processes to run cells on. Cells are run in this process if 1,
+        otherwise specs need to be picklable
+
+    Returns
+    -------
+    rows: List[Dict[str, Any]]
+        for each cell, its coordinates, metrics & 'key' (the hash of its spec)
+    """
+    assert n_workers > 0
+    cells: List[Tuple[Dict[str, Any], RunSpec]] = expand_grid(base, axes)
+    keys: List[Optional[str]] = [spec.key() for _, spec in cells]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(cells)
+
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        for i, key in enumerate(keys):
+            if key is not None and os.path.exists(_cell_path_(cache_dir, key, metrics)):
+                with open(_cell_path_(cache_dir, key, metrics)) as f:
+                    results[i] = json.load(f)
+
+    def store(i: int, cell_metrics: Dict[str, Any]) -> None:
+        results[i] = cell_metrics
+        if cache_dir is not None and keys[i] is not None:
+            with open(_cell_path_(cache_dir, keys[i], metrics), 'w') as f:
+                json.dump(cell_metrics, f)
+    # cells are cached as soon as they finish, so an interrupted sweep keeps its progress
+
+    to_run: List[int] = [i for i in range(len(cells)) if results[i] is None]
+    if n_workers == 1:
+        for i in to_run:
+            store(i, _run_cell_(cells[i][1], metrics))
+    else:
+        with ProcessPoolExecutor(n_workers) as pool:
+            futures: Dict[Future, int] = {
+                pool.submit(_run_cell_, cells[i][1], metrics): i for i in to_run}
+            for future in as_completed(futures):
+                store(futures[future], future.result())
+
+    return [
+        {**{path: _coordinate_(value) for path, value in coordinates.items()}, **results[i], 'key': keys[i]}
+        for i, (coordinates, _) in enumerate(cells)]
+
+
+def write_table(rows: List[Dict[str, Any]], path: str) -> None:
+    """
+    Writes the rows returned by run_sweep as a CSV file, one row per cell
+    """
+    columns: List[str] = []
+    for row in rows:
+        columns.extend(column for column in row if column not in columns)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
@@ -3,16 +3,23 @@
 # @Date:   2020-12-10 14:37:06
 # @Last Modified by:   Suhail.Alnahari
 # @Last Modified time: 2020-12-10 14:58:42
+from concurrent.futures import Executor
 from dataclasses import dataclass
-from typing import Generator, List, Iterable, Dict, Tuple, Generic
+from typing import Any, Callable, Generator, List, Iterable, Dict, Tuple, Generic, Sequence, Optional
 
 import numpy as np
 
 from VIAYN.project_types import (
     Agent, Environment, SystemConfiguration, VotingConfiguration, A, S, B, VoteRange,
     HistoryItem, WeightedBet, ActionBet, Action, PayoutConfiguration, PolicyConfiguration,
-    AnonymizedHistoryItem)
+    AnonymizedHistoryItem, VectorEnvironment, ActionSpace)
 from VIAYN.utils import add_dictionaries
+from VIAYN.validation import full_checks, boundary_checks
+from VIAYN.instrumentation import Instrumentation
+from VIAYN.memory import MemoryReport, MemoryTracker, memory_report
+from VIAYN.retention import RetentionPolicy, RetentionEnum, StepSummary
+from VIAYN.balances import BalanceRecorder
+from VIAYN.accumulators import Accumulator
 
 
 """
@@ -47,9 +54,36 @@ class TrainResult(Generic[A, S]):
         Amount of money each agent is left with after train is finished
         being called. Not directly derivable because of post-episode
         payouts
+
+    pruned_episodes: int
+        the number of oldest episodes that were dropped from histories
+        to stay within a memory budget (see MemoryTracker) or because of
+        the RetentionPolicy, so histories[0] is episode number pruned_episodes
+
+    summaries: Optional[List[List[StepSummary[A]]]]
+        a summary of each timestep of each episode, only recorded
+        when train() is called with RetentionEnum.summary
+
+    balance_history: Optional[np.ndarray]
+        (timesteps, agents) balance of each agent (in the order of balances)
+        after the payouts & withdrawals of every timestep of every episode,
+        including pruned ones. Only recorded when train() is called
+        with record_balances=True. Payouts of outstanding bets at the end
+        of an episode show up in the first row of the next episode, except
+        for the last episode: its final payouts are in one closing row after
+        balance_episode_offsets[-1], so balance_history[-1] equals balances
+
+    balance_episode_offsets: Optional[np.ndarray]
+        (n_seeds + 1) the rows of balance_history for the episode of the
+        e-th seed are balance_episode_offsets[e]:balance_episode_offsets[e + 1]
+        Unlike histories, episodes without any timesteps are counted
     """
     histories: List[List[HistoryItem[A, S]]]
     balances: Dict[Agent[A, S], float]
+    pruned_episodes: int = 0
+    summaries: Optional[List[List[StepSummary[A]]]] = None
+    balance_history: Optional[np.ndarray] = None
+    balance_episode_offsets: Optional[np.ndarray] = None
 
     def history_item_for(self, 
             episode_num: int,
@@ -60,7 +94,7 @@ class TrainResult(Generic[A, S]):
 
         Parameters
         ----------
-        episode_num: int >= 0
+        episode_num: int >= pruned_episodes
             the index of the episode containing the returned
             history item
         t_step: int >= 0
@@ -73,7 +107,41 @@ class TrainResult(Generic[A, S]):
             the selected history item containing all information about
             that timestep's loop.
         """
-        return self.histories[episode_num][t_step]
+        assert episode_num >= self.pruned_episodes, "episode was pruned"
+        return self.histories[episode_num - self.pruned_episodes][t_step]
+
+    def memory_report(self) -> MemoryReport:
+        """
+        Returns
+        -------
+        report: MemoryReport
+            estimated bytes used per episode, history item & bet
+            see VIAYN/memory.py
+        """
+        return memory_report(self.histories, self.balances)
+
+    def balance_trajectory(self,
+            agent: Agent[A, S],
+            episode_num: Optional[int] = None) -> np.ndarray:
+        """
+        Parameters
+        ----------
+        agent: Agent[A, S]
+            the agent to get the balances of
+        episode_num: Optional[int]
+            index of the seed of the episode, all episodes if None
+
+        Returns
+        -------
+        balances: np.ndarray
+            the agent's balance after each timestep, a view of balance_history.
+            With all episodes, the last value is the agent's final balance
+        """
+        assert self.balance_history is not None, "train() was called without record_balances"
+        column: np.ndarray = self.balance_history[:, list(self.balances).index(agent)]
+        if episode_num is None:
+            return column
+        return column[self.balance_episode_offsets[episode_num]:self.balance_episode_offsets[episode_num + 1]]
 
 
 def train(
@@ -81,7 +149,14 @@ def train(
         env: Environment[A, S],
         episode_seeds: Iterable[int],
         config: SystemConfiguration[A, B, S],
-        tsteps_per_episode: int = np.inf) \
+        tsteps_per_episode: int = np.inf,
+        instrumentation: Optional[Instrumentation] = None,
+        memory_tracker: Optional[MemoryTracker] = None,
+        retention: RetentionPolicy = RetentionPolicy(),
+        record_balances: bool = False,
+        accumulators: Sequence[Accumulator[A, S]] = (),
+        executor: Optional[Executor] = None,
+        money_epsilon: Optional[float] = None) \
         -> TrainResult[A, S]:
     """
 
@@ -105,106 +180,545 @@ def train(
     tsteps_per_episode: int >= 0
         Runs each episode until either episode.done() is true or r
         tsteps_per_episode is exceeded
+    instrumentation: Optional[Instrumentation]
+        records the time spent in each phase of the loop, e.g. a PhaseTimer
+        see VIAYN/instrumentation.py. Nothing is recorded if None
+    memory_tracker: Optional[MemoryTracker]
+        follows the size of the history while training & drops old
+        episodes to stay within its budget, see VIAYN/memory.py
+    retention: RetentionPolicy
+        how much of the history of finished episodes to keep
+        keeps everything by default, see VIAYN/retention.py
+    record_balances: bool
+        whether to record the balance of every agent after every timestep
+        in TrainResult.balance_history, see VIAYN/balances.py
+    accumulators: Sequence[Accumulator[A, S]]
+        on-line statistics to update after every timestep, e.g. a LossAccumulator
+        read them after train() returns, see VIAYN/accumulators.py
+    executor: Optional[Executor]
+        if not None, agents' votes & bets are computed in tasks submitted to it
+        (e.g. a ThreadPoolExecutor, for agents that release the GIL)
+        see get_agent_bets. Results are the same as without an executor
+    money_epsilon: Optional[float]
+        if not None, agents with less money than this don't bet, see get_agent_bets
     
     Returns
     -------
     result: TrainResult[A, S]
         datatype logging the history of events during training
     """
+    if instrumentation is None:
+        instrumentation = Instrumentation()
+    loop: Generator[Dict[str, Any], HistoryItem[A, S], TrainResult[A, S]] = episode_loop(
+        agents, env, episode_seeds, config, tsteps_per_episode,
+        instrumentation, memory_tracker, retention, record_balances, accumulators)
+    try:
+        step: Dict[str, Any] = next(loop)
+        while True:
+            step = loop.send(play_timestep(
+                agents=agents,
+                config=config,
+                instrumentation=instrumentation,
+                accumulators=accumulators,
+                executor=executor,
+                money_epsilon=money_epsilon,
+                **step))
+            # agents vote, get paid & bet, then an action is selected
+    except StopIteration as stop:
+        return stop.value
+
+
+def episode_loop(
+        agents: List[Agent[A, S]],
+        env: Environment[A, S],
+        episode_seeds: Iterable[int],
+        config: SystemConfiguration[A, B, S],
+        tsteps_per_episode: int,
+        instrumentation: Instrumentation,
+        memory_tracker: Optional[MemoryTracker],
+        retention: RetentionPolicy,
+        record_balances: bool,
+        accumulators: Sequence[Accumulator[A, S]],
+        lock_step: bool = False) \
+        -> Generator[Optional[Dict[str, Any]], Optional[HistoryItem[A, S]], TrainResult[A, S]]:
+    """
+    The episode loop of train(), train_async() & train_vectorized(), without
+    playing the timesteps, so that all of them share the same bookkeeping.
+    For every timestep, it yields the keyword arguments for play_timestep that
+    change between timesteps (balances, state, actions, history, t & summaries)
+    & expects the resulting HistoryItem to be sent back.
+    Parameters are the same as train(), except for
+
+    lock_step: bool
+        if True, the caller steps env with the selected action before sending
+        the HistoryItem back, & the loop yields None after the final payouts of
+        every episode, so that train_vectorized can step & reset all of its
+        environments together
+
+    Returns
+    -------
+    result: TrainResult[A, S]
+        as the value of the StopIteration, see train()
+    """
     old_episode_history: List[List[HistoryItem[A, S]]] = []
     # history for previous episodes
     current_history: List[HistoryItem[A, S]] = []
     # history for current episode
+    pruned_episodes: int = 0
+    # number of old episodes dropped because of retention
+    summaries: Optional[List[List[StepSummary[A]]]] = \
+        [] if retention.kind == RetentionEnum.summary else None
+    current_summaries: Optional[List[StepSummary[A]]] = None
     balances: Dict[Agent[A, S], float] = \
         {agent: 1. for agent in agents}
     # all agents start with $1
+    recorder: Optional[BalanceRecorder[A, S]] = BalanceRecorder(agents) if record_balances else None
     config.voting_manager.set_n_agents(len(agents))
     # set_n_agents useful for checking max possible vote
     # and therefore max possible prediction
+    accumulator: Accumulator[A, S]
+    for accumulator in accumulators:
+        accumulator.start(agents)
+    if memory_tracker is not None:
+        memory_tracker.reset()
 
+    episode_num: int
     seed: int
-    for seed in episode_seeds:
+    for episode_num, seed in enumerate(episode_seeds):
         env.reset()
         env.seed(seed)
         # restart the environment each episode
 
         if len(current_history) > 0:
             old_episode_history.append(current_history)
+            if summaries is not None:
+                summaries.append(current_summaries)
             # note: this essentially obliviates episodes of 0 length
+        n_dropped: int = retention.n_to_drop(len(old_episode_history))
+        del old_episode_history[:n_dropped]
+        pruned_episodes += n_dropped
+        if memory_tracker is not None:
+            memory_tracker.end_episode(retained=len(current_history) > 0, episode_num=episode_num - 1)
+            memory_tracker.forget_oldest(n_dropped)
+            memory_tracker.enforce(old_episode_history)
         current_history = []
+        current_summaries = [] if summaries is not None else None
         # clear current history
 
+        action_space: ActionSpace[A] = env.action_space()
+        # actions are fixed for the whole episode
+
         t: int = 0
         while not env.done() and t < tsteps_per_episode:
-            state: S = env.state()
+            item: HistoryItem[A, S] = yield dict(
+                balances=balances,
+                state=env.state(),
+                actions=action_space.actions,
+                history=current_history,
+                t=t,
+                summaries=current_summaries)
+            # agents vote, get paid & bet, then an action is selected
+            if recorder is not None:
+                recorder.record(balances)
 
-            welfare_score: float = get_agent_votes(
-                agents=agents,
-                state=state,
-                config=config)
-            # aggregates agent votes about environment
-
-            payouts: Dict[Agent[A, S], float] = calculate_payouts(
-                current_history,
-                welfare_score,
-                config, t)
-
-            agent: Agent[A, S]
-            for agent in payouts:
-                balances[agent] += payouts[agent]
-            # give agents money proportional to their current payouts
-
-            placed_bets: Dict[A, List[WeightedBet[A, S]]] = \
-                get_agent_bets(agents, balances, env.state(), env.actions())
-            # agents make predictions about the quality of each action
-
-            action: A = select_action(
-                placed_bets,
-                config)
-            # action selected based on predictions
-
-            # TODO: make this its own function?
-            bets_that_happened: List[WeightedBet[A, S]] = placed_bets[action]
-            bet: WeightedBet[A, S]
-            for bet in bets_that_happened:
-                # duplicate assert
-                assert sum(bet.bet) <= 1
-                balances[bet.cast_by] *= (1 - sum(bet.bet))
-            # only take money out of agent accounts for bets that actually happened
-            # essentially 'refunds' bets on any actions that were not selected
-
-            env.step(action)
+            if not lock_step:
+                with instrumentation.phase('env.step', env):
+                    env.step(item.selected_action)
 
             # update agent history
-            ahi = AnonymizedHistoryItem()
-            for agent in agents:
-                agent.view(ahi)
-
-            current_history.append(
-                HistoryItem(
-                    selected_action=action,
-                    predictions=placed_bets,
-                    t_enacted=t))
+            with instrumentation.phase('agent.view'):
+                ahi = AnonymizedHistoryItem()
+                for agent in agents:
+                    agent.view(ahi)
+
+            current_history.append(item)
             # log the current timestep in history
             # used for returning results & calculating payouts
+            if memory_tracker is not None:
+                memory_tracker.record_item(item)
+                memory_tracker.enforce(old_episode_history)
             t += 1
         
-        final_payouts: Dict[Agent[A, S], float] = pay_outstanding_bets(
-            current_history,t, config)
+        with instrumentation.phase('final_payout', config.payout_manager):
+            final_payouts: Dict[Agent[A, S], float] = pay_outstanding_bets(
+                current_history,t, config)
 
         for agent in final_payouts:
             balances[agent] += final_payouts[agent]
+        if recorder is not None:
+            recorder.end_episode()
+        for accumulator in accumulators:
+            accumulator.end_episode(final_payouts)
         # TODO: make receiving money a function?
         # without final_payouts, agents lose all money on any outstanding
         # bets when the episode ends
         # adding this ensures that the money in the system stays constant
+        if lock_step:
+            yield None
 
     old_episode_history.append(current_history)
+    if summaries is not None:
+        summaries.append(current_summaries if current_summaries is not None else [])
     # need to append the last one (TODO: redo this logic to avoid duplication)
+    n_dropped = retention.n_to_drop(len(old_episode_history))
+    del old_episode_history[:n_dropped]
+    pruned_episodes += n_dropped
+    if memory_tracker is not None:
+        pruned_episodes += memory_tracker.pruned_episodes
+    balance_history: Optional[np.ndarray] = None
+    balance_episode_offsets: Optional[np.ndarray] = None
+    if recorder is not None:
+        recorder.record(balances)
+        # closing row with the final payouts of the last episode
+        balance_history, balance_episode_offsets = recorder.result()
 
     return TrainResult(
         histories=old_episode_history, 
-        balances=balances)
+        balances=balances,
+        pruned_episodes=pruned_episodes,
+        summaries=summaries,
+        balance_history=balance_history,
+        balance_episode_offsets=balance_episode_offsets)
+
+def play_timestep(
+        agents: List[Agent[A, S]],
+        balances: Dict[Agent[A, S], float],
+        state: S,
+        actions: Iterable[A],
+        history: List[HistoryItem[A, S]],
+        t: int,
+        config: SystemConfiguration[A, B, S],
+        instrumentation: Optional[Instrumentation] = None,
+        summaries: Optional[List[StepSummary[A]]] = None,
+        accumulators: Sequence[Accumulator[A, S]] = (),
+        executor: Optional[Executor] = None,
+        money_epsilon: Optional[float] = None) -> HistoryItem[A, S]:
+    """
+    Runs the part of a single predict-act-vote-payout loop that doesn't
+    touch the environment: agents vote on the current state, are paid for
+    their previous bets & place new bets, and an action is selected.
+    Money is withdrawn for the bets on the selected action.
+
+    Parameters
+    ----------
+    agents: List[Agent[A, S]]
+        all of the agents participating in this timestep
+    balances: Dict[Agent[A, S], float]
+        the current amount of money that each agent has
+        modified in place to include payouts & withdrawals
+    state: S
+        the current state of the environment
+    actions: Iterable[A]
+        the available actions at this timestep
+    history: List[HistoryItem[A, S]]
+        all of the previous timesteps of this episode, used for payouts
+    t: int >= 0
+        the current timestep of the episode
+    config: SystemConfiguration[A, B, S]
+        configuration for the loop
+    instrumentation: Optional[Instrumentation]
+        records the time spent in each phase, nothing is recorded if None
+    summaries: Optional[List[StepSummary[A]]]
+        if not None, a summary of this timestep is appended to it
+    accumulators: Sequence[Accumulator[A, S]]
+        updated with the payouts & bets of this timestep
+    executor: Optional[Executor]
+        runs the agents' votes & bets, see get_agent_bets
+    money_epsilon: Optional[float]
+        agents with less money than this don't bet, see get_agent_bets
+
+    Returns
+    -------
+    item: HistoryItem[A, S]
+        record of the bets placed & the action selected at this timestep
+        the caller is responsible for enacting the action & logging the record
+    """
+    if instrumentation is None:
+        instrumentation = Instrumentation()
+
+    with instrumentation.phase('vote', config.voting_manager):
+        welfare_score: float = get_agent_votes(
+            agents=agents,
+            state=state,
+            config=config,
+            executor=executor)
+    # aggregates agent votes about environment
+
+    payouts: Dict[Agent[A, S], float] = pay_agents(
+        history, welfare_score, balances, config, t, instrumentation)
+    # give agents money proportional to their current payouts
+
+    with instrumentation.phase('bet'):
+        placed_bets: Dict[A, List[WeightedBet[A, S]]] = \
+            get_agent_bets(agents, balances, state, actions, executor, money_epsilon)
+    # agents make predictions about the quality of each action
+
+    return enact_bets(
+        agents, balances, placed_bets, welfare_score, payouts, t, config,
+        instrumentation, summaries, accumulators)
+
+
+def pay_agents(
+        history: List[HistoryItem[A, S]],
+        welfare_score: float,
+        balances: Dict[Agent[A, S], float],
+        config: SystemConfiguration[A, B, S],
+        t: int,
+        instrumentation: Instrumentation) -> Dict[Agent[A, S], float]:
+    """
+    The payout phase of play_timestep: pays agents for their previous bets
+    based on the welfare score at t
+
+    Returns
+    -------
+    payouts: Dict[Agent[A, S], float]
+        the amount paid to each agent, already added to balances
+    """
+    with instrumentation.phase('payout', config.payout_manager):
+        payouts: Dict[Agent[A, S], float] = calculate_payouts(
+            history,
+            welfare_score,
+            config, t)
+
+        agent: Agent[A, S]
+        for agent in payouts:
+            balances[agent] += payouts[agent]
+    return payouts
+
+
+def enact_bets(
+        agents: List[Agent[A, S]],
+        balances: Dict[Agent[A, S], float],
+        placed_bets: Dict[A, List[WeightedBet[A, S]]],
+        welfare_score: float,
+        payouts: Dict[Agent[A, S], float],
+        t: int,
+        config: SystemConfiguration[A, B, S],
+        instrumentation: Instrumentation,
+        summaries: Optional[List[StepSummary[A]]] = None,
+        accumulators: Sequence[Accumulator[A, S]] = ()) -> HistoryItem[A, S]:
+    """
+    The rest of play_timestep once all bets are placed: invalid bets are
+    discarded, an action is selected & money is withdrawn for the bets on it
+
+    Returns
+    -------
+    item: HistoryItem[A, S]
+        see play_timestep
+    """
+    if boundary_checks():
+        with instrumentation.phase('validate', config):
+            placed_bets = filter_valid_bets(placed_bets, config)
+    # invalid bets are discarded, so no money is withdrawn for them
+    # (skipped when validation is off, see VIAYN/validation.py)
+
+    with instrumentation.phase('select_action', config.policy_manager):
+        action: A = select_action(
+            placed_bets,
+            config)
+    # action selected based on predictions
+
+    # TODO: make this its own function?
+    with instrumentation.phase('withdraw'):
+        bets_that_happened: List[WeightedBet[A, S]] = placed_bets[action]
+        bet: WeightedBet[A, S]
+        for bet in bets_that_happened:
+            # duplicate assert
+            if full_checks():
+                assert sum(bet.bet) <= 1
+            balances[bet.cast_by] *= (1 - sum(bet.bet))
+    # only take money out of agent accounts for bets that actually happened
+    # essentially 'refunds' bets on any actions that were not selected
+
+    if summaries is not None:
+        summaries.append(StepSummary(
+            selected_action=action,
+            welfare_score=welfare_score,
+            balances=np.array([balances[agent] for agent in agents]),
+            t_enacted=t))
+
+    if len(accumulators) > 0:
+        with instrumentation.phase('accumulate'):
+            accumulator: Accumulator[A, S]
+            for accumulator in accumulators:
+                accumulator.update(t, welfare_score, payouts, placed_bets, action)
+
+    return HistoryItem(
+        selected_action=action,
+        predictions=placed_bets,
+        t_enacted=t)
+
+
+class _EnvView_(Environment[A, S]):
+    """
+    One of the environments of a VectorEnvironment, as seen by episode_loop
+    in lock-step: train_vectorized resets, seeds & steps the whole batch,
+    then refreshes every view, so reset, seed & step do nothing here
+    """
+
+    def __init__(self, idx: int):
+        self.idx: int = idx
+        self.space: Optional[ActionSpace[A]] = None
+        self.current_state: Optional[S] = None
+        self.is_done: bool = True
+
+    def refresh(self, states: np.ndarray, done: np.ndarray) -> None:
+        self.current_state = states[self.idx]
+        self.is_done = bool(done[self.idx])
+
+    def step(self, action: A) -> None:
+        assert False, "stepped by train_vectorized"
+
+    def actions(self) -> List[A]:
+        return list(self.space.actions)
+
+    def action_space(self) -> ActionSpace[A]:
+        return self.space
+
+    def state(self) -> S:
+        return self.current_state
+
+    def done(self) -> bool:
+        return self.is_done
+
+    def reset(self) -> S:
+        return self.current_state
+
+    def seed(self, random_seed: int = None) -> None:
+        pass
+
+
+def train_vectorized(
+        agents: Sequence[List[Agent[A, S]]],
+        env: VectorEnvironment[A, S],
+        episode_seeds: Iterable[Sequence[int]],
+        configs: Sequence[SystemConfiguration[A, B, S]],
+        tsteps_per_episode: int = np.inf,
+        instrumentation: Optional[Instrumentation] = None,
+        memory_trackers: Optional[Sequence[Optional[MemoryTracker]]] = None,
+        retention: RetentionPolicy = RetentionPolicy(),
+        record_balances: bool = False,
+        accumulators: Optional[Sequence[Sequence[Accumulator[A, S]]]] = None,
+        executor: Optional[Executor] = None,
+        money_epsilon: Optional[float] = None) \
+        -> List[TrainResult[A, S]]:
+    """
+    Runs env.n_envs independent copies of train() in lock-step, so that
+    all of the environments are reset, seeded & stepped with a single call each.
+    Each environment is driven by its own episode_loop, so each copy gives
+    the same result as calling train() with the corresponding agents,
+    environment, config & options. Votes, bets & payouts are still computed
+    one environment at a time, only the environment calls are batched.
+    Environments that finish their episode early wait (& ignore their actions)
+    until all of them are done, then all of them start the next episode
+
+    Parameters
+    ----------
+    agents: Sequence[List[Agent[A, S]]]
+        the agents for each environment. Agents shouldn't be shared
+        between environments, because they may be stateful
+    env: VectorEnvironment[A, S]
+        the batch of environments the agents are acting in
+    episode_seeds: Iterable[Sequence[int]]
+        each element contains the seed for every environment for one episode
+    configs: Sequence[SystemConfiguration[A, B, S]]
+        the configuration for each environment. Shouldn't be shared
+        between environments, because policies may be stateful
+    tsteps_per_episode: int >= 0
+        Runs each episode until either that environment is done or
+        tsteps_per_episode is exceeded
+    instrumentation: Optional[Instrumentation]
+        records the time spent in each phase, summed over all environments
+    memory_trackers: Optional[Sequence[Optional[MemoryTracker]]]
+        the memory tracker of each environment, see train(). None for no tracking
+    retention: RetentionPolicy
+        how much of the history of finished episodes to keep, see train()
+    record_balances: bool
+        whether to record the balances of every environment, see train()
+    accumulators: Optional[Sequence[Sequence[Accumulator[A, S]]]]
+        the accumulators of each environment, see train(). None for no accumulators
+    executor: Optional[Executor]
+        runs the agents' votes & bets, shared by all environments, see train()
+    money_epsilon: Optional[float]
+        agents with less money than this don't bet, see get_agent_bets
+
+    Returns
+    -------
+    results: List[TrainResult[A, S]]
+        the result of training in each environment
+    """
+    if instrumentation is None:
+        instrumentation = Instrumentation()
+    n_envs: int = env.n_envs
+    if memory_trackers is None:
+        memory_trackers = [None] * n_envs
+    if accumulators is None:
+        accumulators = [()] * n_envs
+    assert len(agents) == n_envs
+    assert len(configs) == n_envs
+    assert len(memory_trackers) == n_envs
+    assert len(accumulators) == n_envs
+    seed_rows: List[Sequence[int]] = [list(seeds) for seeds in episode_seeds]
+    views: List[_EnvView_[A, S]] = [_EnvView_(i) for i in range(n_envs)]
+    loops: List[Generator[Optional[Dict[str, Any]], Optional[HistoryItem[A, S]], TrainResult[A, S]]] = [
+        episode_loop(
+            agents[i], views[i], [seeds[i] for seeds in seed_rows], configs[i], tsteps_per_episode,
+            instrumentation, memory_trackers[i], retention, record_balances, accumulators[i],
+            lock_step=True)
+        for i in range(n_envs)]
+
+    steps: List[Optional[Dict[str, Any]]]
+    seeds: Sequence[int]
+    for seeds in seed_rows:
+        env.reset()
+        env.seed(seeds)
+        action_space: ActionSpace[A] = env.action_space()
+        states: np.ndarray = env.state()
+        done: np.ndarray = env.done()
+        view: _EnvView_[A, S]
+        for view in views:
+            view.space = action_space
+            view.refresh(states, done)
+        steps = [loop.send(None) for loop in loops]
+        # every loop starts its episode, None for environments that are already done
+
+        while any(step is not None for step in steps):
+            selected: np.ndarray = np.zeros(n_envs, dtype=np.int64)
+            # index of the selected action for each environment
+            items: List[Optional[HistoryItem[A, S]]] = [None] * n_envs
+            i: int
+            for i in range(n_envs):
+                if steps[i] is not None:
+                    items[i] = play_timestep(
+                        agents=agents[i],
+                        config=configs[i],
+                        instrumentation=instrumentation,
+                        accumulators=accumulators[i],
+                        executor=executor,
+                        money_epsilon=money_epsilon,
+                        **steps[i])
+                    selected[i] = action_space.index_of(items[i].selected_action)
+
+            with instrumentation.phase('env.step', env):
+                env.step(selected)
+            # environments that are already done ignore their action
+            states = env.state()
+            done = env.done()
+            for i in range(n_envs):
+                if items[i] is not None:
+                    views[i].refresh(states, done)
+                    steps[i] = loops[i].send(items[i])
+            # None once an environment's episode is over
+
+    results: List[TrainResult[A, S]] = []
+    loop: Generator[Optional[Dict[str, Any]], Optional[HistoryItem[A, S]], TrainResult[A, S]]
+    for loop in loops:
+        try:
+            loop.send(None)
+        except StopIteration as stop:
+            results.append(stop.value)
+    return results
+
 
 def pay_outstanding_bets(
         history: List[HistoryItem[A, S]],
@@ -340,10 +854,73 @@ def calculate_payouts(
     return total_payouts
 
 
+def _executor_groups_(agents: List[Agent[A, S]]) -> List[List[Agent[A, S]]]:
+    """
+    Splits agents in to groups that can be called from different tasks,
+    see Agent.executor_group. Agents keep their relative order within a group.
+    Agents that belong to several groups merge them (union-find over the groups)
+    """
+    parent: Dict[Any, Any] = {}
+    # group -> group it was merged in to, groups that weren't merged are their own parent
+    first_groups: List[Any] = []
+    agent: Agent[A, S]
+    for agent in agents:
+        group: Any = agent.executor_group()
+        keys: Tuple[Any, ...] = tuple(group) if isinstance(group, frozenset) else (group,)
+        assert len(keys) > 0
+        key: Any
+        for key in keys:
+            parent.setdefault(key, key)
+        root: Any = _find_group_(parent, keys[0])
+        for key in keys[1:]:
+            other: Any = _find_group_(parent, key)
+            if other is not root:
+                parent[other] = root
+        first_groups.append(keys[0])
+
+    groups: Dict[Any, List[Agent[A, S]]] = {}
+    for agent, key in zip(agents, first_groups):
+        groups.setdefault(_find_group_(parent, key), []).append(agent)
+    return list(groups.values())
+
+
+def _find_group_(parent: Dict[Any, Any], key: Any) -> Any:
+    """
+    Returns
+    -------
+    root: Any
+        the group that key was merged in to, see _executor_groups_
+    """
+    while parent[key] is not key:
+        parent[key] = parent[parent[key]]
+        key = parent[key]
+    return key
+
+
+def _map_groups_(
+        executor: Executor,
+        agents: List[Agent[A, S]],
+        fn: Callable[[List[Agent[A, S]]], Dict[Agent[A, S], Any]]) -> Dict[Agent[A, S], Any]:
+    """
+    Calls fn on each executor group of agents in its own task
+
+    Returns
+    -------
+    results: Dict[Agent[A, S], Any]
+        the results of every group, merged
+    """
+    results: Dict[Agent[A, S], Any] = {}
+    group_results: Dict[Agent[A, S], Any]
+    for group_results in executor.map(fn, _executor_groups_(agents)):
+        results.update(group_results)
+    return results
+
+
 def get_agent_votes(
         agents: List[Agent[A, S]],
         state: S,
-        config: SystemConfiguration[A, B, S]) -> float:
+        config: SystemConfiguration[A, B, S],
+        executor: Optional[Executor] = None) -> float:
     """
     Has each agent vote on the current state & aggregates their
     votes in to a single anonymized value
@@ -357,6 +934,8 @@ def get_agent_votes(
     config: SystemConfiguration[A, B, S]
         config.voting_manager is used to validate all votes
         and aggregate them
+    executor: Optional[Executor]
+        if not None, votes are computed in tasks submitted to it, see get_agent_bets
 
     Returns
     -------
@@ -364,7 +943,13 @@ def get_agent_votes(
         aggregated total votes received for the current timestep
         higher is better
     """
-    votes: List[float] = [agent.vote(state) for agent in agents]
+    votes: List[float]
+    if executor is None:
+        votes = [agent.vote(state) for agent in agents]
+    else:
+        by_agent: Dict[Agent[A, S], float] = _map_groups_(
+            executor, agents, lambda group: {agent: agent.vote(state) for agent in group})
+        votes = [by_agent[agent] for agent in agents]
     vote_range: VoteRange = config.voting_manager.vote_range
     votes = [vote for vote in votes if vote_range.contains(vote)]
     # filter to only valid values
@@ -376,12 +961,24 @@ def get_agent_bets(
         agents: List[Agent[A, S]],
         balances: Dict[Agent[A, S], float],
         state: S,
-        actions: Iterable[A]) \
+        actions: Iterable[A],
+        executor: Optional[Executor] = None,
+        money_epsilon: Optional[float] = None) \
         -> Dict[A, List[WeightedBet[A, S]]]:
     """
     Solicits agent bets for each possible action available at this timestep
     Agents can opt out of betting by betting $0
 
+    Bets are stored sparsely: bets that put no money on any timestep (because
+    the agent bet 0 or has no money) aren't stored, so the policy & payouts only
+    process real bets. Leaving them out doesn't change the result, because bets
+    with no weight don't count towards aggregations & are never paid
+
+    With an executor, each agent's bets on every action are computed in one task
+    (agents in the same executor group share a task), in the same order as without
+    an executor, so per-agent random number generators draw the same values.
+    The bets are returned in the same order either way
+
     Parameters
     ----------
     agents: List[Agent[A, S]]
@@ -396,6 +993,13 @@ def get_agent_bets(
         decisions
     actions: List[A]
         the available actions at this timestep
+    executor: Optional[Executor]
+        if not None, bets are computed in tasks submitted to it
+    money_epsilon: Optional[float]
+        if not None, agents with less money than this aren't asked to bet at all.
+        Unlike zero bets, this can change the result, since those agents could
+        have bet what little money they have (& their random number generators
+        aren't advanced)
     
     Returns
     -------
@@ -405,23 +1009,80 @@ def get_agent_bets(
         # TODO: technically multiple bets per agent could be useful
         # as a variance reduction strategy for agents
     """
+    if money_epsilon is not None:
+        agents = [agent for agent in agents if balances[agent] >= money_epsilon]
+    # agents that are (almost) broke are dropped from the active set
     placed_bets: Dict[A, List[WeightedBet[A, S]]] = {}
-    for action in actions:
+    precomputed: Optional[Dict[Agent[A, S], List[ActionBet]]] = None
+    if executor is not None:
+        actions = list(actions)
+
+        def group_bets(group: List[Agent[A, S]]) -> Dict[Agent[A, S], List[ActionBet]]:
+            bets: Dict[Agent[A, S], List[ActionBet]] = {agent: [] for agent in group}
+            for action in actions:
+                for agent in group:
+                    bets[agent].append(agent.bet(state, action, balances[agent]))
+            return bets
+        precomputed = _map_groups_(executor, agents, group_bets)
+
+    i: int
+    for i, action in enumerate(actions):
         placed_bets[action] = []
 
         for agent in agents:
             money: float = balances[agent]
-            bet: ActionBet = agent.bet(state, action, money)
+            bet: ActionBet = agent.bet(state, action, money) if precomputed is None \
+                else precomputed[agent][i]
             # solicit the agent bet
+            if money <= 0 or not any(amount > 0 for amount in bet.bet):
+                continue
+            # zero bets are left out, see above
 
-            wbet: WeightedBet[A, S] = WeightedBet(
+            wbet: WeightedBet[A, S] = WeightedBet.trusted(
                 bet=bet.bet,
                 prediction=bet.prediction,
                 action=action,
                 money=money,
                 cast_by=agent)
             # attaches metadata about the bet to create a
-            # WeightedBet
+            # WeightedBet. The ActionBet already checked itself, so
+            # the checks don't need to be run again
             placed_bets[action].append(wbet)
 
     return placed_bets
+
+
+def filter_valid_bets(
+        placed_bets: Dict[A, List[WeightedBet[A, S]]],
+        config: SystemConfiguration[A, B, S]) \
+        -> Dict[A, List[WeightedBet[A, S]]]:
+    """
+    Removes all of the bets that are not valid according to config.
+    All of the bets on an action are validated at once using
+    config.validate_bets, rather than calling config.validate_bet per bet
+
+    Parameters
+    ----------
+    placed_bets: Dict[A, List[WeightedBet[A, S]]]
+        for each action, the list of bets that were placed on that action
+        all bets on the same action should have the same prediction length
+    config: SystemConfiguration[A, B, S]
+        used to validate the bets
+
+    Returns
+    -------
+    valid_bets: Dict[A, List[WeightedBet[A, S]]]
+        same as placed_bets, but containing only the valid bets
+    """
+    valid_bets: Dict[A, List[WeightedBet[A, S]]] = {}
+    action: A
+    bets: List[WeightedBet[A, S]]
+    for action, bets in placed_bets.items():
+        if len(bets) == 0:
+            valid_bets[action] = bets
+            continue
+        is_valid: np.ndarray = config.validate_bets(
+            predictions=np.array([bet.prediction for bet in bets], dtype=float),
+            bets=np.array([bet.bet for bet in bets], dtype=float))
+        valid_bets[action] = [bet for bet, valid in zip(bets, is_valid) if valid]
+    return valid_bets
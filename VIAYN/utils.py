@@ -10,7 +10,8 @@ from decimal import Decimal
 import numpy as np
 from numpy.random import Generator
 
-from VIAYN.project_types import A, S, WeightedBet, Weighted
+from VIAYN.project_types import A, S, WeightedBet, Weighted, VoteBoundGetter, VotingConfiguration
+from VIAYN.validation import full_checks
 
 T = TypeVar("T")
 U = TypeVar("U", int, float, complex, str)
@@ -50,9 +51,10 @@ def add_dictionaries(
 def weighted_mean_of_bets(bets: List[WeightedBet[A, S]]) -> List[float]:
     # TODO: should probably use np.average with weights
     assert len(bets) > 0
-    assert len(np.unique([len(bet.bet) for bet in bets])) == 1
-    assert len(np.unique([len(bet.prediction) for bet in bets])) == 1
-    assert len(bets[0].bet) == len(bets[0].prediction)
+    if full_checks():
+        assert len(np.unique([len(bet.bet) for bet in bets])) == 1
+        assert len(np.unique([len(bet.prediction) for bet in bets])) == 1
+        assert len(bets[0].bet) == len(bets[0].prediction)
     prediction_len: int = len(bets[0].prediction)
     weighted_sum: List[float] = [0. for _ in range(prediction_len)]
     total_weights: List[float] = [0. for _ in range(prediction_len)]
@@ -288,3 +290,40 @@ def repeat_if_float(
             if n is not None:
                 assert len(value) == n
             return value
+
+
+def vote_bounds_table(
+        min_getter: VoteBoundGetter,
+        max_getter: VoteBoundGetter,
+        horizon: int) -> np.ndarray:
+    """
+    Evaluates a pair of vote bound getters for every dt in [0, horizon)
+
+    If the getters are the min_possible_vote_total & max_possible_vote_total
+    methods of the same VotingConfiguration, the cached table from
+    VotingConfiguration.vote_total_bounds is returned instead of calling them.
+    Any other getters (e.g. lambdas) are called once per dt
+
+    Parameters
+    ----------
+    min_getter: VoteBoundGetter
+        gets the minimum possible prediction for dt steps in the future
+    max_getter: VoteBoundGetter
+        gets the maximum possible prediction for dt steps in the future
+    horizon: int >= 0
+        the number of timesteps to get bounds for
+
+    Returns
+    -------
+    bounds: np.ndarray
+        (2, horizon) array. bounds[0] contains the minimums and bounds[1]
+        contains the maximums. Should be treated as read-only
+    """
+    config: Any = getattr(min_getter, '__self__', None)
+    if isinstance(config, VotingConfiguration) and \
+            min_getter == config.min_possible_vote_total and \
+            max_getter == config.max_possible_vote_total:
+        return config.vote_total_bounds(horizon)
+    return np.array([
+        [min_getter(dt) for dt in range(horizon)],
+        [max_getter(dt) for dt in range(horizon)]], dtype=float).reshape(2, horizon)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import os
+from contextlib import contextmanager
+from enum import Enum, unique
+from typing import Iterator, Union
+
+
+"""
+Controls how much checking is done while training.
+
+Most of the hot paths (train(), payouts, policies) are full of asserts that re-check
+things that were already checked when the data entered the system. These are useful
+while developing & testing, but production runs pay for them every step.
+
+There are three levels:
+    full: every check is run, including the ones inside the training loop (default)
+    boundary: only checks where data enters the system are run, e.g. the checks in
+        ActionBet when an agent places a bet and the batch validation of bets
+        in train() (see SystemConfiguration.validate_bets)
+    off: no checks are run. Invalid bets are not filtered out, so results are
+        undefined if any agent places an invalid bet
+
+The level can be set with set_validation_level, temporarily with the validation_level
+context manager, or for a whole process with the VIAYN_VALIDATION environment
+variable (e.g. VIAYN_VALIDATION=boundary). Tests always run with full checking.
+"""
+
+
+@unique
+class ValidationLevel(Enum):
+    full = "full"
+    boundary = "boundary"
+    off = "off"
+
+
+_level_: ValidationLevel = ValidationLevel(os.environ.get("VIAYN_VALIDATION", "full"))
+
+
+def get_validation_level() -> ValidationLevel:
+    return _level_
+
+
+def set_validation_level(level: Union[ValidationLevel, str]) -> None:
+    """
+    Parameters
+    ----------
+    level: Union[ValidationLevel, str]
+        the new validation level, or its name
+    """
+    global _level_
+    _level_ = ValidationLevel(level)
+
+
+@contextmanager
+def validation_level(level: Union[ValidationLevel, str]) -> Iterator[None]:
+    """
+    Context manager that sets the validation level, restoring
+    the previous level when it exits
+    """
+    previous: ValidationLevel = _level_
+    set_validation_level(level)
+    try:
+        yield
+    finally:
+        set_validation_level(previous)
+
+
+def full_checks() -> bool:
+    """
+    Returns
+    -------
+    enabled: bool
+        whether checks inside of the training loop should be run
+    """
+    return _level_ is ValidationLevel.full
+
+
+def boundary_checks() -> bool:
+    """
+    Returns
+    -------
+    enabled: bool
+        whether checks on data entering the system should be run
+    """
+    return _level_ is not ValidationLevel.off
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+import atexit
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import product
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import VIAYN.samples.factory as fac
+from VIAYN.DiscreteDistribution import DiscreteDistribution
+from VIAYN.project_types import Agent, ActionBet, SystemConfiguration, Weighted
+from VIAYN.samples.agents import RNGUniforPredSelectionMech
+from VIAYN.samples.vote_ranges import BinaryVoteRange
+from VIAYN.train import train, calculate_payouts, get_agent_bets, filter_valid_bets
+from VIAYN.utils import weighted_quartile, vote_bounds_table
+
+
+"""
+Benchmark cases for the predict-act-vote-payout loop.
+
+Every case has a setup function, which builds all of the objects needed
+and returns a zero-argument function that does the work being timed.
+Only the returned function is timed, so setup may be as slow as needed.
+
+Cases are parameterized over the grid in GRID:
+    n_agents: the number of agents placing bets & voting
+    n_actions: the number of actions available at each timestep
+    horizon: the number of timesteps predicted in each bet
+    episode_length: the number of timesteps in each episode of train()
+Micro-benchmarks ignore the parameters that don't apply to them.
+
+numpy_agents.serial & numpy_agents.threads run train() with agents that do a matrix
+product in every bet, without & with a thread pool (train(executor=...)).
+NumPy releases the GIL during the product, so the threaded case is expected to be faster
+on a machine with more than one core. No speedup has been shown yet: they have only been
+run on a single core machine, where the two were within noise of each other (91-149ms
+threaded vs 118-141ms serial over 4 runs of the quick grid). The cases only time the two,
+they don't assert anything about which is faster. Until they are run on a multi-core
+machine, train(executor=...) is only known to give the same results, not to be faster.
+Every threaded case shares one thread pool, which is shut down when the interpreter exits.
+
+uniform_prediction.vectorized times RNGUniforPredSelectionMech, which draws a whole
+prediction with one call to its generator, & uniform_prediction.per_timestep times the
+one-call-per-timestep draws it replaced. Their setup checks the documented seed policy:
+a mechanism & a generator with the same seed give identical predictions either way,
+so a change to the vectorized draw path that breaks seeded runs fails the benchmark.
+On a single core machine the vectorized draws were slower for short predictions
+(27 vs 11us at horizon 1, 30 vs 22us at horizon 3), even at horizon 5 & faster after
+(26 vs 35us at 10, 34 vs 114us at 20, 42 vs 293us at 50).
+
+Run the cases with `python -m benchmarks.run` from the repository root.
+"""
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    name: str
+    params: Tuple[Tuple[str, int], ...]
+    setup: Callable[[], Callable[[], Any]]
+
+    @property
+    def case_id(self) -> str:
+        """
+        Returns
+        -------
+        case_id: str
+            unique & stable identifier, used as the key in baseline files
+        """
+        return self.name + "[" + ",".join(f"{key}={val}" for key, val in self.params) + "]"
+
+
+GRID: Dict[str, Tuple[int, ...]] = {
+    'n_agents': (10, 50),
+    'n_actions': (2, 5),
+    'horizon': (1, 3),
+    'episode_length': (20,),
+}
+
+QUICK_GRID: Dict[str, Tuple[int, ...]] = {
+    'n_agents': (10,),
+    'n_actions': (2,),
+    'horizon': (1,),
+    'episode_length': (10,),
+}
+
+_policies_: Dict[str, fac.PolicyConfigEnum] = {
+    'greedy': fac.PolicyConfigEnum.simple,
+    'thompson': fac.PolicyConfigEnum.suggested,
+    'thompson2': fac.PolicyConfigEnum.suggested_general,
+}
+
+
+def _make_config_(policy: fac.PolicyConfigEnum = fac.PolicyConfigEnum.simple) -> SystemConfiguration:
+    return SystemConfiguration(
+        fac.VotingConfigFactory.create(fac.VotingConfigFactorySpec(
+            fac.VotingConfigEnum.simple, BinaryVoteRange())),
+        fac.PolicyConfigFactory.create(fac.PolicyConfigFactorySpec(policy, random_seed=0)),
+        fac.PayoutConfigFactory.create(fac.PayoutConfigFactorySpec(fac.PayoutConfigEnum.suggested)))
+
+
+def _make_agents_(config: SystemConfiguration, n_agents: int, horizon: int) -> List[Agent]:
+    return [
+        fac.AgentFactory.create(fac.AgentFactorySpec(
+            fac.AgentsEnum.random,
+            vote=float(i % 2),
+            totalVotesBound=(
+                config.voting_manager.min_possible_vote_total,
+                config.voting_manager.max_possible_vote_total),
+            seed=i,
+            bet=0.5,
+            N=horizon))
+        for i in range(n_agents)]
+
+
+class _MatrixAgent_(Agent):
+    """
+    Agent whose bets are dominated by NumPy work that releases the GIL
+    """
+
+    def __init__(self, seed: int, size: int = 192):
+        self.random: np.random.Generator = np.random.default_rng(seed)
+        self.matrix: np.ndarray = self.random.standard_normal((size, size)) / size
+
+    def vote(self, state) -> float:
+        return 1.
+
+    def bet(self, state, action, money: float) -> ActionBet:
+        product: np.ndarray = self.matrix @ self.matrix.T @ self.matrix
+        prediction: float = float(np.abs(product).mean() + self.random.uniform())
+        return ActionBet(bet=[0.1], prediction=[prediction])
+
+
+def _make_env_(n_actions: int):
+    return fac.EnvFactory.create(fac.EnvsFactorySpec(fac.EnvsEnum.default, n_actions=n_actions))
+
+
+def _setup_train_(n_agents: int, n_actions: int, horizon: int, episode_length: int):
+    config = _make_config_()
+    agents = _make_agents_(config, n_agents, horizon)
+    env = _make_env_(n_actions)
+    return lambda: train(agents, env, range(1), config, tsteps_per_episode=episode_length)
+
+
+_thread_pool_: Optional[ThreadPoolExecutor] = None
+
+
+def _get_thread_pool_() -> ThreadPoolExecutor:
+    """
+    Returns
+    -------
+    pool: ThreadPoolExecutor
+        the thread pool shared by every numpy_agents.threads case,
+        created on first use & shut down at exit
+    """
+    global _thread_pool_
+    if _thread_pool_ is None:
+        _thread_pool_ = ThreadPoolExecutor(os.cpu_count())
+        atexit.register(_thread_pool_.shutdown)
+    return _thread_pool_
+
+
+def _setup_numpy_agents_(threaded: bool, n_agents: int, n_actions: int, episode_length: int):
+    config = _make_config_()
+    agents = [_MatrixAgent_(i) for i in range(n_agents)]
+    env = _make_env_(n_actions)
+    executor: Optional[ThreadPoolExecutor] = _get_thread_pool_() if threaded else None
+    return lambda: train(agents, env, range(1), config, tsteps_per_episode=episode_length, executor=executor)
+
+
+def _setup_calculate_payouts_(n_agents: int, n_actions: int, horizon: int, episode_length: int):
+    config = _make_config_()
+    agents = _make_agents_(config, n_agents, horizon)
+    history = train(agents, _make_env_(n_actions), range(1), config,
+        tsteps_per_episode=episode_length).histories[0]
+    t: int = len(history)
+    return lambda: calculate_payouts(history, 0.5, config, t)
+
+
+def _setup_get_agent_bets_(n_agents: int, n_actions: int, horizon: int):
+    config = _make_config_()
+    agents = _make_agents_(config, n_agents, horizon)
+    env = _make_env_(n_actions)
+    balances = {agent: 1. for agent in agents}
+    state = env.state()
+    actions = env.actions()
+    return lambda: get_agent_bets(agents, balances, state, actions)
+
+
+def _setup_policy_(policy: str, method: str, n_agents: int, n_actions: int, horizon: int):
+    config = _make_config_(_policies_[policy])
+    agents = _make_agents_(config, n_agents, horizon)
+    config.voting_manager.set_n_agents(n_agents)
+    env = _make_env_(n_actions)
+    bets = filter_valid_bets(
+        get_agent_bets(agents, {agent: 1. for agent in agents}, env.state(), env.actions()), config)
+    if method == 'aggregate_bets':
+        return lambda: config.policy_manager.aggregate_bets(bets)
+    aggregated = config.policy_manager.aggregate_bets(bets)
+    return lambda: config.policy_manager.select_action(aggregated)
+
+
+def _setup_sample_(n_agents: int):
+    rng = np.random.default_rng(0)
+    distribution = DiscreteDistribution.from_weighted_vals(
+        rng.uniform(0, 1, n_agents), rng.uniform(0.1, 1, n_agents), random_seed=rng)
+    return distribution.sample
+
+
+def _setup_weighted_quartile_(n_agents: int):
+    rng = np.random.default_rng(0)
+    losses = [Weighted(w, v) for w, v in zip(rng.uniform(0.1, 1, n_agents), rng.uniform(0, 1, n_agents))]
+    return lambda: weighted_quartile(losses, 0.95)
+
+
+_prediction_bounds_: Tuple[Callable[[int], float], Callable[[int], float]] = (
+    lambda dt: -float(dt), lambda dt: np.inf if dt == 2 else 4. + dt)
+# bounds that change with dt, with an infinite bound to use the fallback range
+
+
+def _draw_per_timestep_(random: np.random.Generator, horizon: int) -> List[float]:
+    """
+    The draws RNGUniforPredSelectionMech made before it drew a whole prediction at once
+    """
+    bounds: np.ndarray = vote_bounds_table(*_prediction_bounds_, horizon)
+    prediction: List[float] = []
+    dt: int
+    for dt in range(horizon):
+        low: float = bounds[0, dt] if np.isfinite(bounds[0, dt]) else -100.
+        high: float = bounds[1, dt] if np.isfinite(bounds[1, dt]) else 100.
+        prediction.append(random.uniform(low=low, high=high))
+    return prediction
+
+
+def _setup_uniform_prediction_(vectorized: bool, horizon: int):
+    mech = RNGUniforPredSelectionMech(horizon, *_prediction_bounds_, random_seed=0)
+    random: np.random.Generator = np.random.default_rng(0)
+    for _ in range(100):
+        assert mech.select_prediction(None, None, 1.) == _draw_per_timestep_(random, horizon), \
+            "vectorized draws no longer match per-timestep draws with the same seed"
+    # seed policy, see RNGUniforPredSelectionMech
+    if vectorized:
+        return lambda: mech.select_prediction(None, None, 1.)
+    return lambda: _draw_per_timestep_(random, horizon)
+
+
+def _grid_(grid: Dict[str, Tuple[int, ...]], keys: Tuple[str, ...]) -> List[Dict[str, int]]:
+    return [dict(zip(keys, vals)) for vals in product(*[grid[key] for key in keys])]
+
+
+def _case_(name: str, params: Dict[str, int], setup: Callable[..., Callable[[], Any]], *args) -> BenchmarkCase:
+    return BenchmarkCase(name, tuple(params.items()), lambda: setup(*args, **params))
+
+
+def all_cases(grid: Dict[str, Tuple[int, ...]] = GRID) -> List[BenchmarkCase]:
+    """
+    Parameters
+    ----------
+    grid: Dict[str, Tuple[int, ...]]
+        the values of each parameter to benchmark, see GRID
+
+    Returns
+    -------
+    cases: List[BenchmarkCase]
+        every case over the grid
+    """
+    cases: List[BenchmarkCase] = []
+    for params in _grid_(grid, ('n_agents', 'n_actions', 'horizon', 'episode_length')):
+        cases.append(_case_('train', params, _setup_train_))
+        cases.append(_case_('calculate_payouts', params, _setup_calculate_payouts_))
+    for params in _grid_(grid, ('n_agents', 'n_actions', 'episode_length')):
+        cases.append(_case_('numpy_agents.serial', params, _setup_numpy_agents_, False))
+        cases.append(_case_('numpy_agents.threads', params, _setup_numpy_agents_, True))
+    for params in _grid_(grid, ('n_agents', 'n_actions', 'horizon')):
+        cases.append(_case_('get_agent_bets', params, _setup_get_agent_bets_))
+        for policy in _policies_:
+            for method in ('aggregate_bets', 'select_action'):
+                cases.append(_case_(f'{policy}.{method}', params, _setup_policy_, policy, method))
+    for params in _grid_(grid, ('horizon',)):
+        cases.append(_case_('uniform_prediction.vectorized', params, _setup_uniform_prediction_, True))
+        cases.append(_case_('uniform_prediction.per_timestep', params, _setup_uniform_prediction_, False))
+    for params in _grid_(grid, ('n_agents',)):
+        cases.append(_case_('DiscreteDistribution.sample', params, _setup_sample_))
+        cases.append(_case_('weighted_quartile', params, _setup_weighted_quartile_))
+    return cases
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from benchmarks.cases import BenchmarkCase, all_cases, GRID, QUICK_GRID
+
+
+"""
+Runs the benchmark cases in benchmarks/cases.py, offline & without any extra dependencies.
+
+Usage (from the repository root):
+    python -m benchmarks.run --save benchmarks/baseline.json
+        time every case & store the results as a baseline
+    python -m benchmarks.run --compare benchmarks/baseline.json
+        time every case & report any case that got slower than the baseline
+        by more than --threshold (exits with status 1 if there are regressions)
+    python -m benchmarks.run --quick --filter train
+        only time a small grid of cases whose id contains 'train'
+
+Each case is timed with timeit: the number of calls per measurement is picked so that
+a measurement takes at least --min-time seconds, and the fastest of --repeat measurements
+is kept, since slower measurements are dominated by noise from the rest of the machine.
+
+Baselines are only comparable on the same machine, so regenerate them after changing hardware
+or numpy versions. benchmarks/baseline.json is the baseline of the full grid, the machine
+& grid it was recorded with are stored next to the results.
+"""
+
+
+@dataclass(frozen=True)
+class Comparison:
+    case_id: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+def time_case(case: BenchmarkCase, repeat: int = 5, min_time: float = 0.2) -> float:
+    """
+    Parameters
+    ----------
+    case: BenchmarkCase
+        the case to time
+    repeat: int
+        the number of measurements to take
+    min_time: float
+        the minimum number of seconds each measurement should take
+
+    Returns
+    -------
+    seconds: float
+        the fastest time per call observed
+    """
+    timer = timeit.Timer(case.setup())
+    number: int = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run_cases(
+        cases: Sequence[BenchmarkCase],
+        repeat: int = 5,
+        min_time: float = 0.2,
+        verbose: bool = True) -> Dict[str, float]:
+    """
+    Returns
+    -------
+    results: Dict[str, float]
+        seconds per call, keyed by case id
+    """
+    results: Dict[str, float] = {}
+    for case in cases:
+        results[case.case_id] = time_case(case, repeat, min_time)
+        if verbose:
+            print(f"{case.case_id:<70} {_format_time_(results[case.case_id]):>12}", flush=True)
+    return results
+
+
+def compare(
+        results: Dict[str, float],
+        baseline: Dict[str, float]) -> List[Comparison]:
+    """
+    Compares the cases in both results & baseline; cases only in one of them are ignored
+    """
+    return [Comparison(case_id, baseline[case_id], results[case_id])
+            for case_id in results if case_id in baseline]
+
+
+def regressions(
+        comparisons: Sequence[Comparison],
+        threshold: float = 1.1) -> List[Comparison]:
+    """
+    Parameters
+    ----------
+    comparisons: Sequence[Comparison]
+        results from compare()
+    threshold: float
+        how much slower than the baseline a case may be (1.1 = 10% slower)
+
+    Returns
+    -------
+    regressions: List[Comparison]
+        the cases slower than the threshold allows
+    """
+    return [comparison for comparison in comparisons if comparison.ratio > threshold]
+
+
+def save_baseline(
+        path: str,
+        results: Dict[str, float],
+        grid: Optional[Dict[str, Tuple[int, ...]]] = None) -> None:
+    """
+    Stores results together with the machine they were recorded on
+    & the grid of parameters the cases were run over
+    """
+    with open(path, 'w') as f:
+        json.dump(
+            {'machine': _machine_info_(), 'grid': grid, 'results': results},
+            f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> Dict[str, float]:
+    with open(path) as f:
+        stored = json.load(f)
+    if stored.get('machine') != _machine_info_():
+        print(f"warning: {path} was recorded on a different machine or environment", file=sys.stderr)
+    return stored['results']
+
+
+def report(comparisons: Sequence[Comparison], threshold: float = 1.1) -> str:
+    lines: List[str] = [f"{'case':<70} {'baseline':>12} {'current':>12} {'ratio':>7}"]
+    for comparison in sorted(comparisons, key=lambda c: -c.ratio):
+        flag: str = "  SLOWER" if comparison.ratio > threshold else ""
+        lines.append(
+            f"{comparison.case_id:<70} {_format_time_(comparison.baseline):>12} "
+            f"{_format_time_(comparison.current):>12} {comparison.ratio:>7.2f}{flag}")
+    return "\n".join(lines)
+
+
+def _format_time_(seconds: float) -> str:
+    for unit, scale in (('s', 1.), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+def _machine_info_() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'processor': platform.processor() or platform.machine(),
+        'cpus': str(os.cpu_count()),
+        'system': platform.system(),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks for the predict-act-vote-payout loop")
+    parser.add_argument('--save', help="store results as a baseline at this path")
+    parser.add_argument('--compare', help="compare results against the baseline at this path")
+    parser.add_argument('--threshold', type=float, default=1.1,
+        help="slowdown ratio above which a case counts as a regression")
+    parser.add_argument('--filter', default="", help="only run cases whose id contains this")
+    parser.add_argument('--quick', action='store_true', help="run a small grid of cases")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    grid: Dict[str, Tuple[int, ...]] = QUICK_GRID if args.quick else GRID
+    cases: List[BenchmarkCase] = [
+        case for case in all_cases(grid)
+        if args.filter in case.case_id]
+    results: Dict[str, float] = run_cases(cases, args.repeat, args.min_time)
+
+    if args.save is not None:
+        save_baseline(args.save, results, grid)
+    if args.compare is not None:
+        comparisons: List[Comparison] = compare(results, load_baseline(args.compare))
+        print()
+        print(report(comparisons, args.threshold))
+        slower: List[Comparison] = regressions(comparisons, args.threshold)
+        if len(slower) > 0:
+            print(f"\n{len(slower)} of {len(comparisons)} cases regressed", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
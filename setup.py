@@ -1,3 +1,8 @@
+import re
+
 from setuptools import setup, find_packages
 
-setup(name="VIAYN", version='0.0.0', packages=find_packages('.'))
\ No newline at end of file
+with open('VIAYN/__init__.py') as f:
+    version = re.search(r'__version__: str = "(.*)"', f.read()).group(1)
+
+setup(name="VIAYN", version=version, packages=find_packages('.'))
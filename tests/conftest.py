@@ -22,9 +22,12 @@ import numpy as np
 # local source
 from VIAYN.project_types import (
     ActionBet, A, WeightedBet, Agent, HistoryItem,
-    VoteBoundGetter, VoteRange,S
+    VoteBoundGetter, VoteRange,S, SystemConfiguration
 )
 import VIAYN.samples.factory as factory
+from VIAYN.sweep import RunSpec
+from VIAYN.train import train
+from VIAYN.validation import validation_level, ValidationLevel
 import VIAYN.samples.vote_ranges as vote_range
 from VIAYN.samples.agents import (
     VotingMechanism,
@@ -32,6 +35,16 @@ from VIAYN.samples.agents import (
     PredictionSelectionMechanism
 )
 
+@pytest.fixture(autouse=True)
+def full_validation():
+    """
+    Tests always run with every check enabled,
+    whatever VIAYN_VALIDATION is set to
+    """
+    with validation_level(ValidationLevel.full):
+        yield
+
+
 @pytest.fixture
 def constant_agent_config():
     """
@@ -154,9 +167,9 @@ def gen_env():
     and creating it in one call instead of needing to create multiple objects 
     every time to create an env
     """
-    def _gen_env_(envType: factory.EnvsEnum):
+    def _gen_env_(envType: factory.EnvsEnum = factory.EnvsEnum.default, n_actions: Optional[int] = None):
         return factory.EnvFactory.create(
-            factory.EnvsFactorySpec(envType)
+            factory.EnvsFactorySpec(envType, n_actions)
         )
     return _gen_env_
 
@@ -233,4 +246,97 @@ def gen_history_item():
         return HistoryItem(selectedA,predictions,t_enacted)
     return _gen_history_item_
 
-    
\ No newline at end of file
+    
+
+@pytest.fixture
+def gen_system_config():
+    """
+    Function to make creating a SystemConfiguration for train() easier,
+    with a binary vote range & seeded policy by default
+    """
+    def _gen_system_config_(
+        voting: factory.VotingConfigEnum = factory.VotingConfigEnum.simple,
+        vr: VoteRange = vote_range.BinaryVoteRange(),
+        policy: factory.PolicyConfigEnum = factory.PolicyConfigEnum.simple,
+        payout: factory.PayoutConfigEnum = factory.PayoutConfigEnum.suggested) -> SystemConfiguration:
+        return SystemConfiguration(
+            factory.VotingConfigFactory.create(factory.VotingConfigFactorySpec(voting, vr)),
+            factory.PolicyConfigFactory.create(factory.PolicyConfigFactorySpec(policy, random_seed=0)),
+            factory.PayoutConfigFactory.create(factory.PayoutConfigFactorySpec(payout)))
+    return _gen_system_config_
+
+@pytest.fixture
+def gen_random_agents():
+    """
+    Function to make creating n seeded random agents easier, whose votes alternate
+    between 0 & 1 & whose vote bounds come from the voting configuration
+    """
+    def _gen_random_agents_(config: SystemConfiguration, n_agents: int, N: int = 1) -> List[Agent]:
+        return [
+            factory.AgentFactory.create(factory.AgentFactorySpec(
+                factory.AgentsEnum.random,
+                vote=float(i % 2),
+                totalVotesBound=(
+                    config.voting_manager.min_possible_vote_total,
+                    config.voting_manager.max_possible_vote_total),
+                seed=i,
+                bet=0.5,
+                N=N))
+            for i in range(n_agents)]
+    return _gen_random_agents_
+
+@pytest.fixture
+def gen_population_spec():
+    """
+    Function to make creating the spec of an AgentPopulation easier
+    """
+    def _gen_population_spec_(population_size: int = 5, N: int = 2, seed: int = 3, bet: float = 0.5):
+        return factory.AgentFactorySpec(
+            factory.AgentsEnum.population,
+            vote=1.,
+            totalVotesBound=(lambda dt: 0., lambda dt: 4. + dt),
+            seed=seed,
+            bet=bet,
+            N=N,
+            population_size=population_size)
+    return _gen_population_spec_
+
+@pytest.fixture
+def gen_run_spec():
+    """
+    Function to make creating a small RunSpec of 3 constant agents easier
+    """
+    def _gen_run_spec_() -> RunSpec:
+        return RunSpec(
+            agents=(
+                factory.AgentFactorySpec(factory.AgentsEnum.constant, vote=1., prediction=[1.], bet=[0.5]),
+                factory.AgentFactorySpec(factory.AgentsEnum.constant, vote=0., prediction=[0.], bet=[0.5]),
+                factory.AgentFactorySpec(factory.AgentsEnum.constant, vote=1., prediction=[2.], bet=[0.5])),
+            voting=factory.VotingConfigFactorySpec(factory.VotingConfigEnum.simple, vote_range.BinaryVoteRange()),
+            policy=factory.PolicyConfigFactorySpec(factory.PolicyConfigEnum.suggested, random_seed=0),
+            payout=factory.PayoutConfigFactorySpec(factory.PayoutConfigEnum.suggested),
+            env=factory.EnvsFactorySpec(factory.EnvsEnum.default, n_actions=2),
+            episode_seeds=(0, 1),
+            tsteps_per_episode=5)
+    return _gen_run_spec_
+
+@pytest.fixture
+def gen_training_run(gen_system_config, gen_random_agents, gen_env):
+    """
+    Function to make running train() on random agents in the default environment easier.
+    Keyword arguments other than the ones below are passed to train()
+    Returns the agents, the environment & the TrainResult
+    """
+    def _gen_training_run_(
+        n_agents: int = 4,
+        N: int = 2,
+        n_actions: int = 2,
+        n_episodes: int = 3,
+        tsteps: int = 5,
+        **train_kwargs):
+        config = gen_system_config()
+        agents = gen_random_agents(config, n_agents, N)
+        env = gen_env(n_actions=n_actions)
+        result = train(agents, env, range(n_episodes), config, tsteps_per_episode=tsteps, **train_kwargs)
+        return agents, env, result
+    return _gen_training_run_
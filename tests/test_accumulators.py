@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests the on-line statistics in accumulators.py
+against the same statistics computed from TrainResult.histories
+"""
+
+# standard library
+
+# 3rd party packages
+import pytest
+import numpy as np
+
+# local source
+from VIAYN.accumulators import (
+    Accumulator, RunningStats, LossAccumulator, PayoutAccumulator,
+    BetVolumeAccumulator, ActionWinRateAccumulator)
+from VIAYN.instrumentation import PhaseTimer
+
+
+run_params = dict(n_agents=5, N=3, n_actions=3, tsteps=8)
+# passed to gen_training_run
+
+
+class WelfareRecorder(Accumulator):
+    def start(self, agents):
+        self.welfare = []
+
+    def update(self, t, welfare_score, payouts, bets, selected_action):
+        if t == 0:
+            self.welfare.append([])
+        self.welfare[-1].append(welfare_score)
+
+
+def test_running_stats():
+    rng = np.random.default_rng(0)
+    values = rng.normal(3., 2., size=(50, 4))
+    stats = RunningStats(5)
+    for row in values:
+        stats.update(np.arange(4), row)
+    stats.update(np.array([0]), np.array([100.]))
+    assert stats.count.tolist() == [51, 50, 50, 50, 0]
+    assert np.allclose(stats.mean[1:4], values[:, 1:].mean(axis=0))
+    assert np.allclose(stats.variance[1:4], values[:, 1:].var(axis=0))
+    assert stats.mean[0] == pytest.approx(np.append(values[:, 0], 100.).mean())
+    assert np.isnan(stats.variance[4])
+
+
+def test_loss_matches_histories(gen_training_run):
+    welfare, loss = WelfareRecorder(), LossAccumulator()
+    agents, _, result = gen_training_run(**run_params, accumulators=[welfare, loss])
+    errors = {agent: [] for agent in agents}
+    for episode, episode_welfare in zip(result.histories, welfare.welfare):
+        for item in episode:
+            for bet in item.predictions[item.selected_action]:
+                for t in range(item.t_enacted + 1, min(item.t_enacted + 1 + len(bet.prediction), len(episode))):
+                    errors[bet.cast_by].append((bet.prediction[t - item.t_enacted - 1] - episode_welfare[t]) ** 2)
+    mean, variance = loss.mean_loss(), loss.loss_variance()
+    for agent in agents:
+        assert len(errors[agent]) > 0
+        assert mean[agent] == pytest.approx(np.mean(errors[agent]))
+        assert variance[agent] == pytest.approx(np.var(errors[agent]))
+
+
+def test_payouts_and_volume_match_balances(gen_training_run):
+    payouts, volume = PayoutAccumulator(), BetVolumeAccumulator()
+    agents, _, result = gen_training_run(**run_params, accumulators=[payouts, volume])
+    expected_volume = {agent: 0. for agent in agents}
+    expected_n_bets = {agent: 0 for agent in agents}
+    for episode in result.histories:
+        for item in episode:
+            for bet in item.predictions[item.selected_action]:
+                expected_volume[bet.cast_by] += bet.money * sum(bet.bet)
+                expected_n_bets[bet.cast_by] += 1
+    for i, agent in enumerate(agents):
+        assert volume.bet_volume()[agent] == pytest.approx(expected_volume[agent])
+        assert volume.n_bets[i] == expected_n_bets[agent]
+        # all agents start with $1, so the money they end with is 1 + payouts - withdrawals
+        assert 1. + payouts.total_payouts()[agent] - volume.bet_volume()[agent] == \
+            pytest.approx(result.balances[agent])
+
+
+def test_win_rate(gen_training_run):
+    win_rate = ActionWinRateAccumulator()
+    _, _, result = gen_training_run(**run_params, accumulators=[win_rate])
+    items = [item for episode in result.histories for item in episode]
+    for action, rate in win_rate.win_rate().items():
+        assert win_rate.offered[action] == len(items)
+        assert rate == pytest.approx(np.mean([item.selected_action == action for item in items]))
+    assert sum(win_rate.win_rate().values()) == pytest.approx(1.)
+
+
+def test_accumulate_phase_only_with_accumulators(gen_training_run):
+    timer = PhaseTimer()
+    gen_training_run(**run_params, accumulators=[], instrumentation=timer)
+    assert not any(name == 'accumulate' for name, _ in timer.totals)
+    gen_training_run(**run_params, accumulators=[PayoutAccumulator()], instrumentation=timer)
+    assert any(name == 'accumulate' for name, _ in timer.totals)
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 
 from VIAYN.samples.factory.agent_factory import AgentFactory, AgentFactorySpec, AgentsEnum
 from VIAYN.samples.factory.env_factory import EnvsEnum, EnvFactory, EnvsFactorySpec
@@ -252,3 +253,83 @@ def test_negative_duration():
     with pytest.raises(Exception):
         AgentFactory.sequentialize(agents, [10, -1])
         # shouldn't be able to have a negative duration
+
+
+def reference_active_indices(switch_at, n_steps):
+    """
+    Replays the original counting logic of MorphicAgent.view, returning the
+    index of the active agent before each view() call
+    """
+    idxs = []
+    t, snapshot, idx = 0, 0, 0
+    for _ in range(n_steps):
+        idxs.append(idx)
+        t += 1
+        if abs(t - snapshot) >= switch_at[idx]:
+            snapshot = t
+            idx = (idx + 1) % len(switch_at)
+    return idxs
+
+
+def constant_agents(n):
+    return [AgentFactory.create(
+        AgentFactorySpec(AgentsEnum.constant, vote=float(i), prediction=[1.], bet=[.1]))
+        for i in range(n)]
+
+
+@pytest.mark.parametrize("switch_at", [
+    [2, 3, 4],
+    [1],
+    [0, 2, 0, 1],
+    [5, 0],
+    [3, 3, 1, 7, 2],
+])
+def test_schedule_matches_counting(switch_at):
+    """
+    The compiled schedule should switch at exactly the same timesteps as
+    the original view-counting implementation, including 0 durations
+    """
+    expected = reference_active_indices(switch_at, 60)
+    agents = constant_agents(len(switch_at))
+    comp_agent = AgentFactory.sequentialize(agents, switch_at)
+    for t in range(60):
+        assert comp_agent.vote(None) == float(expected[t])
+        comp_agent.view(AnonymizedHistoryItem())
+    assert list(comp_agent.schedule.active_indices(np.arange(60))) == expected
+    assert [comp_agent.schedule.active_index(t) for t in range(60)] == expected
+
+
+def test_seek_matches_stepping():
+    """
+    Jumping straight to a timestep should give the same active agents as calling view(),
+    including when some of the agents are themselves sequentialized
+    """
+    def build():
+        leaves = constant_agents(5)
+        inner1 = AgentFactory.sequentialize([leaves[0], leaves[1]], [3, 0])
+        inner2 = AgentFactory.sequentialize([leaves[2], leaves[3]], [1, 2])
+        return AgentFactory.sequentialize([inner1, inner2, leaves[4], inner1], [5, 4, 2, 1])
+
+    stepped = build()
+    expected = []
+    for _ in range(100):
+        expected.append(stepped.vote(None))
+        stepped.view(AnonymizedHistoryItem())
+
+    for t in range(80):
+        seeked = build()
+        seeked.seek(t)
+        for dt in range(20):
+            assert seeked.vote(None) == expected[t + dt]
+            seeked.view(AnonymizedHistoryItem())
+
+
+def test_sequentialize_many_shares_schedule():
+    agent_lists = [constant_agents(3) for _ in range(4)]
+    comp_agents = AgentFactory.sequentialize_many(agent_lists, [2, 1, 3])
+    assert len(comp_agents) == 4
+    assert all(agent.schedule is comp_agents[0].schedule for agent in comp_agents)
+    for t in range(10):
+        for agent in comp_agents:
+            assert agent.vote(None) == float(reference_active_indices([2, 1, 3], 10)[t])
+            agent.view(AnonymizedHistoryItem())
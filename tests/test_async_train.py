@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests train_async in async_train.py against a stub model server
+running on localhost
+"""
+
+# standard library
+import asyncio
+import json
+
+# 3rd party packages
+import pytest
+import numpy as np
+
+# local source
+from VIAYN.async_train import train_async
+from VIAYN.project_types import ActionBet, Agent, AsyncAgent
+from VIAYN.retention import RetentionPolicy, RetentionEnum
+from VIAYN.train import train
+
+
+def behaviour(name, action_idx):
+    """
+    what the agent called name votes, bets & predicts for an action
+    """
+    i = int(name[len('agent'):])
+    return {
+        'vote': float(i % 2),
+        'bet': [0.1 * (1 + (i + action_idx) % 3)],
+        'prediction': [float((i * 7 + action_idx * 3) % 4)]}
+
+
+class ServerStats:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+async def handle(reader, writer, delays, stats):
+    request = json.loads(await reader.readline())
+    stats.in_flight += 1
+    stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+    try:
+        await asyncio.sleep(delays.get(request['agent'], 0.))
+    finally:
+        stats.in_flight -= 1
+    response = behaviour(request['agent'], request.get('action', 0))
+    writer.write((json.dumps(response) + '\n').encode())
+    await writer.drain()
+    writer.close()
+
+
+async def start_server(delays, stats=None):
+    stats = ServerStats() if stats is None else stats
+    return await asyncio.start_server(
+        lambda reader, writer: handle(reader, writer, delays, stats), '127.0.0.1', 0)
+
+
+class RemoteAgent(AsyncAgent):
+    def __init__(self, name, port):
+        self.name = name
+        self.port = port
+
+    async def _request_(self, **request):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        try:
+            writer.write((json.dumps({'agent': self.name, **request}) + '\n').encode())
+            await writer.drain()
+            return json.loads(await reader.readline())
+        finally:
+            writer.close()
+
+    async def vote(self, state):
+        return (await self._request_(method='vote'))['vote']
+
+    async def bet(self, state, action, money):
+        response = await self._request_(method='bet', action=action.idx)
+        return ActionBet(bet=response['bet'], prediction=response['prediction'])
+
+
+class LocalAgent(Agent):
+    def __init__(self, name):
+        self.name = name
+
+    def vote(self, state):
+        return behaviour(self.name, 0)['vote']
+
+    def bet(self, state, action, money):
+        response = behaviour(self.name, action.idx)
+        return ActionBet(bet=response['bet'], prediction=response['prediction'])
+
+
+async def run_remote(config, env, n_agents, delays=None, stats=None, **kwargs):
+    server = await start_server(delays or {}, stats)
+    port = server.sockets[0].getsockname()[1]
+    agents = [RemoteAgent(f'agent{i}', port) for i in range(n_agents)]
+    try:
+        result = await train_async(agents, env, range(2), config, tsteps_per_episode=3, **kwargs)
+    finally:
+        server.close()
+        await server.wait_closed()
+    return agents, result
+
+
+def test_matches_sync_train(gen_system_config, gen_env):
+    agents, result = asyncio.run(run_remote(gen_system_config(), gen_env(n_actions=3), 4))
+    local = [LocalAgent(f'agent{i}') for i in range(4)]
+    expected = train(local, gen_env(n_actions=3), range(2), gen_system_config(), tsteps_per_episode=3)
+    assert len(result.histories) == len(expected.histories)
+    for episode, expected_episode in zip(result.histories, expected.histories):
+        assert [item.selected_action for item in episode] == \
+            [item.selected_action for item in expected_episode]
+        for item, expected_item in zip(episode, expected_episode):
+            for action in item.predictions:
+                assert [b.cast_by.name for b in item.predictions[action]] == \
+                    [b.cast_by.name for b in expected_item.predictions[action]]
+    assert [result.balances[a] for a in agents] == pytest.approx([expected.balances[a] for a in local])
+
+
+def test_mixed_agents(gen_system_config, gen_env):
+    async def run():
+        server = await start_server({})
+        port = server.sockets[0].getsockname()[1]
+        agents = [RemoteAgent('agent0', port), LocalAgent('agent1')]
+        try:
+            return agents, await train_async(
+                agents, gen_env(n_actions=3), range(1), gen_system_config(), tsteps_per_episode=2)
+        finally:
+            server.close()
+            await server.wait_closed()
+    agents, result = asyncio.run(run())
+    casters = {b.cast_by for item in result.histories[0] for bets in item.predictions.values() for b in bets}
+    assert casters == set(agents)
+
+
+def test_agents_are_awaited_concurrently(gen_system_config, gen_env):
+    stats = ServerStats()
+    asyncio.run(run_remote(gen_system_config(), gen_env(n_actions=3), 4,
+        delays={f'agent{i}': 0.01 for i in range(4)}, stats=stats))
+    # awaiting the agents one at a time would never have more than 1 request in flight
+    assert stats.max_in_flight > 1
+    assert stats.in_flight == 0
+
+
+def test_shares_train_options(gen_system_config, gen_env):
+    kwargs = dict(retention=RetentionPolicy(RetentionEnum.summary), record_balances=True, money_epsilon=0.5)
+    agents, result = asyncio.run(run_remote(gen_system_config(), gen_env(n_actions=3), 4, **kwargs))
+    local = [LocalAgent(f'agent{i}') for i in range(4)]
+    expected = train(local, gen_env(n_actions=3), range(2), gen_system_config(), tsteps_per_episode=3, **kwargs)
+    assert result.pruned_episodes == expected.pruned_episodes == 2
+    assert [[s.selected_action for s in episode] for episode in result.summaries] == \
+        [[s.selected_action for s in episode] for episode in expected.summaries]
+    assert np.allclose(result.balance_history, expected.balance_history)
+    assert result.balance_episode_offsets.tolist() == expected.balance_episode_offsets.tolist()
+
+
+def test_timeouts_are_zero_bets(gen_system_config, gen_env):
+    timeouts = {}
+    agents, result = asyncio.run(run_remote(gen_system_config(), gen_env(n_actions=3),
+        3, delays={'agent2': 1.}, timeout=0.1, timeouts=timeouts))
+    slow = agents[2]
+    assert timeouts == {slow: 2 * 3 * (1 + 3)}
+    # every vote & every bet of the slow agent timed out
+    for episode in result.histories:
+        for item in episode:
+            for bets in item.predictions.values():
+                assert [b.cast_by for b in bets] == agents[:2]
+    assert result.balances[slow] == 1.
+    assert sum(result.balances.values()) == pytest.approx(3.)
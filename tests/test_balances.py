@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests recording balances while training, see balances.py
+"""
+
+# standard library
+
+# 3rd party packages
+import pytest
+import numpy as np
+
+# local source
+from VIAYN.balances import BalanceRecorder
+from VIAYN.retention import RetentionPolicy, RetentionEnum
+from VIAYN.storage import save_result, load_result
+
+
+run_params = dict(tsteps=6, record_balances=True)
+# passed to gen_training_run
+
+
+def test_recorder_grows():
+    agents = ['a', 'b']
+    recorder = BalanceRecorder(agents, capacity=1)
+    for i in range(5):
+        recorder.record({'a': float(i), 'b': -float(i)})
+        if i == 2:
+            recorder.end_episode()
+    recorder.end_episode()
+    history, offsets = recorder.result()
+    assert history.shape == (5, 2)
+    assert history[:, 0].tolist() == [0., 1., 2., 3., 4.]
+    assert history[:, 1].tolist() == [-0., -1., -2., -3., -4.]
+    assert offsets.tolist() == [0, 3, 5]
+
+
+def test_not_recorded_by_default(gen_training_run):
+    _, _, result = gen_training_run(tsteps=6)
+    assert result.balance_history is None
+    with pytest.raises(AssertionError):
+        result.balance_trajectory(next(iter(result.balances)))
+
+
+def test_balances_match_summaries(gen_training_run):
+    agents, _, result = gen_training_run(**run_params, retention=RetentionPolicy(RetentionEnum.summary))
+    expected = np.array([s.balances for episode in result.summaries for s in episode])
+    assert result.balance_history.shape == (3 * 6 + 1, len(agents))
+    assert np.array_equal(result.balance_history[:-1], expected)
+    assert result.balance_episode_offsets.tolist() == [0, 6, 12, 18]
+    for i, agent in enumerate(agents):
+        assert np.array_equal(
+            result.balance_trajectory(agent, 1),
+            [s.balances[i] for s in result.summaries[1]])
+
+
+def test_last_row_is_final_balances(gen_training_run):
+    agents, _, result = gen_training_run(**run_params)
+    assert result.balance_history[-1].tolist() == [result.balances[agent] for agent in agents]
+    assert result.balance_episode_offsets[-1] == len(result.balance_history) - 1
+    # the closing row isn't part of any episode
+    assert result.balance_trajectory(agents[0])[-1] == result.balances[agents[0]]
+
+
+def test_money_at_bet_time(gen_training_run):
+    agents, _, result = gen_training_run(**run_params)
+    # bets are placed before withdrawals, so the money of a bet at timestep t > 0
+    # is the balance after timestep t - 1 plus any payouts at t
+    for episode_num in range(3):
+        trajectory = result.balance_trajectory(agents[0], episode_num)
+        item = result.history_item_for(episode_num, 0)
+        bet = next(b for b in item.predictions[item.selected_action] if b.cast_by == agents[0])
+        assert trajectory[0] == pytest.approx(bet.money * (1 - sum(bet.bet)))
+    assert result.balance_trajectory(agents[0], 2)[-1] <= result.balances[agents[0]] + 1e-12
+
+
+def test_storage_round_trip(tmp_path, gen_training_run):
+    agents, env, result = gen_training_run(**run_params)
+    save_result(result, str(tmp_path), agents=agents[::-1])
+    stored = load_result(str(tmp_path))
+    assert np.array_equal(stored.arrays['balance_history'], result.balance_history[:, ::-1])
+    rebuilt = stored.to_train_result(agents[::-1], env.actions())
+    for agent in agents:
+        assert np.array_equal(rebuilt.balance_trajectory(agent), result.balance_trajectory(agent))
+    assert np.array_equal(rebuilt.balance_episode_offsets, result.balance_episode_offsets)
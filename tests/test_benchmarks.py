@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+This file checks that the benchmark cases run & that
+regressions against a baseline are reported
+"""
+
+# standard library
+import json
+import os
+
+# 3rd party packages
+import pytest
+
+# local source
+from benchmarks.cases import all_cases, GRID, QUICK_GRID
+from benchmarks.run import compare, regressions, save_baseline, load_baseline, main
+
+
+@pytest.mark.parametrize("case", all_cases(QUICK_GRID), ids=lambda case: case.case_id)
+def test_benchmark_case_runs(case):
+    case.setup()()
+
+
+def test_regressions():
+    comparisons = compare({'a': 1.0, 'b': 2.5, 'c': 1.0}, {'a': 1.0, 'b': 2.0, 'd': 1.0})
+    assert sorted(c.case_id for c in comparisons) == ['a', 'b']
+    assert [c.case_id for c in regressions(comparisons, 1.1)] == ['b']
+    assert regressions(comparisons, 1.5) == []
+
+
+def test_baseline_round_trip(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    save_baseline(path, {'a': 1e-3})
+    assert load_baseline(path) == {'a': 1e-3}
+    with open(path) as f:
+        assert 'machine' in json.load(f)
+    assert main(['--quick', '--filter', 'weighted_quartile', '--repeat', '1',
+        '--min-time', '0', '--save', path]) == 0
+    assert main(['--quick', '--filter', 'weighted_quartile', '--repeat', '1',
+        '--min-time', '0', '--compare', path, '--threshold', '1e9']) == 0
+    with open(path) as f:
+        assert json.load(f)['grid'] == {key: list(values) for key, values in QUICK_GRID.items()}
+
+
+def test_stored_baseline_covers_every_case():
+    path = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'baseline.json')
+    with open(path) as f:
+        stored = json.load(f)
+    assert stored['grid'] == {key: list(values) for key, values in GRID.items()}
+    assert {case.case_id for case in all_cases(GRID)} <= set(stored['results'])
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests the on-disk TrainResult cache in cache.py
+"""
+
+# standard library
+import os
+import time
+
+# 3rd party packages
+
+# local source
+import VIAYN.cache
+import VIAYN.samples.factory as fac
+from VIAYN.cache import ResultCache
+from VIAYN.sweep import with_value
+
+
+def test_cache_hit_matches_run(tmp_path, gen_run_spec):
+    cache = ResultCache(str(tmp_path / "cache"))
+    spec = gen_run_spec()
+    agents, result = cache.get_or_run(spec)
+    cached_agents, cached = cache.get_or_run(spec)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert [cached.balances[a] for a in cached_agents] == [result.balances[a] for a in agents]
+    assert len(cached.histories) == len(result.histories)
+    for episode, expected in zip(cached.histories, result.histories):
+        assert [item.selected_action for item in episode] == [item.selected_action for item in expected]
+        assert [item.t_enacted for item in episode] == [item.t_enacted for item in expected]
+
+    cache.get_or_run(with_value(spec, 'tsteps_per_episode', 3))
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert len(cache.entries()) == 2
+
+
+def test_unhashable_specs_are_not_cached(tmp_path, gen_run_spec):
+    cache = ResultCache(str(tmp_path / "cache"))
+    spec = with_value(gen_run_spec(), 'agents', (fac.AgentFactorySpec(
+        fac.AgentsEnum.random, vote=1., seed=0, bet=0.5, N=1,
+        totalVotesBound=(lambda _: 0., lambda _: 1.)),))
+    cache.get_or_run(spec)
+    cache.get_or_run(spec)
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert cache.entries() == []
+
+
+def test_lru_eviction(tmp_path, gen_run_spec):
+    cache = ResultCache(str(tmp_path / "cache"))
+    specs = [with_value(gen_run_spec(), 'policy.random_seed', seed) for seed in range(3)]
+    cache.get_or_run(specs[0])
+    entry_size = cache.size()
+    cache.max_bytes = int(2.5 * entry_size)
+    past = time.time() - 100
+    os.utime(os.path.join(cache.cache_dir, cache.key(specs[0])), (past, past))
+    cache.get_or_run(specs[1])
+    os.utime(os.path.join(cache.cache_dir, cache.key(specs[1])), (past - 10, past - 10))
+    cache.get_or_run(specs[0])
+    # a hit makes specs[0] the most recently used
+    cache.get_or_run(specs[2])
+    keys = {key for key, _, _ in cache.entries()}
+    assert keys == {cache.key(specs[0]), cache.key(specs[2])}
+    assert cache.size() <= cache.max_bytes
+    cache.clear()
+    assert cache.entries() == []
+
+
+def test_key_includes_versions(tmp_path, gen_run_spec, monkeypatch):
+    cache = ResultCache(str(tmp_path / "cache"))
+    spec = gen_run_spec()
+    assert cache.key(spec) != spec.key()
+    cache.get_or_run(spec)
+    monkeypatch.setattr(VIAYN.cache, 'CACHE_FORMAT_VERSION', VIAYN.cache.CACHE_FORMAT_VERSION + 1)
+    cache.get_or_run(spec)
+    monkeypatch.setattr(VIAYN.cache, '__version__', 'other')
+    cache.get_or_run(spec)
+    # entries written by another version of the cache or package aren't used
+    assert (cache.hits, cache.misses) == (0, 3)
+    assert len(cache.entries()) == 3
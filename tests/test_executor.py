@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests that train() gives the same results when agents
+are evaluated on an executor
+"""
+
+# standard library
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 3rd party packages
+
+# local source
+import VIAYN.samples.factory as fac
+from VIAYN.project_types import ActionBet, Agent
+from VIAYN.samples.agents import MorphicAgent
+from VIAYN.train import train, get_agent_bets, get_agent_votes, _executor_groups_
+
+
+def test_same_result_with_thread_pool(gen_system_config, gen_random_agents, gen_population_spec, gen_env):
+    def run(executor=None):
+        config = gen_system_config()
+        population = fac.AgentFactory.create_population(gen_population_spec(population_size=6))
+        agents = gen_random_agents(config, 5, N=2) + population.members
+        return agents, train(agents, gen_env(n_actions=3), range(3), config,
+            tsteps_per_episode=6, executor=executor)
+
+    agents, expected = run()
+    with ThreadPoolExecutor(4) as executor:
+        threaded_agents, result = run(executor)
+    assert [result.balances[a] for a in threaded_agents] == [expected.balances[a] for a in agents]
+    for episode, expected_episode in zip(result.histories, expected.histories):
+        for item, expected_item in zip(episode, expected_episode):
+            assert item.selected_action == expected_item.selected_action
+            for action, bets in item.predictions.items():
+                expected_bets = expected_item.predictions[action]
+                assert [threaded_agents.index(b.cast_by) for b in bets] == \
+                    [agents.index(b.cast_by) for b in expected_bets]
+                assert [list(b.prediction) for b in bets] == [list(b.prediction) for b in expected_bets]
+
+
+class ThreadRecordingAgent(Agent):
+    def __init__(self, vote):
+        self.vote_value = vote
+        self.threads = set()
+
+    def vote(self, state):
+        self.threads.add(threading.get_ident())
+        return self.vote_value
+
+    def bet(self, state, action, money):
+        self.threads.add(threading.get_ident())
+        return ActionBet(bet=[0.1], prediction=[float(action.idx)])
+
+
+def test_agents_run_on_executor(gen_system_config, gen_env):
+    config = gen_system_config()
+    agents = [ThreadRecordingAgent(float(i % 2)) for i in range(4)]
+    config.voting_manager.set_n_agents(len(agents))
+    env = gen_env(n_actions=2)
+    balances = {agent: 1. for agent in agents}
+    with ThreadPoolExecutor(2) as executor:
+        assert get_agent_votes(agents, env.state(), config, executor) == \
+            get_agent_votes(agents, env.state(), config)
+        for agent in agents:
+            agent.threads.clear()
+        bets = get_agent_bets(agents, balances, env.state(), env.actions(), executor)
+    assert all(threading.get_ident() not in agent.threads for agent in agents)
+    for action, action_bets in bets.items():
+        assert [b.cast_by for b in action_bets] == agents
+        assert all(b.prediction == [float(action.idx)] for b in action_bets)
+
+
+def test_population_members_share_a_group(gen_system_config, gen_random_agents, gen_population_spec):
+    population = fac.AgentFactory.create_population(gen_population_spec(population_size=3))
+    assert {member.executor_group() for member in population} == {population}
+    agent = gen_random_agents(gen_system_config(), 1)[0]
+    assert agent.executor_group() is agent
+
+
+def test_morphic_agents_share_their_sub_agents_group(gen_system_config, gen_random_agents, gen_population_spec):
+    a, b, c, d = gen_random_agents(gen_system_config(), 4)
+    first = MorphicAgent([a, b], [2, 2])
+    second = MorphicAgent([b, c], [1, 3])
+    assert first.executor_group() == frozenset([a, b])
+    assert _executor_groups_([first, d, second, c]) == [[first, second, c], [d]]
+    # b is shared, so both MorphicAgents (& c) have to run in the same task
+    population = fac.AgentFactory.create_population(gen_population_spec(population_size=2))
+    morphic_member = MorphicAgent([population.members[0], population.members[0]], [1, 1])
+    assert morphic_member.executor_group() is population
+    assert _executor_groups_([population.members[1], d, morphic_member]) == \
+        [[population.members[1], morphic_member], [d]]
+
+
+def test_shared_sub_agents_with_thread_pool(gen_system_config, gen_random_agents, gen_population_spec, gen_env):
+    def run(executor=None):
+        config = gen_system_config()
+        sub_agents = gen_random_agents(config, 3, N=2)
+        population = fac.AgentFactory.create_population(gen_population_spec(population_size=4))
+        agents = [
+            MorphicAgent([sub_agents[0], sub_agents[1]], [2, 3]),
+            MorphicAgent([sub_agents[1], sub_agents[2]], [1, 1]),
+            MorphicAgent([population.members[0], sub_agents[2]], [3, 1]),
+        ] + population.members[1:]
+        return agents, train(agents, gen_env(n_actions=3), range(3), config,
+            tsteps_per_episode=6, executor=executor)
+
+    agents, expected = run()
+    with ThreadPoolExecutor(4) as executor:
+        threaded_agents, result = run(executor)
+    assert [result.balances[a] for a in threaded_agents] == [expected.balances[a] for a in agents]
+    for episode, expected_episode in zip(result.histories, expected.histories):
+        for item, expected_item in zip(episode, expected_episode):
+            for action, bets in item.predictions.items():
+                assert [list(b.prediction) for b in bets] == \
+                    [list(b.prediction) for b in expected_item.predictions[action]]
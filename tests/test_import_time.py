@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+This file checks that importing VIAYN stays cheap: heavy dependencies
+are only imported when they are used, and VIAYN's own modules
+stay within an import-time budget
+"""
+
+# standard library
+import subprocess
+import sys
+from typing import Dict
+
+# 3rd party packages
+import pytest
+
+
+IMPORT_BUDGET_US: int = 50_000
+# budget for the self time of all VIAYN modules, excluding their dependencies
+# measured at 20-30ms for VIAYN.train, the factories & the reporter, so about 2x
+
+FACTORY_SUBMODULES = (
+    'VIAYN.samples.factory.agent_factory', 'VIAYN.samples.factory.env_factory',
+    'VIAYN.samples.factory.payout_config_factory', 'VIAYN.samples.factory.policy_config_factory',
+    'VIAYN.samples.factory.voting_config_factory', 'VIAYN.samples.agents')
+# only imported when a factory is used
+
+HEAVY_MODULES = ('pandas', 'matplotlib', 'scipy')
+
+
+def import_times(statement: str) -> Dict[str, int]:
+    """
+    Runs statement in a fresh interpreter with -X importtime
+
+    Returns
+    -------
+    times: Dict[str, int]
+        the self time in microseconds of each module imported
+    """
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True, text=True, check=True).stderr
+    times: Dict[str, int] = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, module = line[len('import time:'):].split('|')
+        times[module.strip()] = int(self_us)
+    return times
+
+
+@pytest.mark.parametrize("statement", [
+    "import VIAYN.train",
+    "import VIAYN.samples.factory as fac; fac.AgentFactory; fac.PolicyConfigFactory",
+    "import VIAYN.logging.reporter",
+])
+def test_no_heavy_imports(statement):
+    times = import_times(statement)
+    heavy = [m for m in times if m.split('.')[0] in HEAVY_MODULES]
+    assert heavy == []
+
+
+def test_import_time_budget():
+    times = import_times(
+        "import VIAYN.train, VIAYN.samples.factory as fac, VIAYN.logging.reporter; "
+        "fac.AgentFactory, fac.EnvFactory, fac.PayoutConfigFactory, "
+        "fac.PolicyConfigFactory, fac.VotingConfigFactory")
+    viayn_us = sum(us for module, us in times.items() if module.split('.')[0] == 'VIAYN')
+    assert viayn_us < IMPORT_BUDGET_US
+
+
+@pytest.mark.parametrize("statement", [
+    "import VIAYN",
+    "import VIAYN.train",
+    "import VIAYN.logging.reporter",
+    "import VIAYN.samples.factory",
+])
+def test_factory_is_imported_lazily(statement):
+    times = import_times(statement)
+    assert [m for m in FACTORY_SUBMODULES if m in times] == []
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests the per-phase timing of train() in instrumentation.py
+"""
+
+# standard library
+import json
+
+# 3rd party packages
+import pytest
+
+# local source
+import VIAYN.samples.factory as fac
+from VIAYN.instrumentation import Instrumentation, PhaseTimer
+from VIAYN.train import train, train_vectorized
+
+
+def test_default_instrumentation_records_nothing():
+    instrumentation = Instrumentation()
+    with instrumentation.phase('vote', 'component'):
+        pass
+    with instrumentation.phase('vote'):
+        with instrumentation.phase('bet'):
+            pass
+
+
+def test_phase_timer_counts_every_phase(tmp_path, gen_system_config, gen_random_agents, gen_env):
+    config = gen_system_config()
+    agents = gen_random_agents(config, 4, N=2)
+    env = gen_env(n_actions=2)
+    timer = PhaseTimer()
+    train(agents, env, range(2), config, tsteps_per_episode=5, instrumentation=timer)
+
+    calls = {}
+    for (name, component), count in timer.counts.items():
+        calls[name] = calls.get(name, 0) + count
+    for name in ('vote', 'payout', 'bet', 'validate', 'select_action', 'withdraw', 'env.step', 'agent.view'):
+        assert calls[name] == 10
+    assert calls['final_payout'] == 2
+    assert ('vote', type(config.voting_manager).__name__) in timer.counts
+    assert ('select_action', type(config.policy_manager).__name__) in timer.counts
+    assert ('bet', None) in timer.counts
+    assert all(seconds >= 0 for seconds in timer.totals.values())
+
+    table = timer.summary()
+    assert len(table.splitlines()) == len(timer.totals) + 1
+    assert 'select_action' in table
+
+    path = str(tmp_path / "trace.json")
+    timer.save_chrome_trace(path)
+    with open(path) as f:
+        trace = json.load(f)
+    assert len(trace['traceEvents']) == sum(timer.counts.values())
+    assert all(event['ph'] == 'X' and event['dur'] >= 0 for event in trace['traceEvents'])
+
+
+def test_phase_timer_without_timeline():
+    timer = PhaseTimer(record_timeline=False)
+    with timer.phase('vote'):
+        pass
+    assert timer.counts == {('vote', None): 1}
+    assert timer.chrome_trace()['traceEvents'] == []
+
+
+def test_phase_timer_records_failed_phase():
+    timer = PhaseTimer()
+    with pytest.raises(ValueError):
+        with timer.phase('bet'):
+            raise ValueError()
+    assert timer.counts[('bet', None)] == 1
+
+
+def test_phase_timer_vectorized(gen_system_config, gen_random_agents):
+    n_envs = 2
+    configs = [gen_system_config() for _ in range(n_envs)]
+    agents = [gen_random_agents(config, 3) for config in configs]
+    env = fac.EnvFactory.create_vector(fac.EnvsFactorySpec(fac.EnvsEnum.default, n_actions=2), n_envs)
+    timer = PhaseTimer()
+    train_vectorized(agents, env, [[0, 1]], configs, tsteps_per_episode=4, instrumentation=timer)
+    assert sum(count for (name, _), count in timer.counts.items() if name == 'vote') == 8
+    assert timer.counts[('env.step', type(env).__name__)] == 4
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests the memory accounting & memory budget in memory.py
+"""
+
+# standard library
+import sys
+
+# 3rd party packages
+import pytest
+
+# local source
+import VIAYN.samples.factory as fac
+from VIAYN.memory import (
+    MemoryTracker, bet_nbytes, history_item_nbytes, load_spilled_episode)
+from VIAYN.samples.env import StaticEnvironment
+from VIAYN.train import train
+
+
+def test_bet_nbytes_counts_shared_objects_once(gen_weighted_bet):
+    bet = gen_weighted_bet([0.25, 0.25], [1., 2.])
+    nbytes = bet_nbytes(bet)
+    assert nbytes >= sys.getsizeof(bet) + sys.getsizeof(bet.bet) + sys.getsizeof(bet.prediction)
+    seen = set()
+    bet_nbytes(bet, seen)
+    assert bet_nbytes(bet, seen) == 0
+
+
+def test_memory_report(gen_training_run):
+    _, _, result = gen_training_run(n_episodes=4)
+    report = result.memory_report()
+    assert len(report.episode_bytes) == 4
+    assert report.episode_items == [5] * 4
+    assert report.episode_bets == [5 * 4 * 2] * 4
+    assert 0 < report.bet_bytes < sum(report.episode_bytes)
+    assert report.bytes_per_bet == report.bet_bytes / sum(report.episode_bets)
+    assert report.total_bytes == sum(report.episode_bytes) + report.balances_bytes
+    assert "bets: 160" in report.summary()
+
+
+def test_memory_report_counts_shared_bets_once(gen_system_config, gen_population_spec, gen_env):
+    config = gen_system_config()
+    population = fac.AgentFactory.create_population(gen_population_spec(population_size=50))
+    env = gen_env(n_actions=2)
+    result = train(population.members, env, range(1), config, tsteps_per_episode=5)
+    report = result.memory_report()
+    assert 0 < report.bet_bytes < sum(report.episode_bytes)
+
+
+def test_tracker_without_budget_matches_report(gen_training_run):
+    tracker = MemoryTracker()
+    _, _, result = gen_training_run(n_episodes=4, memory_tracker=tracker)
+    assert result.pruned_episodes == 0
+    assert len(result.histories) == 4
+    items = [history_item_nbytes(item) for item in result.histories[0]]
+    assert tracker.episode_bytes[0] == sum(items)
+    assert tracker.retained_bytes == sum(
+        history_item_nbytes(item) for episode in result.histories for item in episode)
+
+
+@pytest.mark.parametrize("spill", [False, True])
+def test_tracker_prunes_old_episodes(spill, tmp_path, gen_training_run):
+    _, _, full = gen_training_run(n_episodes=6)
+    episode_bytes = sum(history_item_nbytes(item) for item in full.histories[0])
+    spill_dir = str(tmp_path / "spill") if spill else None
+    tracker = MemoryTracker(max_bytes=int(2.5 * episode_bytes), spill_dir=spill_dir)
+    _, _, result = gen_training_run(n_episodes=6, memory_tracker=tracker)
+
+    assert tracker.retained_bytes <= tracker.max_bytes
+    assert result.pruned_episodes == tracker.pruned_episodes > 0
+    assert result.pruned_episodes + len(result.histories) == 6
+    last = result.history_item_for(5, 0)
+    assert last.selected_action == full.history_item_for(5, 0).selected_action
+    with pytest.raises(AssertionError):
+        result.history_item_for(0, 0)
+    assert sum(result.balances.values()) == pytest.approx(4.)
+    if spill:
+        spilled = load_spilled_episode(spill_dir, 0)
+        assert [item.selected_action for item in spilled] == \
+            [item.selected_action for item in full.histories[0]]
+
+
+class SeedLengthEnvironment(StaticEnvironment):
+    """
+    StaticEnvironment whose episodes last as many timesteps as their seed
+    """
+
+    def step(self, action):
+        self.remaining -= 1
+
+    def done(self):
+        return self.remaining <= 0
+
+    def seed(self, random_seed=None):
+        self.remaining = random_seed
+
+
+def test_spilled_episodes_are_named_by_seed_index(tmp_path, gen_system_config, gen_random_agents):
+    seeds = [3, 0, 3, 3, 3, 3]
+    # the second episode is empty, so it isn't kept in the history
+
+    def run(memory_tracker=None):
+        config = gen_system_config()
+        return train(gen_random_agents(config, 4, N=2), SeedLengthEnvironment(2), seeds, config,
+            memory_tracker=memory_tracker)
+
+    full = run()
+    episode_bytes = sum(history_item_nbytes(item) for item in full.histories[0])
+    spill_dir = str(tmp_path / "spill")
+    tracker = MemoryTracker(max_bytes=int(2.5 * episode_bytes), spill_dir=spill_dir)
+    result = run(tracker)
+    assert result.pruned_episodes == 3
+    for episode, seed_idx in zip(full.histories, [0, 2, 3]):
+        assert [item.selected_action for item in load_spilled_episode(spill_dir, seed_idx)] == \
+            [item.selected_action for item in episode]
+
+    reused = run(tracker)
+    # the tracker starts over for every run
+    assert reused.pruned_episodes == tracker.pruned_episodes == result.pruned_episodes
+    assert tracker.episode_nums == [4]
+
+
+def test_tracker_prunes_before_budget_is_exceeded(gen_training_run):
+    class PeakTracker(MemoryTracker):
+        peak_bytes = 0
+
+        def record_item(self, item):
+            super().record_item(item)
+            self.peak_bytes = max(self.peak_bytes, self.retained_bytes)
+
+    _, _, full = gen_training_run(n_episodes=6)
+    episode_bytes = sum(history_item_nbytes(item) for item in full.histories[0])
+    tracker = PeakTracker(max_bytes=int(2.5 * episode_bytes))
+    _, _, result = gen_training_run(n_episodes=6, memory_tracker=tracker)
+    assert result.pruned_episodes > 0
+    assert tracker.peak_bytes <= tracker.max_bytes
+
+
+def test_tracker_warns_when_current_episode_is_too_large(gen_training_run):
+    with pytest.warns(UserWarning):
+        gen_training_run(n_episodes=1, memory_tracker=MemoryTracker(max_bytes=1))
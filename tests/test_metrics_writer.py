@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests the buffered metrics writer in logging/metrics.py
+"""
+
+# standard library
+import os
+
+# 3rd party packages
+import pytest
+
+# local source
+from VIAYN.logging.metrics import MetricsWriter, read_metrics, read_wide_csv, write_wide_csv, convert_wide_csv
+
+
+def test_write_and_read(tmp_path):
+    path = str(tmp_path / "metrics.csv")
+    with MetricsWriter(path) as writer:
+        writer.write_vector('a', [1., 2., 3.])
+        writer.write_vector('b', [4, 5])
+        writer.write_row({'a': 4., 'c': 'x'})
+        writer.write_value('b', 6)
+    assert writer.closed
+    assert read_metrics(path) == {
+        'a': ['1.0', '2.0', '3.0', '4.0'],
+        'b': ['4', '5', '6'],
+        'c': ['x']}
+
+
+def test_buffering(tmp_path):
+    path = str(tmp_path / "metrics.csv")
+    writer = MetricsWriter(path, max_buffered_rows=3, flush_interval=1e9)
+    writer.write_vector('a', [1, 2])
+    assert read_metrics(path) == {}
+    writer.write_value('a', 3)
+    assert read_metrics(path) == {'a': ['1', '2', '3']}
+    writer.write_value('a', 4)
+    assert read_metrics(path) == {'a': ['1', '2', '3']}
+    writer.flush()
+    assert read_metrics(path) == {'a': ['1', '2', '3', '4']}
+    writer.close()
+    writer.close()
+    with pytest.raises(AssertionError):
+        writer.write_value('a', 5)
+
+
+def test_flush_interval(tmp_path):
+    path = str(tmp_path / "metrics.csv")
+    with MetricsWriter(path, flush_interval=0.) as writer:
+        writer.write_value('a', 1)
+        assert read_metrics(path) == {'a': ['1']}
+
+
+def test_appends_to_existing_file(tmp_path):
+    path = str(tmp_path / "metrics.csv")
+    with MetricsWriter(path) as writer:
+        writer.write_vector('a', [1, 2])
+    size = os.path.getsize(path)
+    with MetricsWriter(path) as writer:
+        writer.write_vector('b', [3])
+    assert os.path.getsize(path) > size
+    assert read_metrics(path) == {'a': ['1', '2'], 'b': ['3']}
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.csv"
+    path.write_text("x,y\n1,2\n")
+    with pytest.raises(ValueError, match="convert_wide_csv"):
+        MetricsWriter(str(path))
+
+
+def test_wide_csv_round_trip(tmp_path):
+    wide_path = str(tmp_path / "wide.csv")
+    path = str(tmp_path / "converted.metrics.csv")
+    write_wide_csv(wide_path, {'a': [1, 2, 3], 'b': ['x']})
+    with open(wide_path) as f:
+        assert f.read().splitlines() == ['a,b', '1,x', '2,', '3,']
+    convert_wide_csv(wide_path, path)
+    assert read_metrics(path) == {'a': ['1', '2', '3'], 'b': ['x']}
+    assert read_wide_csv(wide_path) == read_metrics(path)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests population agents, which represent many
+identical random agents as a single object
+"""
+
+# 3rd party packages
+import pytest
+import numpy as np
+from numpy.random import default_rng
+
+# local source
+import VIAYN.samples.factory as fac
+import VIAYN.samples.vote_ranges as vote_range
+from VIAYN.project_types import SystemConfiguration
+from VIAYN.samples.env import IntAction
+from VIAYN.train import train
+from tests.conftest import floatIsEqual, sequenceEqual
+
+
+def test_population_spec_checks(gen_population_spec):
+    with pytest.raises(Exception):
+        gen_population_spec(population_size=0)
+    with pytest.raises(AssertionError):
+        fac.AgentFactory.create(gen_population_spec())
+
+
+def test_population_members(gen_population_spec):
+    population = fac.AgentFactory.create_population(gen_population_spec())
+    assert len(population) == 5
+    assert len(set(population.members)) == 5
+    for member in population:
+        assert floatIsEqual(member.vote(IntAction(0)), 1.)
+        bet = member.bet(IntAction(0), IntAction(0), 1.)
+        assert sequenceEqual(bet.bet, [0.25, 0.25])
+        assert len(bet.prediction) == 2
+        assert 0. <= bet.prediction[0] <= 4.
+        assert 0. <= bet.prediction[1] <= 5.
+
+
+def test_population_draws_once_per_action(gen_population_spec):
+    """
+    All members' predictions on an action come from one draw of the shared
+    generator, and a new draw happens once a member predicts again
+    """
+    population = fac.AgentFactory.create_population(gen_population_spec(population_size=4, seed=7))
+    rng = default_rng(7)
+    low, high = np.array([0., 0.]), np.array([4., 5.])
+    for _ in range(3):
+        for action in [IntAction(0), IntAction(1)]:
+            expected = rng.uniform(low=low, high=high, size=(4, 2))
+            for member in population:
+                prediction = member.bet(None, action, 1.).prediction
+                assert sequenceEqual(prediction, expected[member.idx])
+
+
+def test_population_in_train(gen_population_spec):
+    config = SystemConfiguration(
+        fac.VotingConfigFactory.create(
+            fac.VotingConfigFactorySpec(fac.VotingConfigEnum.simple, vote_range.UnboundedVoteRange())),
+        fac.PolicyConfigFactory.create(fac.PolicyConfigFactorySpec(fac.PolicyConfigEnum.simple)),
+        fac.PayoutConfigFactory.create(fac.PayoutConfigFactorySpec(fac.PayoutConfigEnum.suggested)))
+    population = fac.AgentFactory.create_population(gen_population_spec(population_size=50, N=1))
+    env = fac.EnvFactory.create(fac.EnvsFactorySpec(fac.EnvsEnum.default, n_actions=3))
+    result = train(population.members, env, range(2), config, tsteps_per_episode=5)
+    assert set(result.balances.keys()) == set(population.members)
+    assert abs(sum(result.balances.values()) - 50.) < 1e-6
+    for item in result.histories[0]:
+        assert len(item.predictions[item.selected_action]) == 50
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests the compact (slotted) representations of
+bets & history items in project_types
+"""
+
+# standard library
+import copy
+import dataclasses
+import pickle
+
+# 3rd party packages
+import pytest
+
+# local source
+from VIAYN.project_types import ActionBet, WeightedBet, HistoryItem
+from VIAYN.samples.env import IntAction
+
+
+def test_no_instance_dict(gen_weighted_bet, gen_history_item):
+    for item in [ActionBet([0.5], [1.]), gen_weighted_bet([0.5], [1.]), gen_history_item(IntAction(0))]:
+        assert not hasattr(item, '__dict__')
+
+
+def test_still_frozen(gen_weighted_bet):
+    bet = gen_weighted_bet([0.5], [1.])
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        bet.money = 5.
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        bet.bet = [0.1]
+
+
+def test_pickle_and_copy(gen_weighted_bet, gen_history_item):
+    bet = gen_weighted_bet((0.2, 0.3), (1., 2.), action=IntAction(1), money=0.5)
+    item = gen_history_item(IntAction(1), {IntAction(1): [bet]}, t_enacted=3)
+    for restored in [pickle.loads(pickle.dumps(item)), copy.deepcopy(item), copy.copy(item)]:
+        assert restored == item
+        assert restored.predictions[IntAction(1)][0] == bet
+    assert pickle.loads(pickle.dumps(ActionBet([0.1], [2.]))) == ActionBet([0.1], [2.])
+
+
+def test_trusted_skips_checks():
+    with pytest.raises(AssertionError):
+        ActionBet([0.8, 0.8], [1., 1.])
+    with pytest.raises(AssertionError):
+        WeightedBet([0.5], [1., 1.], None, 1., None)
+    trusted = ActionBet.trusted([0.8, 0.8], [1., 1.])
+    assert list(trusted.bet) == [0.8, 0.8]
+    weighted = WeightedBet.trusted([0.5], [1., 1.], IntAction(0), 2., None)
+    assert weighted.weight() == [1.]
+    assert weighted.action == IntAction(0)
+    assert WeightedBet.trusted((0.5,), (1.,), IntAction(0), 2., None) == \
+        WeightedBet((0.5,), (1.,), IntAction(0), 2., None)
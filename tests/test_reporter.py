@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests that Reporter writes each log file in the background
+without touching other log files
+"""
+
+# standard library
+import logging
+
+# 3rd party packages
+import pytest
+import pandas as pd
+
+# local source
+from VIAYN.logging.reporter import Reporter
+
+
+def test_reporters_write_to_their_own_files(tmp_path):
+    path_a, path_b = str(tmp_path / "a.log"), str(tmp_path / "b.log")
+    root_handlers = list(logging.getLogger().handlers)
+    a = Reporter(path_a)
+    b = Reporter(path_b)
+    a2 = Reporter(path_a)
+    a.info("message for a")
+    b.error("message for b")
+    a2.debug("second message for a")
+    assert logging.getLogger().handlers == root_handlers
+    # the root logger is left alone
+
+    a.shutdown()
+    b.shutdown()
+    a2.shutdown()
+    with open(path_a) as f:
+        log_a = f.read()
+    with open(path_b) as f:
+        log_b = f.read()
+    assert "message for a" in log_a and "second message for a" in log_a
+    assert "message for b" not in log_a
+    assert "message for b" in log_b and "ERROR" in log_b
+    assert "message for a" not in log_b
+    assert log_a.count("TESTING STARTED") == 1
+    assert log_a.count("LOGGER SHUTDOWN") == 2
+
+
+def test_reporter_file_stays_open_until_last_shutdown(tmp_path):
+    path = str(tmp_path / "a.log")
+    a = Reporter(path)
+    b = Reporter(path)
+    a.shutdown()
+    b.info("still logging")
+    b.shutdown()
+    with open(path) as f:
+        assert "still logging" in f.read()
+
+
+def test_report_vector_writes_wide_csv(tmp_path):
+    file = str(tmp_path / "vectors")
+    reporter = Reporter(str(tmp_path / "vectors.log"))
+    reporter.report_vector([1., 2., 3.], file, 'a')
+    reporter.report_vector([4., 5.], file, 'b')
+    assert list(Reporter.read_vectors(file)['a']) == [1., 2., 3.]
+    Reporter.close_vectors()
+    reporter.shutdown()
+    wide = pd.read_csv(file + '.csv')
+    assert list(wide.columns) == ['a', 'b']
+    assert list(wide['a']) == [1., 2., 3.]
+    assert list(wide['b'].dropna()) == [4., 5.]
+
+
+def test_report_vector_appends_to_old_wide_csv(tmp_path):
+    file = str(tmp_path / "vectors")
+    pd.DataFrame({'old': [1., 2.]}).to_csv(file + '.csv', index=False)
+    # written by report_vector before it used MetricsWriter
+    reporter = Reporter(str(tmp_path / "vectors.log"))
+    reporter.report_vector([3., 4., 5.], file, 'new')
+    Reporter.close_vectors()
+    reporter.shutdown()
+    wide = pd.read_csv(file + '.csv')
+    assert list(wide.columns) == ['old', 'new']
+    assert list(wide['old'].dropna()) == [1., 2.]
+    assert list(wide['new']) == [3., 4., 5.]
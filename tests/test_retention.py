@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests the history retention policies in retention.py
+"""
+
+# standard library
+import pickle
+
+# 3rd party packages
+import pytest
+import numpy as np
+
+# local source
+from VIAYN.memory import MemoryTracker
+from VIAYN.retention import RetentionPolicy, RetentionEnum
+
+
+def test_retention_policy_spec():
+    with pytest.raises(AssertionError):
+        RetentionPolicy(RetentionEnum.last_n)
+    with pytest.raises(AssertionError):
+        RetentionPolicy(RetentionEnum.full, n_episodes=2)
+    assert RetentionPolicy().n_to_drop(5) == 0
+    assert RetentionPolicy(RetentionEnum.last_n, 2).n_to_drop(5) == 3
+    assert RetentionPolicy(RetentionEnum.last_n, 2).n_to_drop(1) == 0
+    assert RetentionPolicy(RetentionEnum.none).n_to_drop(5) == 5
+
+
+@pytest.mark.parametrize("retention,n_kept", [
+    (RetentionPolicy(RetentionEnum.full), 4),
+    (RetentionPolicy(RetentionEnum.last_n, 2), 2),
+    (RetentionPolicy(RetentionEnum.last_n, 0), 0),
+    (RetentionPolicy(RetentionEnum.summary), 0),
+    (RetentionPolicy(RetentionEnum.none), 0),
+])
+def test_retention_keeps_last_episodes(retention, n_kept, gen_training_run):
+    agents, _, full = gen_training_run(n_episodes=4)
+    other_agents, _, result = gen_training_run(n_episodes=4, retention=retention)
+    assert len(result.histories) == n_kept
+    assert result.pruned_episodes == 4 - n_kept
+    assert [result.balances[a] for a in other_agents] == [full.balances[a] for a in agents]
+    for episode_num in range(4 - n_kept, 4):
+        assert result.history_item_for(episode_num, 3).selected_action == \
+            full.history_item_for(episode_num, 3).selected_action
+    if retention.kind != RetentionEnum.summary:
+        assert result.summaries is None
+
+
+def test_summary_retention(gen_training_run):
+    agents, _, full = gen_training_run(n_episodes=4)
+    _, _, result = gen_training_run(n_episodes=4, retention=RetentionPolicy(RetentionEnum.summary))
+    assert len(result.summaries) == 4
+    for summaries, episode in zip(result.summaries, full.histories):
+        assert [s.selected_action for s in summaries] == [item.selected_action for item in episode]
+        assert [s.t_enacted for s in summaries] == list(range(5))
+        assert all(s.balances.shape == (len(agents),) for s in summaries)
+        assert all(np.sum(s.balances) <= len(agents) + 1e-6 for s in summaries)
+    summary = result.summaries[0][0]
+    assert not hasattr(summary, '__dict__')
+    restored = pickle.loads(pickle.dumps(summary))
+    assert restored.welfare_score == summary.welfare_score
+    assert np.array_equal(restored.balances, summary.balances)
+
+
+def test_retention_with_memory_tracker(gen_training_run):
+    tracker = MemoryTracker()
+    _, _, result = gen_training_run(
+        n_episodes=5, retention=RetentionPolicy(RetentionEnum.last_n, 1), memory_tracker=tracker)
+    assert len(result.histories) == 1
+    assert result.pruned_episodes == 4
+    assert len(tracker.episode_bytes) == 1
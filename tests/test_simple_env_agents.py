@@ -17,6 +17,8 @@ import numpy as np
 import VIAYN.project_types as project_types
 import VIAYN.samples.factory as fac
 import VIAYN.samples.vote_ranges as vote_range
+from VIAYN.samples.agents import UniformBettingMechanism
+from VIAYN.samples.env import IntAction
 from tests.conftest import floatIsEqual
 
 
@@ -188,6 +190,58 @@ def test_random_simple_agent_forward_prediction(N):
                 )
 
 
+
+@pytest.mark.parametrize("N,bounds", [
+    (1, (lambda dt: 0., lambda dt: 2.)),
+    (4, (lambda dt: -dt, lambda dt: 3. * dt + 1)),
+    (3, (lambda dt: -np.inf, lambda dt: np.nan)),
+])
+def test_uniform_betting_mechanism(N, bounds):
+    """
+    UniformBettingMechanism draws its whole prediction at once, which should
+    give exactly the same stream as drawing one timestep at a time.
+    The constant bet is shared & immutable
+    """
+    mech = UniformBettingMechanism(
+        constant_bet=[0.1] * N,
+        tsteps_per_prediction=N,
+        min_possible_prediction=bounds[0],
+        max_possible_prediction=bounds[1],
+        random_seed=11)
+    genPred = np.random.default_rng(seed=11)
+    shared_bet = None
+    for _ in range(20):
+        action_bet = mech.bet(None, None, 1.)
+        shared_bet = action_bet.bet if shared_bet is None else shared_bet
+        assert action_bet.bet is shared_bet
+        assert isinstance(action_bet.bet, tuple)
+        for dt in range(N):
+            low, high = bounds[0](dt), bounds[1](dt)
+            low = low if np.isfinite(low) else 0.
+            high = high if np.isfinite(high) else 10.
+            assert action_bet.prediction[dt] == genPred.uniform(low=low, high=high)
+
+
+
+def test_static_env_action_space():
+    """
+    The action space should be built once & map indices to actions both ways
+    """
+    env = fac.EnvFactory.create(fac.EnvsFactorySpec(fac.EnvsEnum.default, n_actions=4))
+    space = env.action_space()
+    assert space is env.action_space()
+    assert len(space) == 4
+    assert list(space) == env.actions()
+    for idx, action in enumerate(env.actions()):
+        assert space.action_at(idx) == action
+        assert space.index_of(action) == idx
+        assert space.index_of(IntAction(idx)) == idx
+    assert not hasattr(IntAction(0), '__dict__')
+    assert IntAction(2) == IntAction(2)
+    assert IntAction(2) != IntAction(3)
+    assert len({IntAction(1), IntAction(1), IntAction(2)}) == 2
+
+
 ############ NOT ALLOWED ############
 # @pytest.mark.parametrize("config",#
 #     random_agent_config           #
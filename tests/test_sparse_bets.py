@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests that zero bets are left out of the training loop
+& that broke agents can be excluded from betting with money_epsilon
+"""
+
+# standard library
+from typing import List
+
+# 3rd party packages
+import pytest
+import numpy as np
+
+# local source
+import VIAYN.samples.factory as fac
+from VIAYN.project_types import ActionBet, Agent
+from VIAYN.samples.env import IntAction
+from VIAYN.train import train, get_agent_bets
+
+
+class FixedBetAgent(Agent):
+    """
+    Votes 1 & bets the same amounts on every action, predicting the action's index
+    """
+
+    def __init__(self, bet: List[float]):
+        self.bet_amounts = bet
+        self.n_bets = 0
+
+    def vote(self, state):
+        return 1.
+
+    def bet(self, state, action, money):
+        self.n_bets += 1
+        return ActionBet(bet=list(self.bet_amounts), prediction=[float(action.idx)] * len(self.bet_amounts))
+
+
+def test_zero_bets_are_not_stored(gen_system_config, gen_env):
+    config = gen_system_config()
+    agents = [FixedBetAgent([0.]), FixedBetAgent([0.2]), FixedBetAgent([0.])]
+    config.voting_manager.set_n_agents(len(agents))
+    env = gen_env(n_actions=3)
+    balances = {agent: 1. for agent in agents}
+    balances[agents[1]] = 0.
+    bets = get_agent_bets(agents, balances, env.state(), env.actions())
+    assert set(bets.keys()) == set(env.actions())
+    assert all(len(action_bets) == 0 for action_bets in bets.values())
+    # every agent was still asked to bet
+    assert all(agent.n_bets == len(env.actions()) for agent in agents)
+
+
+@pytest.mark.parametrize("policy", list(fac.PolicyConfigEnum))
+def test_zero_betting_agents_do_not_crash_training(policy, gen_system_config, gen_env):
+    config = gen_system_config(policy=policy)
+    agents = [FixedBetAgent([0., 0.]), FixedBetAgent([0.3, 0.]), FixedBetAgent([0., 0.4])]
+    result = train(agents, gen_env(n_actions=3), range(2), config, tsteps_per_episode=5)
+    assert sum(result.balances.values()) == pytest.approx(len(agents))
+    assert result.balances[agents[0]] == pytest.approx(1.)
+    for episode in result.histories:
+        for item in episode:
+            for bets in item.predictions.values():
+                assert agents[0] not in [bet.cast_by for bet in bets]
+
+
+@pytest.mark.parametrize("policy", list(fac.PolicyConfigEnum))
+def test_actions_without_bets_are_not_selected(policy, gen_system_config, gen_env):
+    class OnlyBetsOnLast(FixedBetAgent):
+        def bet(self, state, action, money):
+            self.n_bets += 1
+            amount: float = 0.5 if action.idx == 2 else 0.
+            return ActionBet(bet=[amount], prediction=[0.])
+
+    config = gen_system_config(policy=policy)
+    agents = [OnlyBetsOnLast([0.]) for _ in range(3)]
+    result = train(agents, gen_env(n_actions=3), range(2), config, tsteps_per_episode=4)
+    assert all(item.selected_action == IntAction(2) for episode in result.histories for item in episode)
+
+
+def test_money_epsilon_excludes_broke_agents(gen_system_config, gen_env):
+    config = gen_system_config()
+    agents = [FixedBetAgent([0.9]), FixedBetAgent([0.1])]
+    config.voting_manager.set_n_agents(len(agents))
+    env = gen_env(n_actions=3)
+    balances = {agents[0]: 1e-9, agents[1]: 1.}
+    bets = get_agent_bets(agents, balances, env.state(), env.actions(), money_epsilon=1e-6)
+    assert agents[0].n_bets == 0
+    assert all([bet.cast_by for bet in action_bets] == [agents[1]] for action_bets in bets.values())
+
+
+def test_money_epsilon_none_matches_default(gen_training_run):
+    run_params = dict(n_agents=6, n_actions=3, tsteps=6)
+    agents, _, expected = gen_training_run(**run_params)
+    other_agents, _, result = gen_training_run(**run_params, money_epsilon=None)
+    assert [result.balances[a] for a in other_agents] == [expected.balances[a] for a in agents]
+    tiny_agents, _, tiny = gen_training_run(**run_params, money_epsilon=np.finfo(float).tiny)
+    # agents never run out of money completely here, so nobody is excluded
+    assert [tiny.balances[a] for a in tiny_agents] == [expected.balances[a] for a in agents]
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests saving & loading TrainResults in storage.py
+and the spec serialization that it relies on
+"""
+
+# standard library
+import json
+
+# 3rd party packages
+import pytest
+import numpy as np
+
+# local source
+import VIAYN.samples.factory as fac
+import VIAYN.samples.vote_ranges as vote_range
+from VIAYN.retention import RetentionPolicy, RetentionEnum
+from VIAYN.storage import save_result, load_result
+from VIAYN.train import train
+
+
+def run(config, retention=RetentionPolicy()):
+    specs = [
+        fac.AgentFactorySpec(fac.AgentsEnum.constant, vote=1., prediction=[1., 2.], bet=[0.1, 0.2]),
+        fac.AgentFactorySpec(fac.AgentsEnum.random, vote=0., seed=3, bet=0.5, N=2,
+            totalVotesBound=(config.voting_manager.min_possible_vote_total,
+                             config.voting_manager.max_possible_vote_total)),
+        fac.AgentFactorySpec(fac.AgentsEnum.constant, vote=0., prediction=[0., 1.], bet=[0.3, 0.1]),
+    ]
+    agents = [fac.AgentFactory.create(spec) for spec in specs]
+    env = fac.EnvFactory.create(fac.EnvsFactorySpec(fac.EnvsEnum.default, n_actions=3))
+    result = train(agents, env, range(3), config, tsteps_per_episode=4, retention=retention)
+    return specs, agents, env, result
+
+
+def test_spec_round_trip():
+    spec = fac.AgentFactorySpec(fac.AgentsEnum.constant, vote=1., prediction=[1., 2.], bet=[0.1, 0.2])
+    spec_dict = fac.spec_to_dict(spec)
+    assert json.loads(json.dumps(spec_dict)) == spec_dict
+    assert fac.spec_from_dict(spec_dict, fac.AgentFactorySpec) == spec
+
+    voting = fac.VotingConfigFactorySpec(fac.VotingConfigEnum.suggested, vote_range.FiveStarVoteRange())
+    rebuilt = fac.spec_from_dict(fac.spec_to_dict(voting), fac.VotingConfigFactorySpec)
+    assert rebuilt.configType == voting.configType
+    assert isinstance(rebuilt.voteRange, vote_range.FiveStarVoteRange)
+
+
+def test_spec_with_callables_is_not_rebuilt():
+    spec = fac.AgentFactorySpec(fac.AgentsEnum.random, vote=1., seed=0, bet=0.5, N=1,
+        totalVotesBound=(lambda _: 0., lambda _: 1.))
+    spec_dict = fac.spec_to_dict(spec)
+    assert spec_dict['totalVotesBound'] is None
+    assert spec_dict['dropped_fields'] == ['totalVotesBound']
+    with pytest.raises(AssertionError):
+        fac.spec_from_dict(spec_dict, fac.AgentFactorySpec)
+
+
+@pytest.mark.parametrize("mmap_mode", ['r', None])
+def test_save_load_round_trip(tmp_path, mmap_mode, gen_system_config):
+    specs, agents, env, result = run(gen_system_config())
+    path = str(tmp_path / "result")
+    save_result(result, path, agent_specs=specs)
+    stored = load_result(path, mmap_mode=mmap_mode)
+
+    assert stored.n_episodes == 3
+    assert len(stored.agent_specs) == 3
+    assert fac.spec_from_dict(stored.agent_specs[0], fac.AgentFactorySpec) == specs[0]
+    assert list(stored.balances) == [result.balances[a] for a in agents]
+    if mmap_mode is not None:
+        assert isinstance(stored.arrays['bet_values'], np.memmap)
+
+    actions = [next(a for a in env.actions() if str(a) == label) for label in stored.actions]
+    assert [actions[i] for i in stored.selected_actions(1)] == \
+        [item.selected_action for item in result.histories[1]]
+    bets = stored.step_bets(2, 1)
+    expected = [bet for bets in result.history_item_for(2, 1).predictions.values() for bet in bets]
+    assert [list(b) for b in bets.bet] == [list(b.bet) for b in expected]
+    assert list(bets.money) == [b.money for b in expected]
+
+    rebuilt = stored.to_train_result(agents, actions)
+    assert rebuilt.balances == result.balances
+    assert rebuilt.summaries is None
+    for episode, expected_episode in zip(rebuilt.histories, result.histories):
+        for item, expected_item in zip(episode, expected_episode):
+            assert item.selected_action == expected_item.selected_action
+            assert item.t_enacted == expected_item.t_enacted
+            assert item.predictions.keys() == expected_item.predictions.keys()
+            for action in item.predictions:
+                for bet, expected_bet in zip(item.predictions[action], expected_item.predictions[action]):
+                    assert bet.cast_by is expected_bet.cast_by
+                    assert list(bet.prediction) == list(expected_bet.prediction)
+                    assert bet.money == expected_bet.money
+
+
+def test_save_load_summaries(tmp_path, gen_system_config):
+    specs, agents, env, result = run(gen_system_config(), RetentionPolicy(RetentionEnum.summary))
+    path = str(tmp_path / "result")
+    save_result(result, path)
+    stored = load_result(path)
+    assert stored.n_episodes == 0
+    assert stored.pruned_episodes == 3
+    assert stored.agent_specs == [None] * 3
+    with pytest.raises(AssertionError):
+        stored.episode_steps(0)
+    actions = [next(a for a in env.actions() if str(a) == label) for label in stored.actions]
+    rebuilt = stored.to_train_result(agents, actions)
+    for episode, expected_episode in zip(rebuilt.summaries, result.summaries):
+        for summary, expected in zip(episode, expected_episode):
+            assert summary.selected_action == expected.selected_action
+            assert summary.welfare_score == expected.welfare_score
+            assert np.array_equal(summary.balances, expected.balances)
+
+
+def test_save_load_summaries_agent_order(tmp_path, gen_system_config):
+    specs, agents, env, result = run(gen_system_config(), RetentionPolicy(RetentionEnum.summary))
+    path = str(tmp_path / "result")
+    reordered = agents[::-1]
+    save_result(result, path, agents=reordered)
+    stored = load_result(path)
+    assert np.array_equal(
+        stored.arrays['summary_balances'][-1], result.summaries[-1][-1].balances[::-1])
+    rebuilt = stored.to_train_result(reordered, env.actions())
+    # the i-th summary balance is the balance of the i-th agent of the train result
+    for episode, expected_episode in zip(rebuilt.summaries, result.summaries):
+        for summary, expected in zip(episode, expected_episode):
+            for agent in agents:
+                assert summary.balances[list(rebuilt.balances).index(agent)] == \
+                    expected.balances[list(result.balances).index(agent)]
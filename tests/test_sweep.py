@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests expanding & running parameter sweeps in sweep.py
+"""
+
+# standard library
+import csv
+
+# 3rd party packages
+import pytest
+
+# local source
+import VIAYN.samples.factory as fac
+from VIAYN.sweep import expand_grid, run_sweep, with_value, write_table, final_balances
+
+
+calls = []
+
+
+def counting_metrics(result, agents):
+    calls.append(1)
+    return final_balances(result, agents)
+
+
+def test_with_value(gen_run_spec):
+    base = gen_run_spec()
+    spec = with_value(base, 'policy.configType', fac.PolicyConfigEnum.simple)
+    assert spec.policy.configType == fac.PolicyConfigEnum.simple
+    assert spec.policy.random_seed == 0
+    spec = with_value(base, 'agents.bet', [0.1])
+    assert all(agent.bet == [0.1] for agent in spec.agents)
+    spec = with_value(base, 'agents.1.bet', [0.2])
+    assert [agent.bet for agent in spec.agents] == [[0.5], [0.2], [0.5]]
+    assert with_value(base, 'tsteps_per_episode', 3).tsteps_per_episode == 3
+    assert base.agents[1].bet == [0.5]
+
+
+def test_expand_grid(gen_run_spec):
+    cells = expand_grid(gen_run_spec(), {
+        'payout.upperBound': list(fac.UpperBoundConfigEnum),
+        'policy.configType': list(fac.PolicyConfigEnum),
+        'agents.bet': [[0.1], [0.9]]})
+    assert len(cells) == 2 * 3 * 2
+    coordinates, spec = cells[-1]
+    assert coordinates == {
+        'payout.upperBound': fac.UpperBoundConfigEnum.quartile95,
+        'policy.configType': fac.PolicyConfigEnum.suggested_general,
+        'agents.bet': [0.9]}
+    assert spec.payout.upperBound == fac.UpperBoundConfigEnum.quartile95
+    assert len({spec.key() for _, spec in cells}) == len(cells)
+
+
+def test_key_is_stable(gen_run_spec):
+    assert gen_run_spec().key() == gen_run_spec().key()
+    assert gen_run_spec().key() != with_value(gen_run_spec(), 'episode_seeds', (0,)).key()
+    unhashable = with_value(gen_run_spec(), 'agents', (fac.AgentFactorySpec(
+        fac.AgentsEnum.random, vote=1., seed=0, bet=0.5, N=1,
+        totalVotesBound=(lambda _: 0., lambda _: 1.)),))
+    assert unhashable.key() is None
+
+
+def test_run_sweep_caches_cells(tmp_path, gen_run_spec):
+    axes = {'policy.random_seed': [0, 1], 'agents.bet': [[0.1], [0.5]]}
+    cache_dir = str(tmp_path / "cache")
+    calls.clear()
+    rows = run_sweep(gen_run_spec(), axes, metrics=counting_metrics, cache_dir=cache_dir)
+    assert len(calls) == 4
+    assert len(rows) == 4
+    assert rows[0]['policy.random_seed'] == 0 and rows[0]['agents.bet'] == [0.1]
+    assert all(sum(row[f'balance_{i}'] for i in range(3)) == pytest.approx(3.) for row in rows)
+    assert all(row['n_steps'] == 10 for row in rows)
+
+    rerun = run_sweep(gen_run_spec(), {**axes, 'tsteps_per_episode': [5, 2]},
+        metrics=counting_metrics, cache_dir=cache_dir)
+    assert len(calls) == 4 + 4
+    # only the cells with tsteps_per_episode=2 are new
+    assert [{k: v for k, v in row.items() if k != 'tsteps_per_episode'} for row in rerun[::2]] == rows
+
+    path = str(tmp_path / "table.csv")
+    write_table(rerun, path)
+    with open(path) as f:
+        table = list(csv.DictReader(f))
+    assert len(table) == 8
+    assert set(table[0]) >= {'policy.random_seed', 'agents.bet', 'tsteps_per_episode', 'balance_0', 'key'}
+
+
+def test_run_sweep_on_workers(gen_run_spec):
+    axes = {'policy.configType': [fac.PolicyConfigEnum.suggested, fac.PolicyConfigEnum.suggested_general]}
+    assert run_sweep(gen_run_spec(), axes, n_workers=2) == run_sweep(gen_run_spec(), axes)
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests the main training loop in train.py
+and the batch bet validation that it relies on
+"""
+
+# standard library
+
+# 3rd party packages
+import pytest
+import numpy as np
+
+# local source
+import VIAYN.samples.factory as fac
+import VIAYN.samples.vote_ranges as vote_range
+from VIAYN.project_types import WeightedBet, ActionBet
+from VIAYN.samples.env import IntAction, StaticEnvironment, StaticVectorEnvironment
+from VIAYN.accumulators import LossAccumulator
+from VIAYN.memory import MemoryTracker
+from VIAYN.retention import RetentionPolicy, RetentionEnum
+from VIAYN.train import train, train_vectorized, filter_valid_bets
+from VIAYN.validation import validation_level, ValidationLevel, get_validation_level
+
+
+@pytest.mark.parametrize("voting,vr", [
+    (fac.VotingConfigEnum.simple, vote_range.BinaryVoteRange()),
+    (fac.VotingConfigEnum.simple, vote_range.FiveStarVoteRange()),
+    (fac.VotingConfigEnum.suggested, vote_range.ZeroToTenVoteRange()),
+    (fac.VotingConfigEnum.simple, vote_range.UnboundedVoteRange()),
+])
+def test_validate_bets_matches_validate_bet(voting, vr, gen_weighted_bet, gen_system_config):
+    """
+    The batch validator should agree with calling validate_bet on each bet
+    """
+    config = gen_system_config(voting, vr)
+    config.voting_manager.set_n_agents(4)
+    rng = np.random.default_rng(0)
+    predictions = rng.uniform(-5, 25, size=(200, 3))
+    bets = rng.uniform(0, 0.33, size=(200, 3))
+    expected = [
+        config.validate_bet(gen_weighted_bet(list(b), list(p)))
+        for b, p in zip(bets, predictions)]
+    mask = config.validate_bets(predictions, bets)
+    assert mask.shape == (200,)
+    assert mask.dtype == bool
+    assert list(mask) == expected
+
+
+def test_validate_bets_rejects_overspending(gen_system_config):
+    config = gen_system_config()
+    config.voting_manager.set_n_agents(2)
+    predictions = np.array([[1., 1.], [1., 1.], [1., 3.]])
+    bets = np.array([[0.5, 0.5], [0.6, 0.5], [0.1, 0.1]])
+    assert list(config.validate_bets(predictions, bets)) == [True, False, False]
+
+
+def test_filter_valid_bets(gen_weighted_bet, gen_system_config):
+    config = gen_system_config()
+    config.voting_manager.set_n_agents(2)
+    a0, a1 = IntAction(0), IntAction(1)
+    good = gen_weighted_bet([0.5], [1.], action=a0, money=1.)
+    bad = gen_weighted_bet([0.5], [5.], action=a0, money=1.)
+    placed = {a0: [good, bad], a1: []}
+    filtered = filter_valid_bets(placed, config)
+    assert filtered[a0] == [good]
+    assert filtered[a1] == []
+
+
+def test_train_conserves_money(gen_training_run):
+    """
+    Money only moves between agents, so the total should be preserved
+    after all outstanding bets are paid out
+    """
+    agents, _, result = gen_training_run(n_agents=6, n_actions=3)
+    assert len(result.histories) == 3
+    assert all(len(episode) == 5 for episode in result.histories)
+    assert abs(sum(result.balances.values()) - len(agents)) < 1e-6
+
+
+def test_train_discards_invalid_bets(gen_system_config, gen_random_agents, gen_env):
+    """
+    Agents predicting outside of the possible vote totals should never have
+    their bets recorded, and should never lose money
+    """
+    config = gen_system_config()
+    agents = gen_random_agents(config, 4)
+    cheater = fac.AgentFactory.create(fac.AgentFactorySpec(
+        fac.AgentsEnum.constant, vote=1., prediction=100., bet=0.5, N=1))
+    env = gen_env(n_actions=2)
+    result = train(agents + [cheater], env, range(2), config, tsteps_per_episode=4)
+    for episode in result.histories:
+        for item in episode:
+            for bets in item.predictions.values():
+                assert all(isinstance(bet, WeightedBet) for bet in bets)
+                assert all(bet.cast_by is not cheater for bet in bets)
+    assert result.balances[cheater] == 1.
+
+
+@pytest.mark.parametrize("policy", [
+    fac.PolicyConfigEnum.simple,
+    fac.PolicyConfigEnum.suggested,
+    fac.PolicyConfigEnum.suggested_general,
+])
+def test_train_vectorized_matches_train(policy, gen_system_config, gen_env):
+    """
+    Each environment of the vectorized loop should give exactly the same
+    result as running train() on its own
+    """
+    n_envs = 3
+
+    def setup(env_idx):
+        config = gen_system_config(vr=vote_range.UnboundedVoteRange(), policy=policy)
+        agents = [
+            fac.AgentFactory.create(fac.AgentFactorySpec(
+                fac.AgentsEnum.random, vote=float(i), totalVotesBound=(lambda _: 0., lambda _: 10.),
+                seed=100 * env_idx + i, bet=0.5, N=2))
+            for i in range(4)]
+        return agents, config
+
+    expected = []
+    for env_idx in range(n_envs):
+        agents, config = setup(env_idx)
+        env = gen_env(n_actions=3)
+        expected.append((agents, train(agents, env, range(2), config, tsteps_per_episode=6)))
+
+    setups = [setup(env_idx) for env_idx in range(n_envs)]
+    vector_env = fac.EnvFactory.create_vector(
+        fac.EnvsFactorySpec(fac.EnvsEnum.default, n_actions=3), n_envs)
+    results = train_vectorized(
+        [agents for agents, _ in setups], vector_env,
+        [[seed] * n_envs for seed in range(2)],
+        [config for _, config in setups], tsteps_per_episode=6)
+
+    assert len(results) == n_envs
+    for (agents, result), (expected_agents, expected_result) in zip(
+            zip([agents for agents, _ in setups], results), expected):
+        assert [result.balances[a] for a in agents] == \
+            [expected_result.balances[a] for a in expected_agents]
+        assert len(result.histories) == len(expected_result.histories)
+        for episode, expected_episode in zip(result.histories, expected_result.histories):
+            assert [item.selected_action for item in episode] == \
+                [item.selected_action for item in expected_episode]
+
+
+class CountdownEnvironment(StaticEnvironment):
+    """
+    StaticEnvironment whose episodes last as many timesteps as their seed
+    """
+
+    def __init__(self, n_actions: int):
+        super().__init__(n_actions)
+        self.remaining = 0
+
+    def step(self, action):
+        self.remaining -= 1
+
+    def done(self):
+        return self.remaining <= 0
+
+    def seed(self, random_seed=None):
+        self.remaining = random_seed
+
+
+class CountdownVectorEnvironment(StaticVectorEnvironment):
+    """
+    n_envs copies of CountdownEnvironment
+    """
+
+    def __init__(self, n_envs: int, n_actions: int):
+        super().__init__(n_envs, n_actions)
+        self.remaining = np.zeros(n_envs, dtype=np.int64)
+        self.n_steps = 0
+
+    def step(self, actions):
+        super().step(actions)
+        self.remaining -= 1
+        self.n_steps += 1
+
+    def done(self):
+        return self.remaining <= 0
+
+    def seed(self, random_seeds=None):
+        self.remaining = np.array(random_seeds, dtype=np.int64)
+
+
+def test_train_vectorized_uneven_episodes(gen_system_config, gen_random_agents):
+    """
+    Environments that finish their episodes at different timesteps
+    (or immediately) should still match train(), with train()'s options
+    """
+    seed_rows = [[2, 5, 0], [0, 3, 4], [4, 1, 6]]
+    n_envs = len(seed_rows[0])
+
+    def setup():
+        config = gen_system_config(vr=vote_range.UnboundedVoteRange())
+        return gen_random_agents(config, 3), config, [LossAccumulator()]
+
+    options = dict(
+        tsteps_per_episode=5, record_balances=True,
+        retention=RetentionPolicy(RetentionEnum.last_n, 1))
+    expected = []
+    for i in range(n_envs):
+        agents, config, accumulators = setup()
+        result = train(
+            agents, CountdownEnvironment(2), [seeds[i] for seeds in seed_rows], config,
+            memory_tracker=MemoryTracker(), accumulators=accumulators, **options)
+        expected.append((agents, result, accumulators[0]))
+
+    setups = [setup() for _ in range(n_envs)]
+    trackers = [MemoryTracker() for _ in range(n_envs)]
+    env = CountdownVectorEnvironment(n_envs, 2)
+    results = train_vectorized(
+        [agents for agents, _, _ in setups], env, seed_rows,
+        [config for _, config, _ in setups], memory_trackers=trackers,
+        accumulators=[accumulators for _, _, accumulators in setups], **options)
+
+    assert env.n_steps == 5 + 4 + 5
+    # each episode runs until its longest environment is done, capped at 5
+    for (agents, _, accumulators), result, (expected_agents, expected_result, expected_loss) in zip(
+            setups, results, expected):
+        assert [result.balances[a] for a in agents] == \
+            [expected_result.balances[a] for a in expected_agents]
+        assert result.pruned_episodes == expected_result.pruned_episodes
+        assert [[item.selected_action for item in episode] for episode in result.histories] == \
+            [[item.selected_action for item in episode] for episode in expected_result.histories]
+        np.testing.assert_array_equal(result.balance_history, expected_result.balance_history)
+        np.testing.assert_array_equal(
+            result.balance_episode_offsets, expected_result.balance_episode_offsets)
+        assert [accumulators[0].mean_loss()[a] for a in agents] == \
+            [expected_loss.mean_loss()[a] for a in expected_agents]
+    assert [list(np.diff(r.balance_episode_offsets)) for r in results] == [[2, 0, 4], [5, 3, 1], [0, 4, 5]]
+
+
+def test_static_vector_environment():
+    env = fac.EnvFactory.create_vector(fac.EnvsFactorySpec(fac.EnvsEnum.default, n_actions=2), 4)
+    states = env.reset()
+    assert states.shape == (4,)
+    assert all(state == IntAction(0) for state in states)
+    assert env.done().shape == (4,)
+    assert not env.done().any()
+    env.step(np.array([1, 0, 1, 1]))
+    assert len(env.actions()) == 2
+
+
+@pytest.mark.parametrize("level", [ValidationLevel.boundary, ValidationLevel.off])
+def test_train_validation_levels_match_full(level, gen_system_config, gen_random_agents, gen_env):
+    """
+    With well-behaved agents, turning checks down should not change the result
+    """
+    def run():
+        config = gen_system_config(policy=fac.PolicyConfigEnum.suggested)
+        agents = gen_random_agents(config, 5, N=2)
+        env = gen_env(n_actions=3)
+        return agents, train(agents, env, range(2), config, tsteps_per_episode=6)
+
+    agents, expected = run()
+    with validation_level(level):
+        assert get_validation_level() is level
+        other_agents, result = run()
+    assert get_validation_level() is ValidationLevel.full
+    assert [result.balances[a] for a in other_agents] == [expected.balances[a] for a in agents]
+    for episode, expected_episode in zip(result.histories, expected.histories):
+        assert [item.selected_action for item in episode] == \
+            [item.selected_action for item in expected_episode]
+
+
+def test_action_bet_checks_follow_validation_level():
+    with pytest.raises(AssertionError):
+        ActionBet([0.7, 0.7], [1., 1.])
+    with validation_level("boundary"):
+        with pytest.raises(AssertionError):
+            ActionBet([0.7, 0.7], [1., 1.])
+    with validation_level("off"):
+        ActionBet([0.7, 0.7], [1., 1.])
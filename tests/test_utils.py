@@ -281,4 +281,21 @@ def test_behaviour_lookup_from_dict(key,expected):
         (None,2,'d'):6,
         ('a',1,'k'):7
     }
-    assert U.behaviour_lookup_from_dict(key,keyVal) == expected
\ No newline at end of file
+    assert U.behaviour_lookup_from_dict(key,keyVal) == expected
+
+def test_vote_bounds_table():
+    """
+    Bound methods of a voting config should read from its cached table,
+    while arbitrary getters are evaluated for each timestep
+    """
+    vc = fac.VotingConfigFactory.create(
+        fac.VotingConfigFactorySpec(fac.VotingConfigEnum.simple, vote_range.FiveStarVoteRange()))
+    vc.set_n_agents(2)
+    table = U.vote_bounds_table(vc.min_possible_vote_total, vc.max_possible_vote_total, 3)
+    assert np.shares_memory(table, vc.vote_total_bounds(3))
+    assert list(table[0]) == [2., 2., 2.]
+    assert list(table[1]) == [10., 10., 10.]
+
+    table = U.vote_bounds_table(lambda dt: -dt, lambda dt: 2. * dt, 3)
+    assert list(table[0]) == [0., -1., -2.]
+    assert list(table[1]) == [0., 2., 4.]
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+This file tests the serializable vote bounds in vote_bounds.py
+and the serialization of specs that use them & lookup tables
+"""
+
+# standard library
+import json
+import pickle
+
+# 3rd party packages
+import pytest
+import numpy as np
+
+# local source
+import VIAYN.samples.factory as fac
+from VIAYN.samples.env import IntAction
+from VIAYN.sweep import with_value
+
+
+@pytest.mark.parametrize("bound,text", [
+    (fac.VoteBound.constant(0.99), "constant(0.99)"),
+    (fac.VoteBound.constant(-8), "constant(-8.0)"),
+    (fac.VoteBound.constant(float('inf')), "constant(inf)"),
+    (fac.VoteBound.voting_config_min(), "voting_config.min"),
+    (fac.VoteBound.voting_config_max(), "voting_config.max"),
+])
+def test_parse_round_trip(bound, text):
+    assert str(bound) == text
+    assert fac.VoteBound.parse(text) == bound
+    assert pickle.loads(pickle.dumps(bound)) == bound
+
+
+def test_parse_rejects_unknown():
+    with pytest.raises(ValueError):
+        fac.VoteBound.parse("voting_config.mean")
+
+
+def test_resolve(gen_system_config):
+    voting = gen_system_config().voting_manager
+    constant = fac.VoteBound.constant(0.5)
+    assert constant.resolve(None) is constant
+    assert constant(3) == 0.5
+    assert fac.VoteBound.voting_config_max().resolve(voting) == voting.max_possible_vote_total
+    assert fac.VoteBound.voting_config_min().resolve(voting) == voting.min_possible_vote_total
+    with pytest.raises(AssertionError):
+        fac.VoteBound.voting_config_max().resolve(None)
+    with pytest.raises(AssertionError):
+        fac.VoteBound.voting_config_max()(0)
+
+
+def test_random_agent_matches_lambda_bounds(gen_system_config):
+    voting = gen_system_config().voting_manager
+    declarative = fac.AgentFactory.create(fac.AgentFactorySpec(
+        fac.AgentsEnum.random, vote=1., seed=2, bet=0.5, N=3,
+        totalVotesBound=(fac.VoteBound.voting_config_min(), fac.VoteBound.voting_config_max())), voting)
+    closures = fac.AgentFactory.create(fac.AgentFactorySpec(
+        fac.AgentsEnum.random, vote=1., seed=2, bet=0.5, N=3,
+        totalVotesBound=(voting.min_possible_vote_total, voting.max_possible_vote_total)))
+    for _ in range(5):
+        assert declarative.bet(None, None, 1.).prediction == closures.bet(None, None, 1.).prediction
+
+
+def test_random_spec_round_trip():
+    spec = fac.AgentFactorySpec(fac.AgentsEnum.random, vote=1., seed=0, bet=0.5, N=1,
+        totalVotesBound=(fac.VoteBound.constant(0.), fac.VoteBound.voting_config_max()))
+    spec_dict = fac.spec_to_dict(spec)
+    assert spec_dict['totalVotesBound'] == [
+        {'vote_bound': 'constant(0.0)'}, {'vote_bound': 'voting_config.max'}]
+    assert json.loads(json.dumps(spec_dict)) == spec_dict
+    assert fac.spec_from_dict(spec_dict, fac.AgentFactorySpec) == spec
+    assert fac.spec_hash(spec_dict) is not None
+    assert pickle.loads(pickle.dumps(spec)) == spec
+
+
+def test_lookup_spec_round_trip():
+    spec = fac.AgentFactorySpec(fac.AgentsEnum.composite, vote=0., N=2,
+        vote_lookup={IntAction(0): 1., IntAction(1): 0.},
+        bet_lookup={(None, None, None): 0.1, ('a', IntAction(1), None): [0.2, 0.3]},
+        prediction_lookup={(None, None, None): 1.})
+    spec_dict = fac.spec_to_dict(spec)
+    assert 'dropped_fields' not in spec_dict
+    rebuilt = fac.spec_from_dict(json.loads(json.dumps(spec_dict)), fac.AgentFactorySpec)
+    assert rebuilt.vote_lookup == spec.vote_lookup
+    assert rebuilt.bet_lookup == spec.bet_lookup
+    assert rebuilt.prediction_lookup == spec.prediction_lookup
+    agent = fac.AgentFactory.create(rebuilt)
+    assert agent.vote(IntAction(1)) == 0.
+    assert np.allclose(agent.bet('a', IntAction(1), 1.).bet, [0.2, 0.3])
+
+
+def test_lookup_with_mechanisms_is_dropped():
+    spec = fac.AgentFactorySpec(fac.AgentsEnum.composite, vote=0., N=1,
+        vote_lookup={0: fac.AgentFactory._create_static_vote_selection_(
+            fac.AgentFactorySpec(fac.AgentsEnum.constant, vote=1., prediction=1., bet=0.5))},
+        bet_lookup={(None, None, None): 0.1},
+        prediction_lookup={(None, None, None): 1.})
+    assert fac.spec_to_dict(spec)['dropped_fields'] == ['vote_lookup']
+
+
+def test_run_spec_resolves_voting_config_bounds(gen_run_spec):
+    spec = with_value(gen_run_spec(), 'agents', (
+        fac.AgentFactorySpec(fac.AgentsEnum.random, vote=1., seed=0, bet=0.5, N=1,
+            totalVotesBound=(fac.VoteBound.voting_config_min(), fac.VoteBound.voting_config_max())),
+        fac.AgentFactorySpec(fac.AgentsEnum.constant, vote=0., prediction=[0.], bet=[0.5])))
+    assert spec.key() is not None
+    agents, result = spec.run()
+    assert len(result.histories) == len(spec.episode_seeds)
+    agents_again, again = pickle.loads(pickle.dumps(spec)).run()
+    assert [again.balances[a] for a in agents_again] == [result.balances[a] for a in agents]
@@ -123,3 +123,27 @@ def test_vote_config(aggFun, VR,vals,gen_vote_conf, spec_enum):
     assert vc.min_possible_vote_total() <= vc.max_possible_vote_total()
     assert(floatIsEqual(vc.aggregate_votes(vals), aggFun(vals,VR)))    
 
+
+
+@pytest.mark.parametrize("spec_enum,VR", [
+    (fac.VotingConfigEnum.simple, vote_range.BinaryVoteRange()),
+    (fac.VotingConfigEnum.simple, vote_range.UnboundedVoteRange()),
+    (fac.VotingConfigEnum.suggested, vote_range.ZeroToTenVoteRange()),
+    (fac.VotingConfigEnum.classical, vote_range.FiveStarVoteRange()),
+])
+def test_vote_total_bounds(spec_enum, VR, gen_vote_conf):
+    """
+    Checks that the bounds table matches the bound methods, is read-only
+    and is recomputed when the number of agents changes
+    """
+    vc: project_types.VotingConfiguration = gen_vote_conf(spec_enum, VR)
+    for n_agents in [3, 7]:
+        vc.set_n_agents(n_agents)
+        bounds = vc.vote_total_bounds(4)
+        assert bounds.shape == (2, 4)
+        assert not bounds.flags.writeable
+        for dt in range(4):
+            assert floatIsEqual(bounds[0, dt], vc.min_possible_vote_total(dt))
+            assert floatIsEqual(bounds[1, dt], vc.max_possible_vote_total(dt))
+        assert vc.vote_total_bounds(2).shape == (2, 2)
+        assert vc.vote_total_bounds(0).shape == (2, 0)